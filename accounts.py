@@ -0,0 +1,126 @@
+"""Paper accounts trading on one shared market feed.
+
+Each PaperAccount keeps its own balance, positions, trade history and
+StrategyParams, but prices, price history, indicators and sentiment are read
+from a single feed engine (the live TradingBot) instead of being fetched per
+account. An AccountBook runs every account once per trading cycle: the
+market columns of the strategy inputs are built once for the cycle and each
+account only adds its own positions, so a cycle costs one data refresh plus
+one vectorized strategy evaluation per account.
+
+    book = AccountBook(bot)
+    book.add('tight-stops', params=StrategyParams(stop_loss_full=4))
+    book.auto_trade()
+"""
+import logging
+
+from engine import Account
+from strategy import StrategyParams
+from sweep import random_search
+
+logger = logging.getLogger(__name__)
+
+
+def _feed_attribute(name):
+    return property(lambda self: getattr(self.feed, name), doc=f"The feed's {name}")
+
+
+class PaperAccount(Account):
+    """An in-memory account trading its own parameters on a feed engine's market state"""
+
+    symbols = _feed_attribute('symbols')
+    current_prices = _feed_attribute('current_prices')
+    price_history = _feed_attribute('price_history')
+    technical_indicators = _feed_attribute('technical_indicators')
+    sentiment_data = _feed_attribute('sentiment_data')
+
+    def __init__(self, name, feed, initial_balance=10000.0, params=None, commission_per_trade=0.0,
+                 history_limit=100, trade_index_limit=1000, log=None):
+        super().__init__(initial_balance, commission_per_trade, feed.clock,
+                         log or (lambda message: None), params, history_limit, trade_index_limit)
+        self.name = name
+        self.feed = feed
+        self.initial_balance = initial_balance
+        self.is_running = True
+
+    def summary(self):
+        """Balance, value and return of the account"""
+        portfolio_value = sum(quantity * self.current_prices.get(symbol, 0)
+                              for symbol, quantity in self.portfolio.items())
+        total_value = self.balance + portfolio_value
+        return {
+            'name': self.name,
+            'is_running': self.is_running,
+            'balance': round(self.balance, 2),
+            'portfolio': dict(self.portfolio),
+            'portfolio_value': round(portfolio_value, 2),
+            'total_value': round(total_value, 2),
+            'return_pct': round((total_value / self.initial_balance - 1) * 100, 3) if self.initial_balance else 0.0,
+            'realized_pnl': round(self.ledger.realized_pnl(), 2),
+            'trade_count': self.trade_count,
+            'params': self.params.to_dict()
+        }
+
+
+class AccountBook:
+    """Paper accounts sharing one feed engine, run together once per cycle"""
+
+    def __init__(self, feed, log=logger.info):
+        self.feed = feed
+        self.log = log
+        self.accounts = {}  # name -> PaperAccount, in the order they were added
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def add(self, name, **kwargs):
+        """Open a paper account; kwargs are PaperAccount options (initial_balance, params, ...)"""
+        if name in self.accounts:
+            raise ValueError(f"Account {name} already exists")
+        kwargs.setdefault('log', lambda message: self.log(f"[{name}] {message}"))
+        account = self.accounts[name] = PaperAccount(name, self.feed, **kwargs)
+        return account
+
+    def add_many(self, count, grid=None, seed=None, prefix='paper', **kwargs):
+        """Open count accounts, with StrategyParams sampled from a sweep.py grid when given"""
+        param_sets = random_search(grid, count, seed) if grid else [{}] * count
+        start = len(self.accounts) + 1
+        return [
+            self.add(f'{prefix}-{start + i}', params=StrategyParams(**overrides), **kwargs)
+            for i, overrides in enumerate(param_sets)
+        ]
+
+    def remove(self, name):
+        return self.accounts.pop(name, None)
+
+    def get(self, name):
+        return self.accounts.get(name)
+
+    def running(self):
+        return any(account.is_running for account in self.accounts.values())
+
+    def auto_trade(self, market=None):
+        """Run every running account's strategy on this cycle's market; returns how many ran
+
+        market is the feed's market_inputs() for the cycle when the caller
+        already built it.
+        """
+        running = [account for account in self.accounts.values() if account.is_running]
+        if not running:
+            return 0
+        market = self.feed.market_inputs() if market is None else market
+        if market is None:
+            return 0
+        for account in running:
+            try:
+                account.auto_trade(market)
+            except Exception as e:
+                logger.error(f"Error in auto-trade for account {account.name}: {e}")
+        return len(running)
+
+    def summaries(self, sort_by='total_value'):
+        """summary() of every account, best first"""
+        summaries = [account.summary() for account in self.accounts.values()]
+        if sort_by:
+            summaries.sort(key=lambda summary: summary[sort_by], reverse=True)
+        return summaries
@@ -0,0 +1,289 @@
+"""Offline event-driven backtesting.
+
+Replays stored OHLCV bars through the same TradingEngine the live bot uses
+(strategy rules, vectorized signals and fills), on a simulated clock instead
+of datetime.now(). The market columns the strategy reads (price history,
+SMA/RSI) are computed up front, a symbol at a time with the live bot's
+streaming indicator states, so a replayed bar only pays for the signal
+evaluation and fills:
+
+    python backtest.py data/ --symbols AAPL MSFT --balance 10000 --fills fills.csv
+
+The data directory holds one bar file per symbol, SYMBOL.csv or
+SYMBOL.parquet, with a Datetime (or Date) column and a Close column, e.g. as
+written by yfinance's DataFrame.to_csv(). With --interval, the directory is
+a bar store instead (see barstore.py), e.g. the one the live bot syncs:
+
+    python backtest.py bars/ --interval 5m --symbols AAPL MSFT
+
+Sentiment is not replayed, so sentiment rules stay neutral.
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from barstore import BarStore
+from engine import TradingEngine
+from strategy import MIN_HISTORY, sentiment_signals
+
+TIME_COLUMNS = ('Datetime', 'Date', 'timestamp', 'time')
+
+
+def load_bars(path, symbols=None, interval=None):
+    """Load {symbol: bars DataFrame} from a directory of CSV/Parquet files
+
+    With interval, path is a bar store root and every stored bar of that
+    interval is loaded.
+    """
+    if interval is not None:
+        return load_store_bars(path, interval, symbols)
+
+    bars = {}
+    for filename in sorted(os.listdir(path)):
+        symbol, ext = os.path.splitext(filename)
+        if ext not in ('.csv', '.parquet') or (symbols and symbol not in symbols):
+            continue
+
+        file_path = os.path.join(path, filename)
+        frame = pd.read_parquet(file_path) if ext == '.parquet' else pd.read_csv(file_path)
+        time_column = next((c for c in TIME_COLUMNS if c in frame.columns), None)
+        if time_column is not None:
+            frame = frame.set_index(time_column)
+        frame.index = pd.to_datetime(frame.index, utc=True)
+        bars[symbol] = frame.sort_index()
+
+    missing = set(symbols or []) - set(bars)
+    if missing:
+        raise ValueError(f"No bar files for: {', '.join(sorted(missing))}")
+    return bars
+
+
+def load_store_bars(path, interval, symbols=None):
+    """Load {symbol: bars DataFrame} for one interval from a bar store"""
+    store = BarStore(path)
+    symbols = symbols or sorted(
+        name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name, interval))
+    )
+    bars = {symbol: store.read(symbol, interval) for symbol in symbols}
+    missing = [symbol for symbol, stored in bars.items() if stored.empty]
+    if missing:
+        raise ValueError(f"No {interval} bars stored for: {', '.join(missing)}")
+    return {symbol: stored.to_frame() for symbol, stored in bars.items()}
+
+
+def align_bars(bars):
+    """Put every symbol's closes on one timeline
+
+    Returns (epoch seconds, symbols, closes) where closes has one row per
+    timestamp and one column per symbol. Gaps are forward filled; a symbol
+    stays NaN until its first bar.
+    """
+    closes = pd.concat({symbol: frame['Close'] for symbol, frame in bars.items()}, axis=1)
+    closes = closes.sort_index().ffill()
+    timestamps = closes.index.asi8 / 1e9
+    return timestamps, list(closes.columns), closes.to_numpy(dtype=np.float64)
+
+
+class Backtester(TradingEngine):
+    """TradingEngine driven by replayed bars on a simulated clock"""
+
+    def __init__(self, timestamps, symbols, closes, initial_balance=10000.0,
+                 commission_per_trade=0.0, history_capacity=100, bar_seconds=None, params=None):
+        if bar_seconds is None:
+            # Indicators aggregate into bars of the data's own interval
+            bar_seconds = float(np.median(np.diff(timestamps))) if len(timestamps) > 1 else 300
+        super().__init__(
+            symbols,
+            initial_balance=initial_balance,
+            commission_per_trade=commission_per_trade,
+            history_capacity=history_capacity,
+            bar_seconds=bar_seconds,
+            clock=self.simulated_now,
+            log=lambda *args: None,
+            params=params
+        )
+        self.timestamps = timestamps
+        self.closes = closes
+        self.sim_time = timestamps[0] if len(timestamps) else 0.0
+        self.is_running = True
+        for symbol in symbols:
+            # No warm-up download: indicators build up from the replayed bars
+            self.indicators.warm_up(symbol, [], [])
+
+    def simulated_now(self):
+        return datetime.fromtimestamp(self.sim_time, tz=timezone.utc)
+
+    def portfolio_value(self):
+        return sum(quantity * self.current_prices[symbol] for symbol, quantity in self.portfolio.items())
+
+    def indicator_columns(self, prices):
+        """SMA and RSI for every bar and symbol (NaN until available)
+
+        Each symbol's bars go through its streaming IndicatorState in one
+        tight loop, so the values are the ones apply_quotes() would produce.
+        """
+        nan = float('nan')
+        timestamps = np.asarray(self.timestamps, dtype=np.float64).tolist()
+        sma = np.full(prices.shape, np.nan)
+        rsi = np.full(prices.shape, np.nan)
+        for column, symbol in enumerate(self.symbols):
+            state = self.indicators.states[symbol]
+            column_prices = prices[:, column]
+            priced = np.flatnonzero(~np.isnan(column_prices))
+            if not len(priced):
+                continue
+            first = priced[0]
+            sma_values, rsi_values = [], []
+            for price, timestamp in zip(column_prices[first:].tolist(), timestamps[first:]):
+                state.update(price, timestamp)
+                value = state.sma()
+                sma_values.append(nan if value is None else value)
+                value = state.rsi()
+                rsi_values.append(nan if value is None else value)
+            sma[first:, column] = sma_values
+            rsi[first:, column] = rsi_values
+        return sma, rsi
+
+    def replay_markets(self):
+        """Yield market_inputs() for every replayed bar (None before any symbol is ready)
+
+        Gives the same columns apply_quotes() and market_inputs() build tick
+        by tick, from whole bar arrays instead.
+        """
+        prices = pd.DataFrame(self.closes).ffill().to_numpy()  # Gaps keep the last price
+        previous = np.vstack([np.full((1, prices.shape[1]), np.nan), prices[:-1]])
+        previous = np.where(np.isnan(previous), 100.0, previous)  # apply_quotes' first change is from 100
+        with np.errstate(invalid='ignore'):
+            declining = np.where(previous > 0, (prices - previous) / previous * 100, 0) < -0.005
+        points = np.cumsum(~np.isnan(prices), axis=0)
+        sma, rsi = self.indicator_columns(prices)
+        ready = (np.minimum(points, self.history_capacity) >= MIN_HISTORY) & ~np.isnan(sma) & ~np.isnan(rsi)
+        sentiment = sentiment_signals([
+            self.sentiment_data.get(symbol, {}).get('overall_score', 0.0) for symbol in self.symbols
+        ])
+        symbols = np.array(self.symbols, dtype=object)
+
+        for step in range(len(prices)):
+            columns = np.flatnonzero(ready[step])
+            if not len(columns):
+                yield None
+                continue
+            price = prices[step, columns]
+            prev_price = prices[step - 1, columns]
+            yield {
+                'symbols': symbols[columns].tolist(),
+                'price': price,
+                'prev3_price': prices[step - 2, columns],
+                'change': (price - prev_price) / prev_price,
+                'recent_decline': declining[step - 4:step, columns].all(axis=0),
+                'rsi': rsi[step, columns],
+                'sma': sma[step, columns],
+                'sentiment': sentiment[columns]
+            }
+
+    def run(self, stream=False):
+        """Replay every bar and return fills, the equity curve and summary stats
+
+        stream=True feeds the bars through apply_quotes() and the streaming
+        indicators one tick at a time, like the live bot (several times slower).
+        """
+        start = time.perf_counter()
+        initial_balance = self.balance
+        equity = np.empty(len(self.timestamps))
+        markets = None if stream else self.replay_markets()
+
+        for step, timestamp in enumerate(self.timestamps):
+            self.sim_time = timestamp
+            quotes = {
+                symbol: price
+                for symbol, price in zip(self.symbols, self.closes[step].tolist())
+                if price == price  # Skip NaN before a symbol's first bar
+            }
+            if stream:
+                self.apply_quotes(quotes, timestamp)
+                self.auto_trade()
+            else:
+                self.current_prices.update(quotes)
+                market = next(markets)
+                if market is not None:
+                    self.auto_trade(market)
+            equity[step] = self.balance + self.portfolio_value()
+
+        equity_curve = pd.Series(equity, index=pd.to_datetime(self.timestamps, unit='s', utc=True))
+        fills = pd.DataFrame(self.trading_history)
+        stats = summarize(equity_curve, fills, self.ledger, initial_balance)
+        stats['symbols'] = len(self.symbols)
+        stats['elapsed_seconds'] = time.perf_counter() - start
+        return {'fills': fills, 'equity': equity_curve, 'stats': stats}
+
+
+def summarize(equity, fills, ledger, initial_balance):
+    """Summary statistics for an equity curve and its fills"""
+    values = equity.to_numpy()
+    stats = {
+        'bars': len(values),
+        'initial_equity': initial_balance,
+        'final_equity': float(values[-1]) if len(values) else initial_balance,
+        'trades': len(fills),
+        'buys': int((fills['action'] == 'BUY').sum()) if len(fills) else 0,
+        'sells': int((fills['action'] == 'SELL').sum()) if len(fills) else 0,
+        'realized_pnl': ledger.realized_pnl(),
+        'fees': sum(position.fees for position in ledger.positions.values())
+    }
+    stats['total_return_pct'] = (stats['final_equity'] / initial_balance - 1) * 100
+
+    if len(values) > 1:
+        running_peak = np.maximum.accumulate(values)
+        stats['max_drawdown_pct'] = float(((values - running_peak) / running_peak).min() * -100)
+
+        returns = np.diff(values) / values[:-1]
+        years = (equity.index[-1] - equity.index[0]).total_seconds() / (365.25 * 86400)
+        periods_per_year = len(returns) / years if years > 0 else 0
+        std = returns.std()
+        stats['sharpe'] = float(returns.mean() / std * np.sqrt(periods_per_year)) if std > 0 else 0.0
+    else:
+        stats['max_drawdown_pct'] = 0.0
+        stats['sharpe'] = 0.0
+    return stats
+
+
+def run_backtest(path, symbols=None, interval=None, **kwargs):
+    """Load bars from a directory and replay them through a Backtester"""
+    timestamps, symbols, closes = align_bars(load_bars(path, symbols, interval))
+    return Backtester(timestamps, symbols, closes, **kwargs).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay stored bars through the trading strategy')
+    parser.add_argument('data_dir', help='directory of SYMBOL.csv / SYMBOL.parquet bar files')
+    parser.add_argument('--symbols', nargs='+', help='symbols to replay (default: all files)')
+    parser.add_argument('--interval', help='read data_dir as a bar store and replay bars of this interval')
+    parser.add_argument('--balance', type=float, default=10000.0)
+    parser.add_argument('--commission', type=float, default=0.0, help='flat fee per fill')
+    parser.add_argument('--fills', help='write fills to this CSV file')
+    parser.add_argument('--equity', help='write the equity curve to this CSV file')
+    args = parser.parse_args()
+
+    result = run_backtest(
+        args.data_dir,
+        args.symbols,
+        args.interval,
+        initial_balance=args.balance,
+        commission_per_trade=args.commission
+    )
+    if args.fills:
+        result['fills'].to_csv(args.fills, index=False)
+    if args.equity:
+        result['equity'].rename('equity').to_csv(args.equity, index_label='time')
+
+    print("📊 Backtest summary")
+    for key, value in result['stats'].items():
+        print(f"   {key}: {value:.2f}" if isinstance(value, float) else f"   {key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Local on-disk store for historical OHLCV bars.
+
+Bars are partitioned by symbol, interval and exchange date:
+
+    bars/AAPL/5m/2024-05-17.npy
+
+Each partition is one float64 array with a row per column (timestamp in
+epoch seconds, Open, High, Low, Close, Volume), so every column is
+contiguous. Partitions are opened with np.load(mmap_mode='r'): a read that
+falls in one partition returns read-only views of the file without copying,
+and the OS page cache is shared by every reader. Completed sessions never
+change, so sync() only downloads bars from the last stored timestamp on.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ('timestamp', 'Open', 'High', 'Low', 'Close', 'Volume')
+COLUMN_INDEX = {column: i for i, column in enumerate(COLUMNS)}
+
+PERIOD_SECONDS = {'wk': 7 * 86400, 'mo': 30 * 86400, 'y': 365 * 86400}
+
+# How far back the first sync of an interval reaches (Yahoo's intraday limits)
+INITIAL_PERIODS = {'1m': '7d', '2m': '60d', '5m': '60d', '15m': '60d', '30m': '60d', '60m': '730d', '1h': '730d'}
+
+
+class Bars:
+    """Columns of stored bars, oldest first"""
+
+    def __init__(self, data, tz='America/New_York'):
+        self.data = data  # (len(COLUMNS), n) array, possibly a read-only memory map
+        self.tz = tz
+
+    @classmethod
+    def from_frame(cls, frame, tz='America/New_York'):
+        """Bars from a yfinance-style DataFrame with a DatetimeIndex"""
+        if frame is None or frame.empty:
+            return cls(np.empty((len(COLUMNS), 0)), tz)
+        frame = frame[frame['Close'].notna()].sort_index()
+        index = frame.index if frame.index.tz is not None else frame.index.tz_localize('UTC')
+        columns = [((index - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)).to_numpy(dtype=np.float64)]
+        columns += [frame[column].to_numpy(dtype=np.float64) for column in COLUMNS[1:]]
+        return cls(np.vstack(columns), tz)
+
+    def __len__(self):
+        return self.data.shape[1]
+
+    def __getitem__(self, column):
+        return self.data[COLUMN_INDEX[column]]
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    @property
+    def timestamps(self):
+        return self.data[0]
+
+    def index(self):
+        """Exchange-time DatetimeIndex for the bars"""
+        milliseconds = np.round(self.data[0] * 1000).astype(np.int64)
+        return pd.to_datetime(milliseconds, unit='ms', utc=True).tz_convert(self.tz)
+
+    def labels(self, fmt='%H:%M'):
+        """Formatted exchange-time label per bar"""
+        return self.index().strftime(fmt).tolist()
+
+    def to_frame(self):
+        """Copy the bars into a DataFrame shaped like yfinance's history()"""
+        return pd.DataFrame({column: self[column] for column in COLUMNS[1:]}, index=self.index())
+
+
+class BarStore:
+    """Date-partitioned, memory-mapped bar files under root"""
+
+    def __init__(self, root, tz='America/New_York'):
+        self.root = root
+        self.tz = tz
+        self.maps = {}  # path -> (stat key, memory map)
+        self.locks = {}  # (symbol, interval) -> lock held while syncing or writing
+        self.lock = threading.Lock()
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, symbol, interval)
+
+    def _lock(self, symbol, interval):
+        with self.lock:
+            return self.locks.setdefault((symbol, interval), threading.RLock())
+
+    def partitions(self, symbol, interval):
+        """Stored dates for symbol and interval, oldest first"""
+        try:
+            names = os.listdir(self._dir(symbol, interval))
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-4] for name in names if name.endswith('.npy'))
+
+    def _open(self, path):
+        """Memory map of one partition, reopened only when the file was replaced"""
+        stat = os.stat(path)
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self.maps.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        data = np.load(path, mmap_mode='r')
+        self.maps[path] = (key, data)
+        return data
+
+    def last_timestamp(self, symbol, interval):
+        """Epoch seconds of the newest stored bar, or None"""
+        dates = self.partitions(symbol, interval)
+        if not dates:
+            return None
+        return float(self._open(os.path.join(self._dir(symbol, interval), dates[-1] + '.npy'))[0, -1])
+
+    def read(self, symbol, interval, days=None, start=None):
+        """Bars from the last days partitions (trading days), or from start (epoch seconds)
+
+        A single partition comes back as zero-copy views of its memory map;
+        a longer range is concatenated once.
+        """
+        dates = self.partitions(symbol, interval)
+        if days is not None:
+            dates = dates[-days:] if days > 0 else []
+        directory = self._dir(symbol, interval)
+        parts = [self._open(os.path.join(directory, date + '.npy')) for date in dates]
+        if start is not None:
+            parts = [part[:, np.searchsorted(part[0], start):] for part in parts if len(part[0]) and part[0, -1] >= start]
+        if not parts:
+            return Bars(np.empty((len(COLUMNS), 0)), self.tz)
+        return Bars(parts[0] if len(parts) == 1 else np.concatenate(parts, axis=1), self.tz)
+
+    def read_period(self, symbol, interval, period):
+        """Bars for a Yahoo-style period
+
+        'Nd' is the last N stored sessions; 'Nwk', 'Nmo' and 'Ny' count
+        calendar time back from now; 'max' is everything stored.
+        """
+        count, unit = period.rstrip('dwkmoy'), period[len(period.rstrip('dwkmoy')):]
+        if period == 'max':
+            return self.read(symbol, interval)
+        if unit == 'd' and count.isdigit():
+            return self.read(symbol, interval, days=int(count))
+        if unit in PERIOD_SECONDS and count.isdigit():
+            return self.read(symbol, interval, start=time.time() - int(count) * PERIOD_SECONDS[unit])
+        raise ValueError(f"Unsupported period: {period}")
+
+    def write(self, symbol, interval, bars):
+        """Merge bars into their partitions; a stored bar with the same timestamp is replaced"""
+        if bars.empty:
+            return 0
+        with self._lock(symbol, interval):
+            directory = self._dir(symbol, interval)
+            os.makedirs(directory, exist_ok=True)
+            dates = bars.index().strftime('%Y-%m-%d').to_numpy()
+            boundaries = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+            for chunk, date in zip(np.split(np.asarray(bars.data), boundaries, axis=1),
+                                   dates[np.r_[0, boundaries]]):
+                path = os.path.join(directory, date + '.npy')
+                if os.path.exists(path):
+                    chunk = np.concatenate([np.load(path), chunk], axis=1)
+                # Keep the newest copy of each timestamp, sorted
+                _, last = np.unique(chunk[0][::-1], return_index=True)
+                chunk = chunk[:, len(chunk[0]) - 1 - last]
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, np.ascontiguousarray(chunk))
+                os.replace(tmp_path, path)
+            return len(bars)
+
+    def sync(self, symbol, interval, fetch):
+        """Download bars newer than the last stored one and store them
+
+        fetch(symbol, interval=..., period=... or start=...) returns a
+        yfinance-style DataFrame, e.g. market_data.fetch_history. The last
+        stored bar is fetched again because it may have been partial.
+        Syncs of the same series run one at a time. Returns the number of
+        bars written.
+        """
+        with self._lock(symbol, interval):
+            last = self.last_timestamp(symbol, interval)
+            if last is None:
+                frame = fetch(symbol, interval=interval, period=INITIAL_PERIODS.get(interval, '1y'))
+            else:
+                frame = fetch(symbol, interval=interval, start=pd.Timestamp(last, unit='s', tz='UTC'))
+            return self.write(symbol, interval, Bars.from_frame(frame, self.tz))
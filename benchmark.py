@@ -0,0 +1,1311 @@
+"""Offline benchmarks for the trading bot hot paths.
+
+Runs against the local fake quote provider so no network access is needed:
+
+    python benchmark.py cycle --symbols 10 100 1000 --latency 0.05
+    python benchmark.py serialize --symbols 10 100 1000 --points 1000
+    python benchmark.py sentiment --symbols 20 --delay 0.2
+    python benchmark.py scoring --texts 2000 --unique 500 --processes 4
+    python benchmark.py stress --requests 5000 --clients 32
+    python benchmark.py journal --trades 100000 --batch 100
+    python benchmark.py bars --days 60
+    python benchmark.py startup --latency 2
+    python benchmark.py markers --trades 10000
+    python benchmark.py backtest --days 252 --symbols 36
+    python benchmark.py suite --output results.json
+    python benchmark.py compare baseline.json results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import importlib
+import tracemalloc
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+
+os.environ.setdefault('QUOTE_PROVIDER', 'fake')
+os.environ.setdefault('TRADE_JOURNAL', os.path.join(tempfile.mkdtemp(), 'trades.db'))  # Start from a fresh account
+os.environ.setdefault('BAR_STORE', tempfile.mkdtemp())  # Keep benchmark bars out of ./bars
+os.environ.setdefault('LOG_LEVEL', 'WARNING')  # Keep the bot's info logging out of the reports
+
+from backtest import Backtester
+from barstore import Bars, BarStore
+from commands import CommandQueue
+from engine import TradingEngine
+from journal import TradeJournal
+from market_data import FakeQuoteProvider
+from payloads import encode_json, orjson
+from sentiment import SentimentService, TextScorer, fetch_reddit, get_sentiment_score
+from shared_state import EngineClient, EngineServer
+from status import ACCOUNT_FIELDS, StatusTracker
+from trade_index import TradeIndex
+import trading_bot
+
+
+def make_symbols(count):
+    """Synthetic ticker names SYM0000, SYM0001, ..."""
+    return [f"SYM{i:04d}" for i in range(count)]
+
+
+def make_bot(symbols, latency=0.0):
+    """Build a bot on the fake provider with indicators and sentiment already warm"""
+    provider = FakeQuoteProvider(seed=42, latency=latency)
+    bot = trading_bot.TradingBot(symbols=symbols, quote_provider=provider, journal_path='')
+    bot.commands.bind()  # This thread drives the bot, as the trading loop does in the app
+    bot.warm_up()
+    bot.commands.wait(bot.inflight_tasks.values(), 60)  # Let warm-up chart builds finish outside the timings
+    now = datetime.now()
+    for symbol in symbols:
+        bot.last_update[symbol] = now
+        bot.sentiment_update_times[symbol] = now
+        bot.indicators.warm_up(symbol, [], [])
+    return bot
+
+
+def time_call(func, repeat):
+    """Return the mean wall time of func() in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def bench_cycle(symbol_counts, latency, repeat):
+    """Compare batched quote fetching with one request per symbol"""
+    print(f"{'symbols':>8} {'batched ms':>12} {'per-symbol ms':>14} {'requests':>9}")
+    for count in symbol_counts:
+        bot = make_bot(make_symbols(count), latency)
+        provider = bot.quote_provider
+
+        provider.calls = 0
+        batched_ms = time_call(bot.update_prices, repeat)
+        batched_calls = provider.calls / repeat
+
+        def per_symbol_cycle():
+            quotes = {}
+            for symbol in bot.symbols:
+                quotes[symbol] = bot.get_real_price(symbol)
+            bot.apply_quotes(quotes, datetime.now().timestamp())
+
+        # The per-symbol path is N round-trips, keep it short at high latency
+        per_symbol_ms = time_call(per_symbol_cycle, 1 if latency else repeat)
+        print(f"{count:>8} {batched_ms:>12.2f} {per_symbol_ms:>14.2f} {batched_calls:>9.0f}")
+
+
+def bench_decision(symbol_counts, repeat):
+    """auto_trade decision time per symbol as the watchlist grows"""
+    print(f"{'symbols':>8} {'auto_trade ms':>14} {'us/symbol':>10}")
+    for count in symbol_counts:
+        bot = make_bot(make_symbols(count))
+        for _ in range(25):
+            bot.apply_quotes(bot.quote_provider.get_quotes(bot.symbols), datetime.now().timestamp())
+        # Keep the balance untouched so every cycle evaluates the same book
+        bot.buy_stock = lambda symbol, quantity: (False, "benchmark")
+        bot.sell_stock = lambda symbol, quantity: (False, "benchmark")
+        bot.is_running = True
+
+        auto_trade_ms = time_call(bot.auto_trade, repeat)
+        print(f"{count:>8} {auto_trade_ms:>14.2f} {auto_trade_ms * 1000 / count:>10.2f}")
+
+
+def bench_accounts(account_counts, symbol_count, cycles, latency):
+    """Cycle cost with many paper accounts on one feed: data refresh vs strategy evaluation"""
+    grid = {'rsi_oversold': (15, 35), 'sma_discount': (0.88, 0.96), 'base_trade_pct': (0.01, 0.06)}
+    print(f"{symbol_count} symbols, {latency}s per quote request, {cycles} cycles")
+    print(f"{'accounts':>9} {'feed ms':>9} {'accounts ms':>12} {'us/account':>11} {'requests':>9} {'trades':>8}")
+    for count in account_counts:
+        bot = make_bot(make_symbols(symbol_count), latency)
+        for _ in range(25):
+            bot.apply_quotes(bot.quote_provider.get_quotes(bot.symbols), datetime.now().timestamp())
+        bot.accounts.add_many(count, grid=grid, seed=42)
+
+        provider = bot.quote_provider
+        provider.calls = 0
+        feed_ms = accounts_ms = 0.0
+        for _ in range(cycles):
+            feed_ms += time_call(bot.update_prices, 1)
+            accounts_ms += time_call(lambda: bot.accounts.auto_trade(bot.market_inputs()), 1)
+        trades = sum(account.trade_count for account in bot.accounts.accounts.values())
+        print(f"{count:>9} {feed_ms / cycles:>9.2f} {accounts_ms / cycles:>12.2f} "
+              f"{accounts_ms / cycles * 1000 / count:>11.1f} {provider.calls / cycles:>9.1f} {trades:>8}")
+
+
+def legacy_convert_to_json_serializable(obj):
+    """The recursive converter /api/status used before the serialization layer"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    elif isinstance(obj, dict):
+        return {k: legacy_convert_to_json_serializable(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_convert_to_json_serializable(item) for item in obj]
+    else:
+        return obj
+
+
+def legacy_status_bytes(engine):
+    """Encode the status the old way: per-point dicts, recursive conversion, json.dumps"""
+    convert = legacy_convert_to_json_serializable
+    price_history = {
+        symbol: [
+            {'time': time, 'price': price, 'change': change, 'change_pct': change_pct}
+            for time, price, change, change_pct in zip(
+                history.times(), history.prices.tolist(), history.changes.tolist(), history.change_pcts.tolist()
+            )
+        ]
+        for symbol, history in engine.price_history.items()
+    }
+    return json.dumps({
+        'balance': convert(round(engine.balance, 2)),
+        'portfolio': convert(engine.portfolio),
+        'prices': convert(engine.current_prices),
+        'price_history': price_history,
+        'technical_indicators': convert(engine.technical_indicators),
+        'sentiment_data': convert(engine.sentiment_data),
+        'trading_history': convert(engine.trading_history[-10:]),
+        'is_running': convert(engine.is_running),
+        'symbols': convert(engine.symbols)
+    }).encode('utf-8')
+
+
+def make_state(count, points, seed=42):
+    """Engine with count symbols, full points-long histories, indicators and sentiment"""
+    rng = np.random.default_rng(seed)
+    symbols = make_symbols(count)
+    engine = TradingEngine(symbols, history_capacity=points)
+    start = datetime.now().timestamp() - points * 10
+    for symbol in symbols:
+        prices = 100 * np.cumprod(1 + rng.normal(0, 0.002, points))
+        changes = np.diff(prices, prepend=prices[0])
+        history = engine.price_history[symbol] = engine.new_price_history()
+        for i, (price, change) in enumerate(zip(prices.tolist(), changes.tolist())):
+            history.append(start + i * 10, price, change, change / (price - change) * 100)
+        engine.current_prices[symbol] = prices[-1]
+        engine.technical_indicators[symbol] = {
+            'sma_20': prices[-20:].mean(), 'rsi': np.float64(rng.uniform(0, 100)), 'volume': np.int64(1000000)
+        }
+        engine.sentiment_data[symbol] = {
+            'overall_score': float(rng.uniform(-1, 1)),
+            'reddit': {'score': 0.1, 'count': 5, 'source': 'reddit'},
+            'news': {'score': 0.2, 'count': 3, 'source': 'news'},
+            'social': {'score': 0.0, 'count': 0, 'source': 'social'},
+            'timestamp': datetime.now().isoformat()
+        }
+    return engine
+
+
+def bench_serialize(symbol_counts, points, repeat):
+    """Full /api/status encoding: legacy recursive path vs the serialization layer"""
+    encoder = 'orjson' if orjson is not None else 'json'
+    print(f"encoder: {encoder}, {points}-point histories")
+    print(f"{'symbols':>8} {'legacy ms':>11} {'encode ms':>11} {'speedup':>8} {'MB':>7}")
+    for count in symbol_counts:
+        engine = make_state(count, points)
+        tracker = StatusTracker(engine)
+        tracker.publish()  # Formats each history label once, as the live loop does
+
+        legacy_ms = time_call(lambda: legacy_status_bytes(engine), repeat)
+        encode_ms = time_call(lambda: encode_json(tracker._full()), repeat)
+        size = len(encode_json(tracker._full())) / 1e6
+        print(f"{count:>8} {legacy_ms:>11.1f} {encode_ms:>11.1f} {legacy_ms / encode_ms:>7.1f}x {size:>7.2f}")
+
+
+class StubSentimentHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the Reddit search and NewsAPI endpoints"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        source = url.path.strip('/')
+        symbol = parse_qs(url.query).get('q', [''])[0]
+        self.server.requests[source] = self.server.requests.get(source, 0) + 1
+        time.sleep(self.server.delays.get(source, 0))
+        if source in self.server.failing:
+            self.send_error(500)
+            return
+
+        if symbol:
+            texts = [f"{symbol} beats estimates, great quarter", f"{symbol} faces weak demand"]
+        else:
+            # Combined feed: two stories per symbol plus one that only contains a ticker as a substring
+            texts = [
+                text
+                for name in self.server.symbols
+                for text in (f"{name} beats estimates, great quarter", f"Analysts cut {name} on weak demand")
+            ]
+            texts.append(f"New {self.server.symbols[0]}data export tool released")
+        if source == 'reddit':
+            body = {'data': {'children': [{'data': {'title': text, 'selftext': ''}} for text in texts]}}
+        else:
+            body = {'articles': [{'title': text, 'description': '', 'content': ''} for text in texts]}
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(delays, symbols):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubSentimentHandler)
+    server.delays = delays
+    server.symbols = symbols
+    server.failing = set()
+    server.requests = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stub_sentiment_config(server, reddit_rate_limit=(1000, 60)):
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return {
+        'reddit': {'base_url': f"{base_url}/reddit", 'user_agent': 'bench', 'weight': 0.4,
+                   'timeout': 2, 'rate_limit': reddit_rate_limit, 'failure_threshold': 3, 'reset_timeout': 60},
+        'news': {'base_url': f"{base_url}/news", 'api_key': 'bench', 'weight': 0.4,
+                 'timeout': 2, 'rate_limit': (100, 86400), 'feed_ttl': 900},
+        'social': {'weight': 0.2, 'timeout': 1, 'rate_limit': (1000, 60)}
+    }
+
+
+def legacy_news_sentiment(config, symbol):
+    """The old per-symbol NewsAPI query with substring matching"""
+    response = requests.get(config['base_url'], params={'q': symbol, 'apiKey': config['api_key']},
+                            timeout=config['timeout'])
+    texts = [article['title'] for article in response.json().get('articles', [])]
+    return [get_sentiment_score(text) for text in texts if symbol.lower() in text.lower()]
+
+
+def bench_sentiment(symbol_count, delay):
+    """Sentiment service against a local stub: concurrency, shared news feed, breaker, rate limit"""
+    symbols = make_symbols(symbol_count)
+    server = start_stub_server({'reddit': delay, 'news': delay}, symbols)
+    config = stub_sentiment_config(server)
+
+    # Previous path: Reddit then a NewsAPI query, one after the other per symbol, nothing memoized
+    uncached = TextScorer(max_entries=0)
+    start = time.perf_counter()
+    for symbol in symbols:
+        fetch_reddit(requests, config['reddit'], symbol, uncached)  # Module-level requests.get, no pooling
+        legacy_news_sentiment(config['news'], symbol)
+    sequential_ms = (time.perf_counter() - start) * 1000 / symbol_count
+    legacy_news_calls = server.requests.get('news', 0)
+
+    server.requests.clear()
+    service = SentimentService(config, max_workers=8)
+    start = time.perf_counter()
+    for symbol in symbols:
+        service.refresh(symbol)
+    concurrent_ms = (time.perf_counter() - start) * 1000 / symbol_count
+
+    start = time.perf_counter()
+    for future in [service.refresh_async(symbol) for symbol in symbols]:
+        future.result()
+    background_ms = (time.perf_counter() - start) * 1000 / symbol_count
+
+    print(f"stub upstream delay {delay * 1000:.0f}ms, {symbol_count} symbols")
+    print(f"   sequential per symbol:           {sequential_ms:8.1f} ms")
+    print(f"   concurrent sources per symbol:   {concurrent_ms:8.1f} ms")
+    print(f"   background refresh, all symbols: {background_ms:8.1f} ms/symbol")
+    print(f"   news requests: {legacy_news_calls} per-symbol before, {server.requests.get('news', 0)} "
+          f"for two service refreshes of every symbol")
+
+    # Substring matching routes the "<ticker>data" story to the first symbol; the index does not
+    legacy_matches = sum(
+        symbols[0].lower() in text.lower()
+        for text in [f"New {symbols[0]}data export tool released"]
+    )
+    news = service.get(symbols[0])['news']
+    print(f"   {symbols[0]} news articles: {news['count']} routed (substring matching would add {legacy_matches})")
+
+    # Failing upstream: the breaker opens after 3 errors and later refreshes skip it
+    server.failing.add('reddit')
+    start = time.perf_counter()
+    for symbol in symbols:
+        service.refresh(symbol)
+    failing_ms = (time.perf_counter() - start) * 1000 / symbol_count
+    server.failing.clear()
+    stats = service.stats()
+    print(f"   reddit failing: {failing_ms:.1f} ms/symbol, {stats['errors']} errors, "
+          f"{stats['skipped_open_circuit']} skipped, breaker {stats['breakers']['reddit']}")
+
+    # Rate limit: a 5-request budget on Reddit leaves the other symbols on their last readings
+    limited = SentimentService(stub_sentiment_config(server, reddit_rate_limit=(5, 3600)))
+    for symbol in symbols:
+        limited.refresh(symbol)
+    print(f"   reddit limited to 5 requests: {limited.stats()['skipped_rate_limited']} fetches skipped")
+
+    # Breaker trips, its half-open probe is rate limited, tokens refill: calls must resume
+    config = stub_sentiment_config(server, reddit_rate_limit=(3, 1.5))
+    config['reddit']['reset_timeout'] = 0.2
+    probing = SentimentService(config)
+    server.failing.add('reddit')
+    for symbol in symbols[:3]:
+        probing.refresh(symbol)
+    server.failing.clear()
+    time.sleep(0.25)
+    probing.refresh(symbols[0])  # Breaker ready to probe, but the bucket is still empty
+    skipped_probe = probing.stats()['skipped_rate_limited']
+    time.sleep(1.0)
+    server.requests.clear()
+    probing.refresh(symbols[0])
+    resumed = server.requests.get('reddit', 0)
+    print(f"   reddit recovering: {skipped_probe} probe rate limited, {resumed} request after the refill, "
+          f"breaker {probing.stats()['breakers']['reddit']}")
+    server.shutdown()
+    if not skipped_probe or not resumed:
+        print("   FAIL: the breaker did not probe again after a rate-limited probe")
+        raise SystemExit(1)
+
+
+def make_headlines(count, seed=42):
+    """Synthetic finance headlines for scoring benchmarks"""
+    rng = random.Random(seed)
+    subjects = make_symbols(50)
+    verbs = ['beats', 'misses', 'raises', 'cuts', 'crushes', 'struggles with', 'surprises on', 'warns on']
+    objects = ['earnings estimates', 'revenue guidance', 'a strong quarter', 'weak demand',
+               'record margins', 'an awful outlook', 'great product reviews', 'supply problems']
+    tails = ['as investors cheer', 'and shares slide', 'amid a broad rally', 'despite bad news', '']
+    return [
+        f"{rng.choice(subjects)} {rng.choice(verbs)} {rng.choice(objects)} {rng.choice(tails)} #{i}"
+        for i in range(count)
+    ]
+
+
+def bench_scoring(text_count, unique_count, processes):
+    """TextBlob per text vs the deduplicating, memoizing TextScorer"""
+    unique = make_headlines(unique_count)
+    texts = [unique[i % unique_count] for i in range(text_count)]
+    random.Random(1).shuffle(texts)
+
+    def timed(func):
+        start = time.perf_counter()
+        func()
+        return (time.perf_counter() - start) * 1000
+
+    print(f"{text_count} texts, {unique_count} distinct")
+    print(f"   TextBlob per text:        {timed(lambda: [get_sentiment_score(t) for t in texts]):9.1f} ms")
+    scorer = TextScorer()
+    print(f"   scorer, cold cache:       {timed(lambda: scorer.score_many(texts)):9.1f} ms")
+    print(f"   scorer, warm cache:       {timed(lambda: scorer.score_many(texts)):9.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_path = os.path.join(tmpdir, 'scores.json')
+        scorer.cache_path = cache_path
+        scorer.save()
+        restarted = TextScorer(cache_path=cache_path)
+        print(f"   scorer, loaded from disk: {timed(lambda: restarted.score_many(texts)):9.1f} ms")
+
+    if processes:
+        pooled = TextScorer(processes=processes)
+        pooled.score_many(texts[:pooled.pool_min_batch])  # Start the workers outside the timing
+        pooled.cache.clear()
+        print(f"   scorer, {processes} processes, cold: {timed(lambda: pooled.score_many(texts)):9.1f} ms")
+        pooled.pool.shutdown()
+
+
+def check_books(bot, initial_balance):
+    """Replay the journaled trades and list every way the account disagrees with them"""
+    problems = []
+    balance = initial_balance
+    positions = {}
+    bot.commit_journal()
+    for trade, _ in bot.journal.read_trades():
+        sign = 1 if trade['action'] == 'BUY' else -1
+        balance -= sign * trade['total']
+        quantity = positions[trade['symbol']] = positions.get(trade['symbol'], 0) + sign * trade['quantity']
+        if quantity < 0:
+            problems.append(f"{trade['symbol']} oversold at {trade['time']}")
+        if balance < -1e-6:
+            problems.append(f"balance went negative at {trade['time']}")
+        if abs(balance - trade['balance_after']) > 1e-6:
+            problems.append(f"balance_after {trade['balance_after']:.2f} != replayed {balance:.2f}")
+    if abs(balance - bot.balance) > 1e-6:
+        problems.append(f"balance {bot.balance:.2f} != replayed {balance:.2f}")
+    held = {symbol: quantity for symbol, quantity in positions.items() if quantity}
+    if held != bot.portfolio:
+        problems.append(f"portfolio {bot.portfolio} != replayed {held}")
+    ledger = {symbol: bot.ledger.quantity(symbol) for symbol in bot.ledger.positions if bot.ledger.quantity(symbol)}
+    if ledger != held:
+        problems.append(f"ledger {ledger} != replayed {held}")
+
+    restored = TradingEngine(bot.symbols, history_limit=bot.history_limit, trade_index_limit=bot.trade_index.limit)
+    restored.attach_journal(TradeJournal(bot.journal.path))
+    if (restored.balance, restored.portfolio, restored.trade_count) != (bot.balance, bot.portfolio, bot.trade_count):
+        problems.append(f"journal restores balance {restored.balance:.2f}, portfolio {restored.portfolio}")
+    if restored.trading_history != bot.trading_history:
+        problems.append("journal restores a different recent trade history")
+    for symbol in bot.symbols:
+        # The live index trims in bulk, so it may hold more than limit trades until the next trim
+        live, recovered = bot.trade_index.view(symbol), restored.trade_index.view(symbol)
+        keep = min(live.count, bot.trade_index.limit or live.count)
+        if recovered.records[:recovered.count] != live.records[live.count - keep:live.count]:
+            problems.append(f"journal restores {recovered.count} chart trades for {symbol}, "
+                            f"the live index has {keep}")
+    restored.journal.close()
+    return problems
+
+
+def check_status(status):
+    """Problems in one /api/status snapshot taken mid-run"""
+    problems = []
+    trades = status['trading_history']
+    if trades and abs(trades[-1]['balance_after'] - status['balance']) > 0.006:
+        problems.append(f"status balance {status['balance']} != last trade's {trades[-1]['balance_after']:.2f}")
+    if abs(status['balance'] + status['portfolio_value'] - status['total_value']) > 0.011:
+        problems.append(f"status total_value {status['total_value']} != balance + portfolio_value")
+    if any(quantity <= 0 for quantity in status['portfolio'].values()):
+        problems.append(f"status portfolio {status['portfolio']} has an empty or short position")
+    return problems
+
+
+def bench_stress(request_count, clients, readers):
+    """Concurrent manual trades and status reads against the running trading loop"""
+    bot = trading_bot.bot
+    app = trading_bot.app
+    rng = random.Random(42)
+    orders = [
+        (rng.choice(['buy', 'sell']), rng.choice(bot.symbols), rng.randint(1, 20))
+        for _ in range(request_count)
+    ]
+    results = {'placed': 0, 'rejected': 0, 'errors': 0, 'reads': 0}
+    problems = []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def trader(batch):
+        client = app.test_client()
+        for action, symbol, quantity in batch:
+            response = client.post('/api/trade', json={'action': action, 'symbol': symbol, 'quantity': quantity})
+            key = 'errors' if response.status_code != 200 else ('placed' if response.json['success'] else 'rejected')
+            with lock:
+                results[key] += 1
+
+    def reader():
+        client = app.test_client()
+        while not done.is_set():
+            found = check_status(client.get('/api/status').json)
+            with lock:
+                results['reads'] += 1
+                problems.extend(found)
+
+    client = app.test_client()
+    while client.get('/api/ready').status_code != 200:
+        time.sleep(0.1)
+    if not client.get('/api/status').json['is_running']:
+        client.post('/api/toggle_bot')  # Let the auto-trader compete with the manual orders
+    threads = [threading.Thread(target=trader, args=(orders[i::clients],)) for i in range(clients)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+
+    print(f"{request_count} orders from {clients} clients, {readers} status readers")
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # Keep the bot's trade logging out of the report
+        for thread in threads:
+            thread.start()
+        for thread in threads[:clients]:
+            thread.join()
+        done.set()
+        for thread in threads[clients:]:
+            thread.join()
+        client.post('/api/toggle_bot')
+        problems.extend(bot.execute(check_books, bot, trading_bot.TRADING_CONFIG['initial_balance']))
+    elapsed = time.perf_counter() - start
+
+    print(f"   {results['placed']} placed, {results['rejected']} rejected, {results['errors']} errors "
+          f"in {elapsed:.2f}s ({request_count / elapsed:.0f} orders/s)")
+    print(f"   {results['reads']} status reads, {bot.trade_count} trades journaled in {bot.journal.commits} commits, "
+          f"balance ${bot.balance:.2f}")
+    for problem in problems[:20]:
+        print(f"   FAIL: {problem}")
+    if problems or results['errors']:
+        raise SystemExit(1)
+    print("   OK: balance, portfolio and ledger match the journal, and a restart restores them")
+
+def bench_journal(trade_count, batch, snapshot_every, symbol_count):
+    """Journal append throughput with group commits, and restart recovery time as the journal grows"""
+    symbols = make_symbols(symbol_count)
+    rng = random.Random(42)
+    index_limit = trading_bot.TRADING_CONFIG['trade_index_limit']
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'trades.db')
+        engine = TradingEngine(symbols, initial_balance=1e9, history_limit=1000, trade_index_limit=index_limit)
+        engine.attach_journal(TradeJournal(path, snapshot_every=snapshot_every))
+        engine.current_prices = {symbol: rng.uniform(50, 150) for symbol in symbols}
+
+        def append(count):
+            start = time.perf_counter()
+            for i in range(count):
+                symbol = rng.choice(symbols)
+                if engine.portfolio.get(symbol, 0) >= 10 and rng.random() < 0.5:
+                    engine.sell_stock(symbol, 10)
+                else:
+                    engine.buy_stock(symbol, 10)
+                if (i + 1) % batch == 0:
+                    engine.commit_journal()
+            engine.commit_journal()
+            return time.perf_counter() - start
+
+        def recover():
+            start = time.perf_counter()
+            restored = TradingEngine(symbols, initial_balance=1e9, history_limit=1000, trade_index_limit=index_limit)
+            restored.attach_journal(TradeJournal(path, snapshot_every=snapshot_every))
+            recover_ms = (time.perf_counter() - start) * 1000
+            restored.journal.close()
+            matches = (restored.balance, restored.portfolio, restored.trade_count) == \
+                (engine.balance, engine.portfolio, engine.trade_count)
+            markers = sum(restored.trade_index.counts.values())
+            print(f"   recover at {engine.trade_count:>7} trades: {recover_ms:8.1f} ms, "
+                  f"{len(restored.trading_history)} trades in memory, {markers} chart trades, "
+                  f"state {'matches' if matches else 'DIFFERS'}")
+            if not matches:
+                raise SystemExit(1)
+            return recover_ms, markers
+
+        elapsed = append(trade_count)
+        print(f"{trade_count} trades on {symbol_count} symbols, commit every {batch}, snapshot every {snapshot_every}")
+        print(f"   append: {elapsed * 1000:9.1f} ms ({trade_count / elapsed:,.0f} trades/s, "
+              f"{engine.journal.commits} fsynced commits)")
+        first_ms, first_markers = recover()
+
+        # Twice the journal: once every symbol is at the trade index limit, restart should cost the same
+        append(trade_count)
+        grown_ms, grown_markers = recover()
+        engine.journal.close()
+        if grown_markers != first_markers:
+            print(f"   (symbols are below {index_limit} trades each, so restores still load more chart trades)")
+        elif grown_ms > first_ms * 1.5 + 50:
+            print("   FAIL: restart time grows with the journal")
+            raise SystemExit(1)
+
+
+class SyntheticHistory:
+    """fetch_history stand-in serving 5-minute pre/post-market bars up to a movable 'now'"""
+
+    def __init__(self, days, seed=42):
+        sessions = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=days)
+        index = pd.DatetimeIndex([
+            stamp for day in sessions
+            for stamp in pd.date_range(day + pd.Timedelta(hours=4), day + pd.Timedelta(hours=19, minutes=55), freq='5min')
+        ]).tz_localize('America/New_York')
+        closes = 100 * np.cumprod(1 + np.random.default_rng(seed).normal(0, 0.001, len(index)))
+        self.frame = pd.DataFrame({
+            'Open': closes, 'High': closes * 1.001, 'Low': closes * 0.999, 'Close': closes, 'Volume': 1000.0
+        }, index=index)
+        self.now = len(index)
+        self.calls = 0
+        self.bars_served = 0
+
+    def __call__(self, symbol, period='1d', interval='5m', start=None):
+        self.calls += 1
+        frame = self.frame.iloc[:self.now]
+        if start is not None:
+            frame = frame[frame.index >= start]
+        elif period != 'max' and period.endswith('d'):
+            days = sorted(set(frame.index.date))[-int(period[:-1]):]
+            frame = frame[frame.index.date >= days[0]]
+        self.bars_served += len(frame)
+        return frame
+
+
+def bench_bars(days, repeat):
+    """Bar store sync and read times against repeated full downloads"""
+    history = SyntheticHistory(days)
+    history.now -= 12  # Leave the last hour for an incremental sync
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = BarStore(tmpdir)
+
+        def timed(func):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                result = func()
+            return (time.perf_counter() - start) / repeat * 1000, result
+
+        start = time.perf_counter()
+        store.sync('SYM', '5m', history)
+        first_ms = (time.perf_counter() - start) * 1000
+        print(f"{days} sessions of 5m bars ({len(history.frame)} bars)")
+        print(f"   first sync:        {first_ms:8.1f} ms, {history.bars_served} bars downloaded")
+
+        history.now += 12
+        history.bars_served = 0
+        start = time.perf_counter()
+        store.sync('SYM', '5m', history)
+        print(f"   incremental sync:  {(time.perf_counter() - start) * 1000:8.1f} ms, "
+              f"{history.bars_served} bars downloaded")
+
+        download_ms, _ = timed(lambda: Bars.from_frame(history('SYM', '1d', '5m')))
+        read_ms, bars = timed(lambda: store.read_period('SYM', '5m', '1d'))
+        print(f"   1d download+parse: {download_ms:8.2f} ms")
+        print(f"   1d store read:     {read_ms:8.2f} ms, zero-copy: {isinstance(bars['Close'].base, np.memmap)}")
+        read_ms, bars = timed(lambda: store.read_period('SYM', '5m', '5d'))
+        print(f"   5d store read:     {read_ms:8.2f} ms, {len(bars)} bars")
+        read_ms, bars = timed(lambda: store.read_period('SYM', '5m', 'max'))
+        print(f"   max store read:    {read_ms:8.2f} ms, {len(bars)} bars")
+        if len(bars) != len(history.frame) or not np.array_equal(bars['Close'], history.frame['Close'].to_numpy()):
+            print("   FAIL: stored bars differ from the source")
+            raise SystemExit(1)
+
+
+def make_replay(days, symbol_count, seed=42):
+    """5-minute sessions with overnight gaps, staggered first bars, missing bars and same-bar ticks"""
+    rng = np.random.default_rng(seed)
+    session = np.arange(78) * 300.0
+    timestamps = np.concatenate([day * 86400 + 1.7e9 + session for day in range(days)])
+    # A few extra ticks inside a bar, so some bars form from more than one tick
+    extra = rng.choice(len(timestamps), len(timestamps) // 50, replace=False)
+    timestamps = np.sort(np.concatenate([timestamps, timestamps[extra] + 150]))
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.004, (len(timestamps), symbol_count)), axis=0)
+    for column in range(symbol_count):
+        closes[:rng.integers(0, 200), column] = np.nan
+        closes[rng.random(len(timestamps)) < 0.01, column] = np.nan
+    return timestamps, make_symbols(symbol_count), closes
+
+
+def bench_backtest(days, symbol_count):
+    """Backtest replay time, precomputed market columns vs ticking the streaming engine"""
+    timestamps, symbols, closes = make_replay(days, symbol_count)
+    print(f"{days} days of 5m bars, {symbol_count} symbols ({len(timestamps)} bars)")
+    for stream in (False, True):
+        Backtester(timestamps[:200], symbols, closes[:200]).run(stream=stream)  # Warm up pandas and numpy
+    results = {}
+    for label, stream in (('precomputed', False), ('streaming', True)):
+        result = results[label] = Backtester(timestamps, symbols, closes).run(stream=stream)
+        stats = result['stats']
+        print(f"   {label + ':':<13} {stats['elapsed_seconds']:6.2f} s "
+              f"({stats['elapsed_seconds'] / len(timestamps) * 1e6:5.0f} us/bar), "
+              f"{stats['trades']} trades, final equity {stats['final_equity']:.2f}")
+
+    fast, slow = results['precomputed'], results['streaming']
+    if not (fast['fills'].equals(slow['fills']) and np.array_equal(fast['equity'], slow['equity'])):
+        print("   FAIL: the precomputed replay differs from the streaming one")
+        raise SystemExit(1)
+
+
+def legacy_trade_markers(symbol_trades, chart_times):
+    """The per-trade, per-bar strptime matching chart markers used before the trade index"""
+    parse = lambda value: datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    symbol_trades = sorted(symbol_trades, key=lambda trade: parse(trade['time']))
+    today = datetime.now().date()
+    markers = []
+    for i, trade in enumerate(symbol_trades):
+        trade_time = parse(trade['time'])
+        chart_index = None
+        for j, chart_time in enumerate(chart_times):
+            hour, minute = map(int, chart_time.split(':')[:2])
+            chart_dt = datetime.combine(today, datetime.min.time().replace(hour=hour, minute=minute))
+            if abs((trade_time - chart_dt).total_seconds()) <= 300:
+                chart_index = j
+                break
+        if chart_index is None:
+            chart_index = int((i / max(1, len(symbol_trades) - 1)) * (len(chart_times) - 1))
+        markers.append({'index': chart_index, 'action': trade['action'], 'quantity': trade['quantity'],
+                        'price': trade['price'], 'time': trade['time'], 'balance_after': trade['balance_after']})
+    return markers
+
+
+def bench_markers(trade_count, legacy_count, repeat):
+    """Chart marker generation for one symbol on a 1-day 5m chart"""
+    bars = Bars.from_frame(SyntheticHistory(1)('SYM', '1d', '5m'))
+    bar_times = bars.timestamps
+    rng = np.random.default_rng(42)
+    # Half the trades fall in the charted session, the rest on the days before it
+    times = np.sort(np.concatenate([
+        rng.uniform(bar_times[0], bar_times[-1] + 300, trade_count - trade_count // 2),
+        rng.uniform(bar_times[0] - 5 * 86400, bar_times[0], trade_count // 2)
+    ]))
+    trades = [{
+        'time': datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S'), 'timestamp': float(t),
+        'action': 'BUY' if i % 2 == 0 else 'SELL', 'symbol': 'SYM', 'quantity': 1,
+        'price': 100.0, 'total': 100.0, 'balance_after': 10000.0
+    } for i, t in enumerate(times)]
+    index = TradeIndex()
+    start = time.perf_counter()
+    for trade in trades:
+        index.add(trade)
+    add_us = (time.perf_counter() - start) / trade_count * 1e6
+
+    def timed(func, count):
+        start = time.perf_counter()
+        for _ in range(count):
+            result = func()
+        return (time.perf_counter() - start) / count * 1000, result
+
+    view_ms, view = timed(lambda: index.view('SYM'), repeat)
+    align_ms, (markers, indexes) = timed(lambda: TradeIndex.align(view, bar_times), repeat)
+    print(f"{trade_count} trades for one symbol, {len(bar_times)} bars on the chart")
+    print(f"   index add:        {add_us:8.2f} us per trade")
+    print(f"   snapshot view:    {view_ms:8.4f} ms")
+    print(f"   align markers:    {align_ms:8.4f} ms, {len(markers)} markers on the chart")
+
+    legacy = trades[-legacy_count:]
+    labels = bars.labels('%H:%M')
+    legacy_ms, _ = timed(lambda: legacy_trade_markers(legacy, labels), 1)
+    print(f"   legacy markers:   {legacy_ms:8.1f} ms for {len(legacy)} trades "
+          f"(~{legacy_ms * trade_count / len(legacy):.0f} ms for {trade_count})")
+
+    position = np.searchsorted(times, bar_times[0])
+    expected = times[(times >= bar_times[0]) & (times < bar_times[-1] + 300)]
+    chart_times = times[position:position + len(markers)]
+    inside = (bar_times[indexes] <= chart_times) & (chart_times < np.append(bar_times[1:], bar_times[-1] + 300)[indexes])
+    if len(markers) != len(expected) or not inside.all():
+        print("   FAIL: markers are not aligned to the bars their trades fall in")
+        raise SystemExit(1)
+    if align_ms >= 1.0:
+        print("   FAIL: marker generation took a millisecond or more")
+        raise SystemExit(1)
+
+
+def merge_in_dashboard(updates):
+    """Apply /api/status bodies with the dashboard's own mergeStatus() (needs node)
+
+    Returns the merged state, or None when node is not installed.
+    """
+    node = shutil.which('node')
+    if node is None:
+        return None
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'index.html')) as f:
+        html = f.read()
+    start = html.index('function mergeStatus(')
+    merge = html[start:html.index('function updateDashboard(', start)]
+    script = (f"let dashboardState = null;\n{merge}\n"
+              "const updates = JSON.parse(require('fs').readFileSync(0, 'utf8'));\n"
+              "for (const update of updates) mergeStatus(update);\n"
+              "process.stdout.write(JSON.stringify(dashboardState));\n")
+    result = subprocess.run([node, '-e', script], input=json.dumps(updates), capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def check_dashboard_merge(base_url, updates):
+    """Problems in the dashboard state merged from the deltas seen during startup"""
+    merged = merge_in_dashboard(updates)
+    if merged is None:
+        print("   (node not found, dashboard delta merge not checked)")
+        return []
+    for _ in range(50):
+        full = requests.get(f'{base_url}/api/status', timeout=5).json()
+        if full['seq'] == merged['seq']:
+            break
+        merged = merge_in_dashboard(updates + [requests.get(f"{base_url}/api/status?since={merged['seq']}", timeout=5).json()])
+    else:
+        return ["status kept changing, dashboard merge not compared"]
+    deltas = sum(1 for update in updates if not update['full'])
+    print(f"   dashboard merged {deltas} deltas: warming={merged['warming']}")
+    return [
+        f"dashboard merged {key}={merged.get(key)!r}, full status has {full[key]!r}"
+        for key in ACCOUNT_FIELDS + ('prices',) if merged.get(key) != full[key]
+    ]
+
+
+def bench_startup(latency, max_bind):
+    """Cold start of the app: time until the port answers and until /api/ready says ready
+
+    Status deltas polled during warm-up are then merged with the dashboard's
+    own code, which has to arrive at the same state as a full snapshot.
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(
+            os.environ,
+            PORT=str(port),
+            QUOTE_PROVIDER='fake',
+            FAKE_QUOTE_LATENCY=str(latency),
+            TRADE_JOURNAL=os.path.join(tmpdir, 'trades.db'),
+            BAR_STORE=os.path.join(tmpdir, 'bars')
+        )
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, 'trading_bot.py'], env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        base_url = f'http://127.0.0.1:{port}'
+        bound = ready = None
+        updates = []
+        problems = []
+        try:
+            while ready is None and time.perf_counter() - start < 120:
+                try:
+                    response = requests.get(f'{base_url}/api/ready', timeout=1)
+                except requests.ConnectionError:
+                    time.sleep(0.02)
+                    continue
+                since = f"?since={updates[-1]['seq']}" if updates else ''
+                updates.append(requests.get(f'{base_url}/api/status{since}', timeout=5).json())
+                now = time.perf_counter() - start
+                if bound is None:
+                    bound = now
+                    print(f"   serving after {bound:6.2f} s: {response.status_code}, "
+                          f"{response.json()['priced']}/{response.json()['total']} priced")
+                if response.status_code == 200:
+                    ready = now
+                    report = response.json()
+                    print(f"   ready after   {ready:6.2f} s: {report['warmed']}/{report['total']} symbols warm, "
+                          f"warm-up took {report['startup_seconds']:.2f} s after construction")
+                else:
+                    time.sleep(0.05)
+            if ready is not None:
+                problems = check_dashboard_merge(base_url, updates)
+        finally:
+            process.terminate()
+            process.wait()
+    if bound is None or bound > max_bind:
+        problems.append(f"the web server was not serving within {max_bind} s")
+    for problem in problems:
+        print(f"   FAIL: {problem}")
+    if problems:
+        raise SystemExit(1)
+
+
+def bench_ipc(calls):
+    """Engine socket round trips, and how web workers answer a saturated or failing engine"""
+    problems = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # A writer that never gets to its queue, so every queued command times out like a busy bot.execute
+        commands = CommandQueue()
+        writer = threading.Thread(target=lambda: (commands.bind(), time.sleep(3600)), daemon=True)
+        writer.start()
+        while commands.writer is None:
+            time.sleep(0.01)
+        busy = lambda *args: commands.call(lambda: None, timeout=0.2)
+
+        def fail(*args):
+            raise ValueError('handler failed')
+
+        socket_path = os.path.join(tmpdir, 'engine.sock')
+        server = EngineServer(socket_path, {
+            'echo': lambda value: value, 'trade': busy, 'toggle': busy, 'accounts': busy, 'account': fail
+        }).start()
+
+        client = EngineClient(socket_path)
+        client.call('echo', 0)
+        round_trip_us = time_call(lambda: client.call('echo', 1), calls) * 1000
+        print(f"   {round_trip_us:.0f} us per engine call ({calls} calls)")
+
+        os.environ['STATE_DIR'] = tmpdir
+        web = importlib.import_module('web')
+        web_client = web.app.test_client()
+        expected = [
+            ('POST', '/api/trade', {'action': 'buy', 'symbol': 'AAPL', 'quantity': 1}, 503),
+            ('POST', '/api/toggle_bot', None, 503),
+            ('GET', '/api/accounts', None, 503),
+            ('GET', '/api/accounts/paper-1', None, 500)
+        ]
+        for method, path, body, status in expected:
+            response = web_client.open(path, method=method, json=body)
+            if response.status_code != status or response.json is None:
+                problems.append(f"{method} {path} answered {response.status_code} "
+                                f"{response.get_data(as_text=True)[:80]!r}, expected JSON with {status}")
+            else:
+                print(f"   {method} {path}: {status} {response.json}")
+        server.close()
+    for problem in problems:
+        print(f"   FAIL: {problem}")
+    if problems:
+        raise SystemExit(1)
+    print("   OK: queue timeouts reach workers as 503 and handler errors as JSON 500")
+
+
+def summarize(samples_ms):
+    """Mean and percentiles of a list of millisecond timings"""
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        'mean': round(float(samples.mean()), 4),
+        'p50': round(float(np.percentile(samples, 50)), 4),
+        'p95': round(float(np.percentile(samples, 95)), 4),
+        'p99': round(float(np.percentile(samples, 99)), 4),
+        'max': round(float(samples.max()), 4),
+        'count': len(samples)
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def suite_cycle(symbol_counts, cycles):
+    """update_prices + auto_trade + publish cycle time per watchlist size"""
+    results = {}
+    for count in symbol_counts:
+        bot = make_bot(make_symbols(count))
+        bot.is_running = True
+        for _ in range(3):  # Fill price history so the strategy has something to act on
+            bot.update_prices()
+        update_ms, decision_ms, publish_ms, cycle_ms = [], [], [], []
+        for _ in range(cycles):
+            start = time.perf_counter()
+            bot.update_prices()
+            updated = time.perf_counter()
+            bot.auto_trade()
+            decided = time.perf_counter()
+            bot.commit_journal()
+            bot.publish_status()
+            end = time.perf_counter()
+            update_ms.append((updated - start) * 1000)
+            decision_ms.append((decided - updated) * 1000)
+            publish_ms.append((end - decided) * 1000)
+            cycle_ms.append((end - start) * 1000)
+        results[str(count)] = {
+            'cycle_ms': summarize(cycle_ms),
+            'update_prices_ms': summarize(update_ms),
+            'auto_trade_ms': summarize(decision_ms),
+            'publish_ms': summarize(publish_ms),
+            'trades': bot.trade_count
+        }
+        print(f"   cycle    {count:>6} symbols: {results[str(count)]['cycle_ms']['p50']:8.2f} ms p50, "
+              f"{results[str(count)]['cycle_ms']['p95']:8.2f} ms p95")
+        bot.executor.shutdown(wait=True)
+    return results
+
+
+def suite_api(clients, requests_per_client):
+    """/api/status and /api/chart latency and payload size under concurrent test clients"""
+    bot = trading_bot.bot
+    app = trading_bot.app
+    client = app.test_client()
+    while client.get('/api/ready').status_code != 200:
+        time.sleep(0.1)
+    for symbol in bot.symbols:  # Charts are built in the background after warm-up
+        while 'error' in client.get(f'/api/chart/{symbol}').json:
+            time.sleep(0.1)
+    if not client.get('/api/status').json['is_running']:
+        client.post('/api/toggle_bot')  # Serve requests while the loop is trading and publishing
+
+    timings = {'status_full': [], 'status_delta': [], 'chart': [], 'chart_304': []}
+    sizes = {name: [] for name in timings}
+    errors = []
+    lock = threading.Lock()
+
+    def run(worker):
+        client = app.test_client()
+        local = {name: ([], []) for name in timings}
+        seq = None
+        etags = {}
+
+        def get(name, path, **kwargs):
+            start = time.perf_counter()
+            response = client.get(path, **kwargs)
+            local[name][0].append((time.perf_counter() - start) * 1000)
+            local[name][1].append(len(response.data))
+            if response.status_code not in (200, 304):
+                errors.append(f"{path}: {response.status_code}")
+            return response
+
+        for i in range(requests_per_client):
+            symbol = bot.symbols[(worker + i) % len(bot.symbols)]
+            if seq is None:
+                seq = get('status_full', '/api/status').json['seq']
+            else:
+                seq = get('status_delta', f'/api/status?since={seq}').json['seq']
+            response = get('chart', f'/api/chart/{symbol}')
+            etags[symbol] = response.headers.get('ETag')
+            get('chart_304', f'/api/chart/{symbol}', headers={'If-None-Match': etags[symbol]})
+            if i % 10 == 9:
+                seq = None  # Poll a full snapshot now and then, as a new page load does
+        with lock:
+            for name, (elapsed, size) in local.items():
+                timings[name].extend(elapsed)
+                sizes[name].extend(size)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    client.post('/api/toggle_bot')
+
+    total = sum(len(samples) for samples in timings.values())
+    results = {
+        'clients': clients,
+        'requests': total,
+        'errors': len(errors),
+        'throughput_per_s': round(total / elapsed, 1)
+    }
+    for name in timings:
+        if timings[name]:
+            results[name] = {'latency_ms': summarize(timings[name]), 'payload_bytes': int(np.mean(sizes[name]))}
+            print(f"   api      {name:>12}: {results[name]['latency_ms']['p50']:8.3f} ms p50, "
+                  f"{results[name]['latency_ms']['p99']:8.3f} ms p99, {results[name]['payload_bytes']:>8} bytes")
+    print(f"   api      {total} requests from {clients} clients, {results['throughput_per_s']:.0f}/s, "
+          f"{len(errors)} errors")
+    return results
+
+
+def suite_memory(symbol_count, days, tick_seconds):
+    """Memory held by trading state over a simulated week of auto-trading
+
+    Drives a TradingEngine with the live bot's limits on a simulated clock,
+    one tick per cycle interval through each regular session, and records
+    traced allocations and the size of the bounded histories at each close.
+    """
+    symbols = make_symbols(symbol_count)
+    clock = [datetime(2024, 1, 8, 9, 30)]  # A Monday
+    engine = TradingEngine(
+        symbols,
+        initial_balance=trading_bot.TRADING_CONFIG['initial_balance'],
+        history_capacity=trading_bot.MARKET_DATA_CONFIG['history_capacity'],
+        history_limit=trading_bot.TRADING_CONFIG['history_limit'],
+        trade_index_limit=trading_bot.TRADING_CONFIG['trade_index_limit'],
+        clock=lambda: clock[0],
+        log=lambda *args: None
+    )
+    engine.is_running = True
+    provider = FakeQuoteProvider(seed=42, volatility=0.004)
+    for symbol, price in provider.get_quotes(symbols).items():
+        # Cold start from ticks alone, seeded as TradingBot.seed_prices does
+        engine.indicators.warm_up(symbol, [], [])
+        engine.technical_indicators[symbol] = {'sma_20': price, 'rsi': 50, 'volume': 1000000}
+    ticks = int(6.5 * 3600 / tick_seconds)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    closes = []
+    start = time.perf_counter()
+    for day in range(days):
+        session = datetime(2024, 1, 8, 9, 30) + timedelta(days=day)
+        for tick in range(ticks):
+            clock[0] = session + timedelta(seconds=tick * tick_seconds)
+            engine.apply_quotes(provider.get_quotes(symbols), clock[0].timestamp())
+            engine.auto_trade()
+        closes.append({
+            'day': day + 1,
+            'trades': engine.trade_count,
+            'trading_history': len(engine.trading_history),
+            'price_history_points': sum(len(history) for history in engine.price_history.values()),
+            'trade_index_trades': sum(engine.trade_index.counts.values()),
+            'traced_bytes': tracemalloc.get_traced_memory()[0] - baseline
+        })
+        print(f"   memory   day {day + 1}: {closes[-1]['trades']:>6} trades, "
+              f"{closes[-1]['trading_history']:>5} in history, {closes[-1]['traced_bytes'] / 1e6:7.2f} MB traced")
+    tracemalloc.stop()
+    return {
+        'symbols': symbol_count,
+        'ticks_per_day': ticks,
+        'closes': closes,
+        'final_bytes': closes[-1]['traced_bytes'],
+        'last_day_growth_bytes': closes[-1]['traced_bytes'] - closes[-2]['traced_bytes'] if days > 1 else None,
+        'simulated_ticks_per_s': round(days * ticks / (time.perf_counter() - start), 1)
+    }
+
+
+def bench_suite(args):
+    """Run the suite and write one JSON report"""
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'cpus': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'orjson': orjson is not None,
+            'args': {key: value for key, value in vars(args).items() if key not in ('command', 'output')}
+        },
+        'results': {}
+    }
+    sections = args.only or ['cycle', 'api', 'memory']
+    if 'cycle' in sections:
+        report['results']['cycle'] = suite_cycle(args.symbols, args.cycles)
+    if 'api' in sections:
+        report['results']['api'] = suite_api(args.clients, args.requests)
+    if 'memory' in sections:
+        report['results']['memory'] = suite_memory(args.memory_symbols, args.days, args.tick)
+    body = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(body)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(body + '\n')
+        print(f"wrote {args.output}")
+    return report
+
+
+def flatten(tree, prefix=''):
+    """{'a.b.c': number} for every numeric leaf of a report"""
+    leaves = {}
+    for key, value in tree.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            leaves.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            leaves[path] = value
+    return leaves
+
+
+def regression_direction(path):
+    """+1 if higher is worse, -1 if lower is worse, 0 for informational values"""
+    parts = path.split('.')
+    if any(part.endswith('_per_s') for part in parts):
+        return -1
+    if parts[-1] == 'count':
+        return 0
+    if any(part.endswith(('_ms', '_bytes')) for part in parts):
+        return 1
+    return 0
+
+
+def bench_compare(baseline_path, current_path, threshold):
+    """Print how a suite report moved against a baseline and fail on regressions"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(current_path) as f:
+        current = json.load(f)
+    print(f"{baseline['meta'].get('revision')} -> {current['meta'].get('revision')}, "
+          f"regression threshold {threshold:.0%}")
+    old, new = flatten(baseline['results']), flatten(current['results'])
+    regressions = []
+    for path in sorted(old.keys() & new.keys()):
+        direction = regression_direction(path)
+        if not direction or not old[path]:
+            continue
+        change = (new[path] - old[path]) / abs(old[path])
+        flag = ''
+        if direction * change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(path)
+        print(f"   {path:<55} {old[path]:>14.4f} {new[path]:>14.4f} {change:>+8.1%}{flag}")
+    if regressions:
+        print(f"   FAIL: {len(regressions)} metrics regressed by more than {threshold:.0%}")
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    cycle = subparsers.add_parser('cycle', help='update_prices cycle time vs symbol count')
+    cycle.add_argument('--symbols', type=int, nargs='+', default=[10, 100, 1000])
+    cycle.add_argument('--latency', type=float, default=0.0,
+                       help='simulated seconds per upstream request')
+    cycle.add_argument('--repeat', type=int, default=5)
+
+    decision = subparsers.add_parser('decision', help='auto_trade decision time vs symbol count')
+    decision.add_argument('--symbols', type=int, nargs='+', default=[10, 100, 1000])
+    decision.add_argument('--repeat', type=int, default=20)
+
+    serialize = subparsers.add_parser('serialize', help='/api/status encoding time vs symbol count')
+    serialize.add_argument('--symbols', type=int, nargs='+', default=[10, 100, 1000])
+    serialize.add_argument('--points', type=int, default=1000, help='price history points per symbol')
+    serialize.add_argument('--repeat', type=int, default=3)
+
+    sentiment = subparsers.add_parser('sentiment', help='sentiment service against a local stub server')
+    sentiment.add_argument('--symbols', type=int, default=20)
+    sentiment.add_argument('--delay', type=float, default=0.2, help='stub upstream latency in seconds')
+
+    scoring = subparsers.add_parser('scoring', help='text sentiment scoring with and without memoization')
+    scoring.add_argument('--texts', type=int, default=2000)
+    scoring.add_argument('--unique', type=int, default=500)
+    scoring.add_argument('--processes', type=int, default=0, help='also time a cold process-pool run')
+
+    stress = subparsers.add_parser('stress', help='concurrent trades against the trading loop, then check the books')
+    stress.add_argument('--requests', type=int, default=5000)
+    stress.add_argument('--clients', type=int, default=32)
+    stress.add_argument('--readers', type=int, default=4, help='threads polling /api/status meanwhile')
+
+    journal = subparsers.add_parser('journal', help='trade journal append throughput and recovery time')
+    journal.add_argument('--trades', type=int, default=100000)
+    journal.add_argument('--batch', type=int, default=100, help='trades per group commit')
+    journal.add_argument('--snapshot-every', type=int, default=1000)
+    journal.add_argument('--symbols', type=int, default=5)
+
+    bars = subparsers.add_parser('bars', help='bar store sync and read times vs downloading')
+    bars.add_argument('--days', type=int, default=60, help='sessions of synthetic 5m bars')
+    bars.add_argument('--repeat', type=int, default=20)
+
+    startup = subparsers.add_parser('startup', help='cold start time of the app with a slow quote feed')
+    startup.add_argument('--latency', type=float, default=2.0, help='simulated seconds per quote request')
+    startup.add_argument('--max-bind', type=float, default=10.0, help='fail if the port is not serving by then')
+
+    markers = subparsers.add_parser('markers', help='chart trade marker generation vs trade count')
+    markers.add_argument('--trades', type=int, default=10000)
+    markers.add_argument('--legacy-trades', type=int, default=200, help='trades timed with the old matching')
+    markers.add_argument('--repeat', type=int, default=200)
+
+    accounts = subparsers.add_parser('accounts', help='cycle time with many paper accounts on one feed')
+    accounts.add_argument('--accounts', type=int, nargs='+', default=[1, 10, 100, 500])
+    accounts.add_argument('--symbols', type=int, default=8)
+    accounts.add_argument('--cycles', type=int, default=20)
+    accounts.add_argument('--latency', type=float, default=0.05, help='seconds per fake quote request')
+
+    backtest = subparsers.add_parser('backtest', help='backtest replay time, checked against the streaming engine')
+    backtest.add_argument('--days', type=int, default=60)
+    backtest.add_argument('--symbols', type=int, default=36)
+
+    ipc = subparsers.add_parser('ipc', help='engine socket round trips and busy/error answers from web workers')
+    ipc.add_argument('--calls', type=int, default=2000)
+
+    suite = subparsers.add_parser('suite', help='cycle, API and memory benchmarks written as one JSON report')
+    suite.add_argument('--only', nargs='+', choices=['cycle', 'api', 'memory'])
+    suite.add_argument('--symbols', type=int, nargs='+', default=[10, 100, 500], help='watchlist sizes for cycles')
+    suite.add_argument('--cycles', type=int, default=20)
+    suite.add_argument('--clients', type=int, default=8, help='concurrent API clients')
+    suite.add_argument('--requests', type=int, default=50, help='request rounds per API client')
+    suite.add_argument('--memory-symbols', type=int, default=8)
+    suite.add_argument('--days', type=int, default=5, help='simulated sessions for the memory run')
+    suite.add_argument('--tick', type=float, default=trading_bot.PIPELINE_CONFIG['cycle_interval'],
+                       help='simulated seconds between cycles')
+    suite.add_argument('--output', default='benchmark-results.json', help="report path, '-' for stdout")
+
+    compare = subparsers.add_parser('compare', help='compare two suite reports and fail on regressions')
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.25, help='relative change counted as a regression')
+
+    args = parser.parse_args()
+    if args.command == 'cycle':
+        bench_cycle(args.symbols, args.latency, args.repeat)
+    elif args.command == 'decision':
+        bench_decision(args.symbols, args.repeat)
+    elif args.command == 'serialize':
+        bench_serialize(args.symbols, args.points, args.repeat)
+    elif args.command == 'sentiment':
+        bench_sentiment(args.symbols, args.delay)
+    elif args.command == 'scoring':
+        bench_scoring(args.texts, args.unique, args.processes)
+    elif args.command == 'stress':
+        bench_stress(args.requests, args.clients, args.readers)
+    elif args.command == 'journal':
+        bench_journal(args.trades, args.batch, args.snapshot_every, args.symbols)
+    elif args.command == 'bars':
+        bench_bars(args.days, args.repeat)
+    elif args.command == 'startup':
+        print(f"cold start, {args.latency}s per quote request")
+        bench_startup(args.latency, args.max_bind)
+    elif args.command == 'markers':
+        bench_markers(args.trades, args.legacy_trades, args.repeat)
+    elif args.command == 'accounts':
+        bench_accounts(args.accounts, args.symbols, args.cycles, args.latency)
+    elif args.command == 'backtest':
+        bench_backtest(args.days, args.symbols)
+    elif args.command == 'ipc':
+        bench_ipc(args.calls)
+    elif args.command == 'suite':
+        bench_suite(args)
+    elif args.command == 'compare':
+        bench_compare(args.baseline, args.current, args.threshold)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Single-writer command queue for engine state.
+
+The trading loop thread is the only thread that changes the account and
+market state. Other threads (Flask requests, cycle workers, sentiment
+callbacks) submit a command and wait on its Future if they need the result;
+the loop runs queued commands while it waits on a cycle stage and while it
+sleeps between cycles. Commands never interleave, so two trades can't spend
+the same balance and no state needs a lock. Readers don't go through the
+queue at all: they read the immutable snapshots the writer publishes (see
+status.py).
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError, wait
+
+logger = logging.getLogger(__name__)
+
+
+class CommandQueue:
+    """FIFO of callables executed by one writer thread"""
+
+    def __init__(self, after_batch=None):
+        self.queue = queue.SimpleQueue()  # (future, func, args), or None to wake the writer
+        self.after_batch = after_batch  # Called on the writer after each run of commands
+        self.writer = None
+        self.lock = threading.RLock()  # Serializes inline commands until a writer is bound
+        self.executed = 0
+
+    def bind(self):
+        """Make the calling thread the writer"""
+        with self.lock:
+            self.writer = threading.get_ident()
+
+    def is_writer(self):
+        return threading.get_ident() == self.writer
+
+    def submit(self, func, *args):
+        """Queue func(*args) for the writer and return a Future for its result
+
+        On the writer itself the command runs right away. Before a writer is
+        bound, commands run inline in the caller under a lock.
+        """
+        future = Future()
+        if self.is_writer():
+            self._run(future, func, args)
+        elif self.writer is None:
+            with self.lock:
+                self._run(future, func, args)
+                if self.after_batch is not None:
+                    self.after_batch()
+        else:
+            self.queue.put((future, func, args))
+        return future
+
+    def call(self, func, *args, timeout=None):
+        """Run func(*args) on the writer and return its result (or raise its exception)
+
+        A command still queued when the timeout expires is cancelled, so it
+        never runs after its caller has given up on it.
+        """
+        future = self.submit(func, *args)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def run_until(self, deadline, done=None):
+        """Run commands as they arrive until deadline (time.monotonic()) or until done()
+
+        Only the writer thread may call this.
+        """
+        while done is None or not done():
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                return
+            self._run_batch(item)
+
+    def drain(self):
+        """Run every command queued so far without blocking"""
+        try:
+            item = self.queue.get_nowait()
+        except queue.Empty:
+            return
+        self._run_batch(item)
+
+    def wait(self, futures, timeout):
+        """concurrent.futures.wait() that keeps running commands on the writer"""
+        futures = list(futures)
+        if self.is_writer():
+            wake = lambda _: self.queue.put(None)
+            for future in futures:
+                future.add_done_callback(wake)
+            self.run_until(time.monotonic() + timeout, lambda: all(f.done() for f in futures))
+            return wait(futures, timeout=0)
+        return wait(futures, timeout=timeout)
+
+    def _run_batch(self, item):
+        """Run item and the commands queued behind it, then call after_batch once
+
+        Commands that arrive during the batch wait for the next one, so a
+        steady stream of submissions can't keep the writer from its cycle.
+        """
+        items = [item]
+        for _ in range(self.queue.qsize()):
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        ran = False
+        for item in items:
+            if item is not None:
+                self._run(*item)
+                ran = True
+        if ran and self.after_batch is not None:
+            self.after_batch()
+
+    def _run(self, future, func, args):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = func(*args)
+        except Exception as e:
+            logger.error(f"Error in command {getattr(func, '__name__', func)}: {e}")
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        self.executed += 1
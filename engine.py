@@ -0,0 +1,255 @@
+"""Core trading engine shared by the live bot and the backtester.
+
+TradingEngine holds the account (balance, portfolio, position ledger, trade
+history), the per-symbol price history and streaming indicators, and runs the
+strategy. It has no network, Flask or wall-clock dependencies: quotes are
+pushed in with apply_quotes and trade times come from an injectable clock, so
+the same code can be driven by live Yahoo quotes or by replayed bars.
+
+The account half is the Account base class, which paper accounts (see
+accounts.py) also use while reading the market state of one shared engine.
+
+With a TradeJournal attached (see journal.py) every fill is also logged
+durably, and the account is restored from the journal on startup.
+"""
+import logging
+from datetime import datetime
+
+from indicators import IndicatorEngine
+from portfolio import PositionLedger
+from price_history import PriceHistoryBuffer
+from strategy import StrategyParams, build_market_inputs, evaluate_signals, execute_signals, with_positions
+from trade_index import TradeIndex
+
+logger = logging.getLogger(__name__)
+
+
+class Account:
+    """Balance, positions, trade history and strategy parameters of one trading account
+
+    Subclasses provide the market state the account trades on: symbols,
+    current_prices, price_history, technical_indicators and sentiment_data.
+    """
+
+    def __init__(self, initial_balance=10000.0, commission_per_trade=0.0, clock=None, log=logger.info,
+                 params=None, history_limit=None, trade_index_limit=None):
+        self.balance = initial_balance
+        self.portfolio = {}
+        self.ledger = PositionLedger()
+        self.trading_history = []
+        self.history_limit = history_limit  # Recent trades kept in memory, None keeps all
+        self.trade_count = 0  # Trades ever made, including ones trimmed from trading_history
+        self.trade_index = TradeIndex(trade_index_limit)  # Per-symbol, time-sorted trades for chart markers
+        self.journal = None
+        self.commission_per_trade = commission_per_trade
+        self.is_running = False
+        self.params = params or StrategyParams()
+        self.clock = clock or datetime.now
+        self.log = log
+
+    def buy_stock(self, symbol, quantity):
+        """Buy stocks"""
+        if symbol not in self.current_prices:
+            return False, "Invalid symbol"
+
+        price = self.current_prices[symbol]
+        fee = self.commission_per_trade
+        cost = price * quantity + fee
+        if cost > self.balance:
+            return False, "Insufficient funds"
+
+        self.balance -= cost
+        if symbol in self.portfolio:
+            self.portfolio[symbol] += quantity
+        else:
+            self.portfolio[symbol] = quantity
+        self.ledger.record_buy(symbol, quantity, price, fee)
+
+        now = self.clock()
+        self.record_trade({
+            'time': now.strftime('%Y-%m-%d %H:%M:%S'),
+            'timestamp': now.timestamp(),
+            'action': 'BUY',
+            'symbol': symbol,
+            'quantity': quantity,
+            'price': price,
+            'total': cost,
+            'balance_after': self.balance
+        }, fee)
+
+        return True, f"Bought {quantity} shares of {symbol} at ${price:.2f}"
+
+    def sell_stock(self, symbol, quantity):
+        """Sell stocks"""
+        if symbol not in self.portfolio or self.portfolio[symbol] < quantity:
+            return False, "Insufficient shares"
+        if symbol not in self.current_prices:
+            # A restored position can be held before warm-up has priced its symbol
+            return False, "Price not available yet"
+
+        price = self.current_prices[symbol]
+        fee = self.commission_per_trade
+        revenue = price * quantity - fee
+        self.balance += revenue
+        self.portfolio[symbol] -= quantity
+        self.ledger.record_sell(symbol, quantity, price, fee)
+
+        if self.portfolio[symbol] == 0:
+            del self.portfolio[symbol]
+
+        now = self.clock()
+        self.record_trade({
+            'time': now.strftime('%Y-%m-%d %H:%M:%S'),
+            'timestamp': now.timestamp(),
+            'action': 'SELL',
+            'symbol': symbol,
+            'quantity': quantity,
+            'price': price,
+            'total': revenue,
+            'balance_after': self.balance
+        }, fee)
+
+        return True, f"Sold {quantity} shares of {symbol} at ${price:.2f}"
+
+    def record_trade(self, trade, fee):
+        """Add a fill to the journal, the bounded in-memory history and the trade index"""
+        self.trade_count += 1
+        if self.journal is not None:
+            self.journal.append(self.trade_count, trade, fee)
+        self.trading_history.append(trade)
+        self.trade_index.add(trade)
+        if self.history_limit is not None and len(self.trading_history) > self.history_limit:
+            del self.trading_history[:-self.history_limit]
+
+    def replay_trade(self, trade, fee):
+        """Apply a journaled fill to the portfolio, ledger and balance"""
+        symbol = trade['symbol']
+        quantity = trade['quantity']
+        if trade['action'] == 'BUY':
+            self.portfolio[symbol] = self.portfolio.get(symbol, 0) + quantity
+            self.ledger.record_buy(symbol, quantity, trade['price'], fee)
+        else:
+            self.portfolio[symbol] -= quantity
+            if self.portfolio[symbol] == 0:
+                del self.portfolio[symbol]
+            self.ledger.record_sell(symbol, quantity, trade['price'], fee)
+        self.balance = trade['balance_after']
+
+    def account_state(self):
+        """Balance and positions, as stored in journal snapshots"""
+        return {'balance': self.balance, 'positions': self.ledger.to_dict()}
+
+    def attach_journal(self, journal):
+        """Restore the account from a journal, then log every new fill to it
+
+        Returns the number of trades restored (0 for a new journal).
+        """
+        state, tail, trade_count = journal.recover()
+        if state is not None:
+            self.balance = state['balance']
+            self.ledger = PositionLedger.from_dict(state['positions'])
+            self.portfolio = {
+                symbol: position['quantity']
+                for symbol, position in state['positions'].items() if position['quantity']
+            }
+        for trade, fee in tail:
+            self.replay_trade(trade, fee)
+        self.trading_history = journal.recent(self.history_limit or trade_count)
+        # Chart markers keep more trades per symbol than the in-memory history holds
+        if self.trade_index.limit is None:
+            self.trade_index.rebuild(journal.recent(trade_count) if self.history_limit else self.trading_history)
+        else:
+            self.trade_index.rebuild(journal.recent_per_symbol(self.trade_index.limit))
+        self.trade_count = trade_count
+        self.journal = journal
+        return trade_count
+
+    def commit_journal(self):
+        """Make the fills since the last commit durable (one fsync for the batch)"""
+        if self.journal is not None:
+            self.journal.commit(self.trade_count, self.account_state)
+
+    def market_inputs(self):
+        """Strategy inputs for the market state, before this account's positions"""
+        return build_market_inputs(
+            self.symbols,
+            self.current_prices,
+            self.price_history,
+            self.technical_indicators,
+            self.sentiment_data
+        )
+
+    def auto_trade(self, market=None):
+        """Optimized trading strategy to maximize profits and minimize losses
+
+        Signals for all symbols are evaluated in one vectorized pass (see
+        strategy.py), then orders are placed one symbol at a time. market
+        is a market_inputs() result to reuse across accounts in a cycle.
+        """
+        if not self.is_running:
+            return
+
+        inputs = with_positions(self.market_inputs() if market is None else market, self.portfolio, self.ledger)
+        if inputs is None:
+            return
+
+        signals = evaluate_signals(inputs, self.params)
+        execute_signals(self, inputs, signals, self.params, log=self.log)
+
+
+class TradingEngine(Account):
+    """Account, market state and strategy for a set of symbols"""
+
+    def __init__(self, symbols, initial_balance=10000.0, commission_per_trade=0.0,
+                 history_capacity=100, bar_seconds=300, clock=None, log=logger.info, params=None,
+                 history_limit=None, trade_index_limit=None):
+        super().__init__(initial_balance, commission_per_trade, clock, log, params,
+                         history_limit, trade_index_limit)
+        self.warming = False  # True while a live engine is still loading prices at startup
+        self.symbols = symbols
+        self.current_prices = {}
+        self.history_capacity = history_capacity
+        self.price_history = {}
+        self.technical_indicators = {}
+        self.indicators = IndicatorEngine(bar_seconds=bar_seconds)
+        self.sentiment_data = {}
+
+    def new_price_history(self):
+        """Empty price history buffer with the engine's capacity"""
+        return PriceHistoryBuffer(self.history_capacity)
+
+    def apply_quotes(self, quotes, timestamp):
+        """Fill current prices, price history and indicators from one batch of quotes
+
+        timestamp is in epoch seconds. Symbols missing from the batch keep
+        their last known price; symbols that were never priced are skipped.
+        """
+        for symbol in self.symbols:
+            try:
+                if symbol not in quotes and symbol not in self.current_prices:
+                    continue
+                old_price = self.current_prices.get(symbol, 100.0)
+                new_price = quotes.get(symbol, old_price)
+
+                # Update current price
+                self.current_prices[symbol] = new_price
+
+                # Add to price history (the ring buffer drops the oldest point when full)
+                history = self.price_history.get(symbol)
+                if history is None:
+                    history = self.price_history[symbol] = self.new_price_history()
+                history.append(
+                    timestamp,
+                    new_price,
+                    new_price - old_price,
+                    ((new_price - old_price) / old_price * 100) if old_price > 0 else 0
+                )
+
+                # Streaming indicators update in O(1) on every tick
+                if self.indicators.is_warm(symbol):
+                    values = self.indicators.update(symbol, new_price, timestamp)
+                    self.technical_indicators.setdefault(symbol, {}).update(values)
+
+            except Exception as e:
+                logger.warning(f"Error updating {symbol}: {e}")
+
@@ -0,0 +1,58 @@
+"""gunicorn settings for the multi-process deployment
+
+    gunicorn -c gunicorn.conf.py web:app
+
+The gunicorn master starts the engine (`python trading_bot.py --engine`),
+restarts it if it exits, and forks WEB_CONCURRENCY stateless web workers
+(web.py) that serve the API from the state the engine publishes.
+"""
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from shared_state import web_threads
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5239)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2 * (os.cpu_count() or 1) + 1))
+# Threaded workers: each open /api/stream holds a thread, and web.py caps streams at threads - 2
+worker_class = 'gthread'
+threads = web_threads()
+accesslog = os.environ.get('ACCESS_LOG')  # e.g. '-' for stdout; off by default like the dev server's
+
+ENGINE_COMMAND = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trading_bot.py'), '--engine']
+
+logger = logging.getLogger('gunicorn.error')
+engine = None
+stopping = threading.Event()
+
+
+def supervise_engine():
+    """Run the engine process, restarting it (with backoff) whenever it exits"""
+    global engine
+    delay = 1
+    while not stopping.is_set():
+        started = time.monotonic()
+        engine = subprocess.Popen(ENGINE_COMMAND)
+        code = engine.wait()
+        if stopping.is_set():
+            return
+        delay = 1 if time.monotonic() - started > 60 else min(delay * 2, 30)
+        logger.error(f"❌ Trading engine exited with code {code}, restarting in {delay}s")
+        stopping.wait(delay)
+
+
+def on_starting(server):
+    threading.Thread(target=supervise_engine, name='engine-supervisor', daemon=True).start()
+
+
+def on_exit(server):
+    stopping.set()
+    if engine is not None and engine.poll() is None:
+        engine.terminate()
+        try:
+            engine.wait(10)
+        except subprocess.TimeoutExpired:
+            engine.kill()
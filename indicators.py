@@ -0,0 +1,147 @@
+"""Streaming technical indicators.
+
+Each symbol keeps rolling state over fixed-width bars (5 minutes by default):
+a running sum of the last 20 closes for the SMA, Wilder-smoothed average
+gain/loss for the RSI and the last bar volume. A tick updates the bar that is
+currently forming in O(1), so indicators can refresh on every price update
+without downloading or re-scanning history. History is only needed once, to
+warm the state up.
+"""
+from collections import deque
+
+
+class IndicatorState:
+    """Rolling SMA/RSI/volume state for one symbol"""
+
+    def __init__(self, sma_period=20, rsi_period=14, bar_seconds=300):
+        self.sma_period = sma_period
+        self.rsi_period = rsi_period
+        self.bar_seconds = bar_seconds
+
+        # Closed bars
+        self.closes = deque(maxlen=sma_period)
+        self.close_sum = 0.0
+        self.prev_close = None
+        self.deltas_seen = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.volume = None
+
+        # Bar currently forming from ticks
+        self.bar_id = None
+        self.bar_close = None
+
+    def update(self, price, timestamp, volume=None):
+        """Apply one tick (price at epoch seconds) to the forming bar"""
+        bar_id = int(timestamp // self.bar_seconds)
+        if self.bar_id is None or bar_id == self.bar_id:
+            self.bar_id = bar_id
+            self.bar_close = price
+        elif bar_id > self.bar_id:
+            self._close_bar(self.bar_close)
+            self.bar_id = bar_id
+            self.bar_close = price
+        if volume is not None:
+            self.volume = volume
+
+    def _close_bar(self, close):
+        if len(self.closes) == self.sma_period:
+            self.close_sum -= self.closes[0]
+        self.closes.append(close)
+        self.close_sum += close
+
+        if self.prev_close is not None:
+            gain, loss = self._gain_loss(close - self.prev_close)
+            self.avg_gain, self.avg_loss = self._smooth(gain, loss, self.deltas_seen)
+            self.deltas_seen += 1
+        self.prev_close = close
+
+    def _gain_loss(self, delta):
+        return (delta, 0.0) if delta > 0 else (0.0, -delta)
+
+    def _smooth(self, gain, loss, seen):
+        """Next average gain/loss: simple mean for the seed window, then Wilder"""
+        n = seen + 1 if seen < self.rsi_period else self.rsi_period
+        return ((self.avg_gain * (n - 1) + gain) / n,
+                (self.avg_loss * (n - 1) + loss) / n)
+
+    def sma(self):
+        """SMA over the closed bars plus the forming bar, or None if too short"""
+        if self.bar_close is None:
+            return None
+        count = len(self.closes) + 1
+        if count < self.sma_period:
+            return None
+        total = self.close_sum + self.bar_close
+        if count > self.sma_period:
+            total -= self.closes[0]
+        return total / self.sma_period
+
+    def rsi(self):
+        """RSI as if the forming bar closed now, or None if too short"""
+        if self.bar_close is None or self.prev_close is None:
+            return None
+        if self.deltas_seen + 1 < self.rsi_period:
+            return None
+
+        gain, loss = self._gain_loss(self.bar_close - self.prev_close)
+        avg_gain, avg_loss = self._smooth(gain, loss, self.deltas_seen)
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else 50.0
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+    def values(self):
+        """Current indicator values, leaving out the ones not yet available"""
+        values = {}
+        sma = self.sma()
+        if sma is not None:
+            values['sma_20'] = sma
+        rsi = self.rsi()
+        if rsi is not None:
+            values['rsi'] = rsi
+        if self.volume is not None:
+            values['volume'] = self.volume
+        return values
+
+
+class IndicatorEngine:
+    """Per-symbol streaming indicators"""
+
+    def __init__(self, sma_period=20, rsi_period=14, bar_seconds=300):
+        self.sma_period = sma_period
+        self.rsi_period = rsi_period
+        self.bar_seconds = bar_seconds
+        self.states = {}
+        self.seeded = set()
+
+    def is_warm(self, symbol):
+        """True once the symbol has state that ticks can update"""
+        return symbol in self.states
+
+    def has_history(self, symbol):
+        """True once the symbol was seeded from non-empty history"""
+        return symbol in self.seeded
+
+    def warm_up(self, symbol, closes, timestamps, volumes=None):
+        """Seed a symbol's state from historical bars (oldest first)
+
+        The last bar is treated as still forming so ticks inside the same
+        interval refine it instead of adding a new bar. Empty history starts
+        a cold state that builds up from ticks alone.
+        """
+        state = IndicatorState(self.sma_period, self.rsi_period, self.bar_seconds)
+        for i, (close, timestamp) in enumerate(zip(closes, timestamps)):
+            volume = float(volumes[i]) if volumes is not None else None
+            state.update(float(close), float(timestamp), volume)
+        # Swap in the finished state so readers never see a half-built one
+        self.states[symbol] = state
+        if state.bar_close is not None:
+            self.seeded.add(symbol)
+        return state.values()
+
+    def update(self, symbol, price, timestamp, volume=None):
+        """Apply a tick and return the symbol's current indicator values"""
+        state = self.states[symbol]
+        state.update(price, timestamp, volume)
+        return state.values()
@@ -0,0 +1,133 @@
+"""Durable trade journal.
+
+Every fill is appended to a SQLite database in WAL mode. Appends between two
+commit() calls share one transaction, so a burst of trades costs one fsync
+(group commit); the trading loop commits after each batch of commands and
+each cycle. Every snapshot_every trades the account (balance and positions)
+is snapshotted in the same transaction, so recovery loads the latest
+snapshot and replays only the trades after it instead of the whole history.
+"""
+import json
+import sqlite3
+
+
+class TradeJournal:
+    """Append-only trade log with periodic account snapshots"""
+
+    COLUMNS = ('time', 'timestamp', 'action', 'symbol', 'quantity', 'price', 'total', 'balance_after')
+
+    def __init__(self, path, snapshot_every=1000, synchronous='FULL'):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        # Only the engine's writer thread uses the connection once it is open
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute(f'PRAGMA synchronous={synchronous}')  # FULL: each commit is fsynced
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS trades ('
+            'id INTEGER PRIMARY KEY, time TEXT, action TEXT, symbol TEXT, quantity INTEGER, '
+            'price REAL, total REAL, balance_after REAL, fee REAL, timestamp REAL)'
+        )
+        columns = {row[1] for row in self.db.execute('PRAGMA table_info(trades)')}
+        if 'timestamp' not in columns:
+            # Journals written before trades carried epoch times
+            self.db.execute('ALTER TABLE trades ADD COLUMN timestamp REAL')
+        # Per-symbol reads for chart markers (recent_per_symbol) seek this instead of scanning every trade
+        self.db.execute('CREATE INDEX IF NOT EXISTS trades_symbol ON trades (symbol, id)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS snapshots (trade_id INTEGER PRIMARY KEY, state TEXT)')
+        self.pending = 0
+        self.last_snapshot = self._scalar('SELECT MAX(trade_id) FROM snapshots')
+        self.commits = 0
+
+    def _scalar(self, sql):
+        return self.db.execute(sql).fetchone()[0] or 0
+
+    def append(self, trade_id, trade, fee=0.0):
+        """Log one fill; it becomes durable at the next commit()"""
+        if not self.pending:
+            self.db.execute('BEGIN')
+        self.db.execute(
+            f"INSERT INTO trades (id, {', '.join(self.COLUMNS)}, fee) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (trade_id, *(trade.get(column) for column in self.COLUMNS), fee)
+        )
+        self.pending += 1
+
+    def commit(self, trade_count, account_state):
+        """Make pending fills durable with one fsync
+
+        account_state() is only called when a snapshot is due.
+        """
+        if not self.pending:
+            return
+        if trade_count - self.last_snapshot >= self.snapshot_every:
+            self.db.execute(
+                'INSERT OR REPLACE INTO snapshots VALUES (?, ?)',
+                (trade_count, json.dumps(account_state()))
+            )
+            # Keep the previous snapshot too, in case the latest one is ever unreadable
+            self.db.execute(
+                'DELETE FROM snapshots WHERE trade_id NOT IN '
+                '(SELECT trade_id FROM snapshots ORDER BY trade_id DESC LIMIT 2)'
+            )
+            self.last_snapshot = trade_count
+        self.db.execute('COMMIT')
+        self.pending = 0
+        self.commits += 1
+
+    def recover(self):
+        """(snapshot state or None, [(trade, fee)] journaled after it, total trade count)"""
+        row = self.db.execute('SELECT trade_id, state FROM snapshots ORDER BY trade_id DESC LIMIT 1').fetchone()
+        snapshot_id, state = row if row is not None else (0, None)
+        tail = list(self.read_trades(after=snapshot_id))
+        trade_count = self._scalar('SELECT MAX(id) FROM trades')
+        return (json.loads(state) if state is not None else None), tail, max(trade_count, snapshot_id)
+
+    def read_trades(self, after=0):
+        """Yield (trade, fee) for every trade with id > after, oldest first"""
+        cursor = self.db.execute(
+            f"SELECT {', '.join(self.COLUMNS)}, fee FROM trades WHERE id > ? ORDER BY id", (after,)
+        )
+        for row in cursor:
+            yield self._trade(row), row[-1]
+
+    def recent(self, limit):
+        """The last limit trades as trade dicts, oldest first"""
+        rows = self.db.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM trades ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._trade(row) for row in reversed(rows)]
+
+    def symbols(self):
+        """Every symbol with journaled trades, one index seek per symbol"""
+        rows = self.db.execute(
+            'WITH RECURSIVE seen(symbol) AS ('
+            'SELECT MIN(symbol) FROM trades UNION ALL '
+            'SELECT (SELECT MIN(symbol) FROM trades WHERE symbol > seen.symbol) FROM seen WHERE seen.symbol IS NOT NULL'
+            ') SELECT symbol FROM seen WHERE symbol IS NOT NULL'
+        )
+        return [row[0] for row in rows]
+
+    def recent_per_symbol(self, limit):
+        """The last limit trades of every symbol as trade dicts, oldest first
+
+        Reads at most limit rows per symbol through the (symbol, id) index, so
+        the cost does not grow with the rest of the journal.
+        """
+        query = f"SELECT id, {', '.join(self.COLUMNS)} FROM trades WHERE symbol = ? ORDER BY id DESC LIMIT ?"
+        rows = []
+        for symbol in self.symbols():
+            rows.extend(self.db.execute(query, (symbol, limit)))
+        rows.sort(key=lambda row: row[0])
+        return [self._trade(row[1:]) for row in rows]
+
+    def _trade(self, row):
+        trade = dict(zip(self.COLUMNS, row))
+        if trade['timestamp'] is None:
+            del trade['timestamp']  # Older row: trade_index falls back to the 'time' string
+        return trade
+
+    def close(self):
+        if self.pending:
+            self.db.execute('COMMIT')
+            self.pending = 0
+        self.db.close()
@@ -0,0 +1,289 @@
+"""Market data providers used by the trading bot.
+
+A quote provider returns the latest price for many symbols in one call so the
+trading loop does not pay one round-trip per symbol. MarketDataCache sits in
+front of the Yahoo downloads so repeated chart and indicator requests share
+one upstream fetch.
+"""
+import logging
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+
+class QuoteProvider:
+    """Base class for bulk quote providers"""
+
+    def get_quotes(self, symbols):
+        """Return {symbol: last_price} for the requested symbols.
+
+        Symbols the provider could not price are left out of the result so
+        callers can keep their previous value.
+        """
+        raise NotImplementedError
+
+
+class YahooQuoteProvider(QuoteProvider):
+    """Fetch quotes from Yahoo Finance with one bulk download per call
+
+    Callers split large watchlists into chunks (MARKET_DATA_CONFIG['chunk_size']
+    in trading_bot.py) and request them concurrently.
+    """
+
+    def __init__(self, period='1d', interval='1m'):
+        self.period = period
+        self.interval = interval
+
+    def get_quotes(self, symbols):
+        symbols = list(symbols)
+        try:
+            data = yf.download(
+                symbols,
+                period=self.period,
+                interval=self.interval,
+                prepost=True,
+                progress=False,
+                threads=True
+            )
+            return self._last_closes(data, symbols)
+        except Exception as e:
+            logger.warning(f"Error downloading quotes for {len(symbols)} symbols: {e}")
+            return {}
+
+    @staticmethod
+    def _last_closes(data, chunk):
+        """Extract the last non-null close per symbol from a download frame"""
+        if data is None or data.empty or 'Close' not in data:
+            return {}
+
+        closes = data['Close']
+        if isinstance(closes, pd.Series):
+            # Single-symbol downloads come back without the ticker level
+            closes = closes.to_frame(name=chunk[0])
+
+        last = closes.ffill().iloc[-1]
+        return {
+            symbol: float(last[symbol])
+            for symbol in chunk
+            if symbol in last and pd.notna(last[symbol])
+        }
+
+
+class FakeQuoteProvider(QuoteProvider):
+    """Local random-walk quotes for offline runs and cycle benchmarks"""
+
+    def __init__(self, seed=None, base_price=100.0, volatility=0.002, latency=0.0):
+        self.rng = random.Random(seed)
+        self.base_price = base_price
+        self.volatility = volatility
+        self.latency = latency  # Simulated round-trip per get_quotes call
+        self.prices = {}
+        self.calls = 0
+
+    def get_quotes(self, symbols):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        quotes = {}
+        for symbol in symbols:
+            price = self.prices.get(symbol)
+            if price is None:
+                price = self.base_price * self.rng.uniform(0.5, 1.5)
+            else:
+                price *= 1 + self.rng.gauss(0, self.volatility)
+            self.prices[symbol] = price
+            quotes[symbol] = price
+        return quotes
+
+
+def fetch_history(symbol, period='1d', interval='5m', start=None):
+    """Download bars for one symbol from Yahoo, including pre/post market
+
+    With start, bars from start onwards are downloaded instead of period.
+    """
+    if start is not None:
+        return yf.Ticker(symbol).history(start=start, interval=interval, prepost=True)
+    return yf.Ticker(symbol).history(period=period, interval=interval, prepost=True)
+
+
+class FakeHistory:
+    """Synthetic bars shaped like fetch_history() results, for offline runs
+
+    Each symbol gets a seeded random walk per session, 04:00-20:00 exchange
+    time (pre- and post-market included), for the last `sessions` weekdays up
+    to now. The same seed, symbol and date always produce the same bars, so
+    offline runs and benchmarks see reproducible charts and indicators.
+    """
+
+    def __init__(self, seed=0, sessions=5, base_price=100.0, volatility=0.002,
+                 tz='America/New_York', clock=None):
+        self.seed = seed
+        self.sessions = sessions
+        self.base_price = base_price
+        self.volatility = volatility
+        self.tz = tz
+        self.clock = clock or (lambda: pd.Timestamp.now(tz=tz))
+        self.calls = 0
+
+    def session(self, symbol, day, step):
+        """Bars of one session (day is a midnight Timestamp in exchange time)"""
+        key = zlib.crc32(symbol.encode())
+        if step >= 86400:
+            index = pd.DatetimeIndex([day])
+        else:
+            index = pd.date_range(day + pd.Timedelta(hours=4), day + pd.Timedelta(hours=20),
+                                  freq=pd.Timedelta(seconds=step), inclusive='left')
+        rng = np.random.default_rng([self.seed, key, day.toordinal()])
+        start = self.base_price * (0.5 + (key % 1000) / 1000) * (1 + rng.normal(0, 0.01))
+        closes = start * np.cumprod(1 + rng.normal(0, self.volatility, len(index)))
+        opens = np.concatenate([[start], closes[:-1]])
+        spread = np.abs(rng.normal(0, self.volatility / 2, len(index)))
+        return pd.DataFrame({
+            'Open': opens,
+            'High': np.maximum(opens, closes) * (1 + spread),
+            'Low': np.minimum(opens, closes) * (1 - spread),
+            'Close': closes,
+            'Volume': rng.integers(1000, 100000, len(index)).astype(float)
+        }, index=index)
+
+    def __call__(self, symbol, period='1d', interval='5m', start=None):
+        self.calls += 1
+        step = INTERVAL_SECONDS[interval.lstrip('0123456789')] * int(interval.rstrip('mhdwko') or 1)
+        now = self.clock()
+        sessions = self.sessions
+        if start is None and period.endswith('d') and period[:-1].isdigit():
+            sessions = min(sessions, int(period[:-1]))
+        days = pd.bdate_range(end=now.normalize().tz_localize(None), periods=sessions).tz_localize(self.tz)
+        frame = pd.concat([self.session(symbol, day, step) for day in days])
+        frame = frame[frame.index <= now]  # Bars that have not opened yet don't exist
+        if start is not None:
+            frame = frame[frame.index >= start]
+        return frame
+
+
+INTERVAL_SECONDS = {
+    'm': 60,
+    'h': 3600,
+    'd': 86400,
+    'wk': 7 * 86400,
+    'mo': 30 * 86400
+}
+
+
+def interval_ttl(interval, minimum=15, maximum=3600):
+    """Cache TTL for bars of an interval: half a bar, clamped to [minimum, maximum]"""
+    for suffix in ('mo', 'wk', 'm', 'h', 'd'):
+        if interval.endswith(suffix) and interval[:-len(suffix)].isdigit():
+            seconds = int(interval[:-len(suffix)]) * INTERVAL_SECONDS[suffix]
+            return max(minimum, min(maximum, seconds / 2))
+    return minimum
+
+
+class MarketDataCache:
+    """Size-bounded LRU cache with per-entry TTL and stale-while-revalidate
+
+    - Fresh entries are served directly.
+    - Entries past their TTL but inside the stale window (stale_factor * ttl)
+      are served immediately while one background refresh runs.
+    - Missing or expired entries are fetched in the caller's thread;
+      concurrent callers for the same key wait on that single fetch.
+    """
+
+    def __init__(self, max_entries=256, stale_factor=10, refresh_workers=4):
+        self.max_entries = max_entries
+        self.stale_factor = stale_factor
+        self.entries = OrderedDict()  # key -> (value, fetched_at, ttl)
+        self.inflight = {}  # key -> Future
+        self.lock = threading.Lock()
+        self.refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='cache-refresh')
+        self.counters = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'refreshes': 0,
+            'errors': 0,
+            'evictions': 0
+        }
+
+    def get(self, key, fetch, ttl):
+        """Return the cached value for key, calling fetch() when needed"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, fetched_at, _ = entry
+                age = time.monotonic() - fetched_at
+                if age <= ttl:
+                    self.entries.move_to_end(key)
+                    self.counters['hits'] += 1
+                    return value
+                if age <= ttl * self.stale_factor:
+                    self.entries.move_to_end(key)
+                    self.counters['stale_hits'] += 1
+                    if key not in self.inflight:
+                        self.counters['refreshes'] += 1
+                        self.inflight[key] = Future()
+                        self.refresher.submit(self._fetch, key, fetch, ttl)
+                    return value
+
+            future = self.inflight.get(key)
+            if future is None:
+                self.counters['misses'] += 1
+                self.inflight[key] = Future()
+            else:
+                self.counters['coalesced'] += 1
+
+        if future is not None:
+            # Another caller is already fetching this key
+            return future.result()
+        return self._fetch(key, fetch, ttl)
+
+    def _fetch(self, key, fetch, ttl):
+        future = self.inflight[key]
+        try:
+            value = fetch()
+        except Exception as e:
+            with self.lock:
+                self.counters['errors'] += 1
+                del self.inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            self.entries[key] = (value, time.monotonic(), ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+            del self.inflight[key]
+        future.set_result(value)
+        return value
+
+    def stats(self):
+        """Counters plus the current entry count"""
+        with self.lock:
+            return {**self.counters, 'entries': len(self.entries), 'inflight': len(self.inflight)}
+
+
+QUOTE_PROVIDERS = {
+    'yahoo': YahooQuoteProvider,
+    'fake': FakeQuoteProvider
+}
+
+
+def create_quote_provider(name='yahoo', **kwargs):
+    """Build a quote provider by name ('yahoo' or 'fake')"""
+    try:
+        return QUOTE_PROVIDERS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown quote provider: {name}")
@@ -0,0 +1,209 @@
+"""In-process metrics exposed in the Prometheus text format.
+
+Counters and histograms are plain objects updated on the hot path (a lock
+and a few integer adds per observation), and the module-level registry
+renders them for /api/metrics. Components that already keep their own
+counters (the history cache, the sentiment service) are read through
+callbacks at render time instead of being counted twice.
+
+    with STAGE_SECONDS.time('quote_fetch'):
+        quotes = provider.get_quotes(symbols)
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond decisions to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label values"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self.values.get(labels, 0)
+
+    def samples(self):
+        with self.lock:
+            items = list(self.values.items())
+        for labels, value in items:
+            yield self.name + _labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observations (seconds) per label values"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels, errors=None):
+        """Observe the duration of a with-block; an exception also counts in errors"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            if errors is not None:
+                errors.inc(*labels)
+            raise
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels):
+        series = self.series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        with self.lock:
+            items = [(labels, list(series)) for labels, series in self.series.items()]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                yield self.name + '_bucket' + _labels(self.labelnames, labels, f'le="{_number(bound)}"'), cumulative
+            yield self.name + '_sum' + _labels(self.labelnames, labels), series[-1]
+            yield self.name + '_count' + _labels(self.labelnames, labels), cumulative
+
+
+class Callback:
+    """Gauge or counter whose values are read from func() at render time
+
+    func returns a number, or {label values tuple: number} when there are
+    label names.
+    """
+
+    def __init__(self, name, help, func, kind='gauge', labelnames=()):
+        self.name = name
+        self.help = help
+        self.func = func
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        values = self.func()
+        if not self.labelnames:
+            values = {(): values}
+        for labels, value in values.items():
+            if isinstance(value, (int, float)):  # Skip None and nested stats
+                yield self.name + _labels(self.labelnames, labels), int(value) if isinstance(value, bool) else value
+
+
+class MetricsRegistry:
+    """Named metrics rendered together as one Prometheus text page"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _register(self, metric):
+        with self.lock:
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, func, kind='gauge', labelnames=()):
+        """Register (or replace) a metric read from func() on every render"""
+        return self._register(Callback(name, help, func, kind, labelnames))
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{sample} {_number(value)}" for sample, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    'trading_stage_seconds', 'Latency of trading pipeline stages', ['stage']
+)
+STAGE_ERRORS = registry.counter(
+    'trading_stage_errors_total', 'Trading pipeline stages that raised', ['stage']
+)
+UPSTREAM_REQUESTS = registry.counter(
+    'trading_upstream_requests_total', 'Requests made to upstream data sources', ['upstream']
+)
+UPSTREAM_ERRORS = registry.counter(
+    'trading_upstream_errors_total', 'Upstream requests that failed', ['upstream']
+)
+CYCLE_SECONDS = registry.histogram(
+    'trading_cycle_seconds', 'Duration of full trading loop cycles'
+)
+CYCLE_OVERRUNS = registry.counter(
+    'trading_cycle_overruns_total', 'Trading loop cycles that took longer than the cycle interval'
+)
+
+
+def counted(upstream, func):
+    """Wrap an upstream call so each call and failure is counted"""
+    def call(*args, **kwargs):
+        UPSTREAM_REQUESTS.inc(upstream)
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            UPSTREAM_ERRORS.inc(upstream)
+            raise
+    call.__name__ = getattr(func, '__name__', upstream)
+    return call
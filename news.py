@@ -0,0 +1,164 @@
+"""Multi-symbol news ingestion.
+
+Instead of one NewsAPI query per symbol, NewsFeed pulls one combined feed per
+refresh, tokenizes every article once and routes it to the symbols it
+mentions with a TickerMatcher: an Aho-Corasick automaton over word tokens
+built from tickers and company aliases. Matching is linear in the length of
+the text and only whole words match, so "META" no longer matches "metadata".
+"""
+import re
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"\$?[A-Za-z0-9]+(?:[&.\-][A-Za-z0-9]+)*")
+
+COMPANY_ALIASES = {
+    'AAPL': ['Apple'],
+    'GOOGL': ['Alphabet', 'Google'],
+    'TSLA': ['Tesla'],
+    'MSFT': ['Microsoft'],
+    'AMZN': ['Amazon'],
+    'NVDA': ['Nvidia'],
+    'META': ['Meta Platforms', 'Facebook'],
+    'NFLX': ['Netflix']
+}
+
+
+def tokenize(text):
+    """Word tokens of a text, e.g. "$AAPL", "Apple", "BRK.B", "AT&T" """
+    return TOKEN_RE.findall(text)
+
+
+class TickerMatcher:
+    """Find which symbols a tokenized text mentions
+
+    Tickers match as whole tokens written in capitals or with a cashtag
+    ("AAPL", "$aapl"). Aliases match case-insensitively as whole token
+    sequences ("Meta Platforms") through an Aho-Corasick automaton whose
+    alphabet is lowercased tokens, so one pass over the tokens finds every
+    alias at once.
+    """
+
+    def __init__(self, symbols, aliases=None):
+        aliases = COMPANY_ALIASES if aliases is None else aliases
+        self.tickers = {symbol.upper(): symbol for symbol in symbols}
+        self.goto = [{}]  # node -> {token: node}
+        self.fail = [0]
+        self.outputs = [set()]
+        for symbol in symbols:
+            for alias in aliases.get(symbol, []):
+                self._add([token.lower() for token in tokenize(alias)], symbol)
+        self._link()
+
+    def _add(self, tokens, symbol):
+        node = 0
+        for token in tokens:
+            child = self.goto[node].get(token)
+            if child is None:
+                child = len(self.goto)
+                self.goto[node][token] = child
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append(set())
+            node = child
+        self.outputs[node].add(symbol)
+
+    def _link(self):
+        """Breadth-first failure links; outputs inherit their fallback's outputs"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(token, 0)
+                self.fail[child] = target if target != child else 0
+                self.outputs[child] |= self.outputs[self.fail[child]]
+
+    def match(self, tokens):
+        """Set of symbols mentioned in a token list"""
+        found = set()
+        goto, fail, outputs, tickers = self.goto, self.fail, self.outputs, self.tickers
+        node = 0
+        for token in tokens:
+            if token[0] == '$':
+                symbol = tickers.get(token[1:].upper())
+            else:
+                symbol = tickers.get(token) if token.isupper() else None
+            if symbol is not None:
+                found.add(symbol)
+
+            word = token.lstrip('$').lower()
+            while node and word not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word, 0)
+            if outputs[node]:
+                found |= outputs[node]
+        return found
+
+
+class NewsFeed:
+    """One combined news feed routed to every watched symbol
+
+    refresh() costs one upstream request however many symbols are watched.
+    Articles are tokenized once when they arrive; adding a symbol only
+    re-routes the stored tokens.
+    """
+
+    def __init__(self, ttl=900, aliases=None):
+        self.ttl = ttl
+        self.aliases = aliases
+        self.symbols = set()
+        self.matcher = TickerMatcher([], aliases)
+        self.articles = []  # (text, tokens)
+        self.routes = {}  # symbol -> indexes into articles
+        self.scores = []  # polarity per article
+        self.fetched_at = None
+        self.lock = threading.Lock()  # Held across refresh so concurrent callers share one fetch
+
+    def is_stale(self):
+        return self.fetched_at is None or time.monotonic() - self.fetched_at > self.ttl
+
+    def refresh(self, session, config, scorer):
+        """Download the combined feed, tokenize, route and score every article"""
+        response = session.get(
+            config['base_url'],
+            params={**config.get('params', {}), 'apiKey': config['api_key']},
+            timeout=config['timeout']
+        )
+        response.raise_for_status()
+        texts = [
+            f"{article.get('title') or ''} {article.get('description') or ''} {article.get('content') or ''}"
+            for article in response.json().get('articles', [])
+        ]
+        self.articles = [(text, tokenize(text)) for text in texts]
+        self.scores = scorer.score_many(texts)
+        self._route()
+        self.fetched_at = time.monotonic()
+
+    def watch(self, symbol):
+        """Start routing articles to symbol"""
+        if symbol not in self.symbols:
+            self.symbols.add(symbol)
+            self.matcher = TickerMatcher(sorted(self.symbols), self.aliases)
+            self._route()
+
+    def _route(self):
+        routes = {}
+        for i, (_, tokens) in enumerate(self.articles):
+            for symbol in self.matcher.match(tokens):
+                routes.setdefault(symbol, []).append(i)
+        self.routes = routes
+
+    def result_for(self, symbol):
+        """News sentiment for a symbol from the latest feed"""
+        indexes = self.routes.get(symbol, [])
+        if not indexes:
+            return {'score': 0.0, 'count': 0, 'source': 'news'}
+        scores = [self.scores[i] for i in indexes]
+        return {'score': float(np.mean(scores)), 'count': len(scores), 'source': 'news'}
@@ -0,0 +1,101 @@
+"""JSON encoding and pre-serialized, versioned API payloads.
+
+encode_json turns bot state (dicts, lists, NumPy scalars and arrays) into
+JSON bytes in one pass, using orjson when it is installed. The background
+loop builds payloads once per data update and publishes them here as bytes;
+request handlers serve the stored bytes with their ETag instead of rebuilding
+and re-encoding the payload on every request.
+"""
+import hashlib
+import json
+import threading
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+class Payload:
+    """One published payload: encoded body, ETag and version"""
+
+    __slots__ = ('body', 'etag', 'version')
+
+    def __init__(self, body, etag, version):
+        self.body = body
+        self.etag = etag
+        self.version = version
+
+
+def _json_default(obj):
+    """Encode NumPy/pandas values the encoder does not handle natively"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_json(obj):
+    """Compact JSON bytes for a payload
+
+    With orjson, NumPy arrays are encoded natively and NaN becomes null.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=ORJSON_OPTIONS)
+    return json.dumps(obj, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider that routes jsonify() through encode_json"""
+
+    def dumps(self, obj, **kwargs):
+        return encode_json(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if orjson is not None else json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(encode_json(obj), mimetype='application/json')
+
+
+class PayloadStore:
+    """Latest pre-serialized payload per key"""
+
+    def __init__(self):
+        self.payloads = {}
+        self.listeners = []  # Called with (key, payload) for every new version, (key, None) on discard
+        self.lock = threading.Lock()
+
+    def publish(self, key, obj):
+        """Encode and store obj under key
+
+        The version only moves when the encoded bytes change, so clients
+        holding the current ETag keep getting 304s between real updates.
+        """
+        body = encode_json(obj)
+        etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        with self.lock:
+            current = self.payloads.get(key)
+            if current is not None and current.etag == etag:
+                return current
+            version = current.version + 1 if current is not None else 1
+            payload = self.payloads[key] = Payload(body, etag, version)
+        for listener in self.listeners:
+            listener(key, payload)
+        return payload
+
+    def get(self, key):
+        """Latest payload for key, or None if nothing was published yet"""
+        return self.payloads.get(key)
+
+    def discard(self, key):
+        with self.lock:
+            self.payloads.pop(key, None)
+        for listener in self.listeners:
+            listener(key, None)
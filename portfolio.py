@@ -0,0 +1,94 @@
+"""Position bookkeeping for the trading bot.
+
+The ledger is updated incrementally on every fill, so cost basis and P&L
+lookups are O(1) no matter how long the trading history gets.
+"""
+
+
+class Position:
+    """Running totals for one symbol"""
+
+    __slots__ = ('quantity', 'avg_cost', 'realized_pnl', 'fees')
+
+    def __init__(self):
+        self.quantity = 0
+        self.avg_cost = 0.0
+        self.realized_pnl = 0.0
+        self.fees = 0.0
+
+    def to_dict(self):
+        return {
+            'quantity': self.quantity,
+            'avg_cost': self.avg_cost,
+            'realized_pnl': self.realized_pnl,
+            'fees': self.fees
+        }
+
+
+class PositionLedger:
+    """Per-symbol quantity, average cost, realized P&L and cumulative fees
+
+    Average cost is the weighted average fill price of the shares still
+    held; sells realize (price - avg_cost) * quantity and leave the average
+    cost of the remaining shares unchanged. Fees are tracked separately and
+    are not folded into the cost basis or the realized P&L.
+    """
+
+    def __init__(self):
+        self.positions = {}
+
+    def record_buy(self, symbol, quantity, price, fee=0.0):
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = Position()
+
+        new_quantity = position.quantity + quantity
+        position.avg_cost = (position.avg_cost * position.quantity + price * quantity) / new_quantity
+        position.quantity = new_quantity
+        position.fees += fee
+        return position
+
+    def record_sell(self, symbol, quantity, price, fee=0.0):
+        """Reduce a position and return the P&L realized by this sale"""
+        position = self.positions.get(symbol)
+        if position is None or position.quantity < quantity:
+            raise ValueError(f"Cannot sell {quantity} {symbol}: position too small")
+
+        realized = (price - position.avg_cost) * quantity
+        position.realized_pnl += realized
+        position.fees += fee
+        position.quantity -= quantity
+        if position.quantity == 0:
+            position.avg_cost = 0.0
+        return realized
+
+    def quantity(self, symbol):
+        position = self.positions.get(symbol)
+        return position.quantity if position else 0
+
+    def avg_cost(self, symbol):
+        """Average cost of the open position, or None when flat"""
+        position = self.positions.get(symbol)
+        if position is None or position.quantity == 0:
+            return None
+        return position.avg_cost
+
+    def realized_pnl(self, symbol=None):
+        """Realized P&L for one symbol, or across all symbols"""
+        if symbol is not None:
+            position = self.positions.get(symbol)
+            return position.realized_pnl if position else 0.0
+        return sum(position.realized_pnl for position in self.positions.values())
+
+    def to_dict(self):
+        return {symbol: position.to_dict() for symbol, position in self.positions.items()}
+
+    @classmethod
+    def from_dict(cls, positions):
+        """Rebuild a ledger from to_dict() output"""
+        ledger = cls()
+        for symbol, fields in positions.items():
+            position = ledger.positions[symbol] = Position()
+            for name, value in fields.items():
+                setattr(position, name, value)
+        return ledger
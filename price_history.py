@@ -0,0 +1,137 @@
+"""Columnar ring buffer for per-symbol price history.
+
+Points are stored in preallocated NumPy columns (timestamp, price, change,
+change_pct) instead of a list of dicts, so appends never allocate and the
+buffer never has to be copied to trim it. Every value is written twice, at
+``i`` and ``i + capacity``, which keeps the most recent window contiguous:
+strategy and chart code get zero-copy slices instead of rebuilt lists.
+"""
+from datetime import datetime
+
+import numpy as np
+
+
+class PriceHistoryBuffer:
+    """Fixed-capacity price history with zero-copy column views"""
+
+    FIELDS = ('timestamp', 'price', 'change', 'change_pct')
+    FIELD_INDEX = {field: i for i, field in enumerate(FIELDS)}
+
+    def __init__(self, capacity=100):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._data = np.zeros((len(self.FIELDS), 2 * capacity), dtype=np.float64)
+        self._columns = list(self._data)
+        self._readonly = self._data.view()
+        self._readonly.flags.writeable = False
+        self._labels = [None] * (2 * capacity)  # '%H:%M:%S' strings, formatted on first read
+        self._end = 0
+        self._size = 0
+        self.appended = 0  # Points ever appended, a monotonic position for deltas
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, price, change, change_pct):
+        """Add one point, overwriting the oldest once the buffer is full"""
+        i = self._end
+        j = i + self.capacity
+        timestamps, prices, changes, change_pcts = self._columns
+        timestamps[i] = timestamps[j] = timestamp
+        prices[i] = prices[j] = price
+        changes[i] = changes[j] = change
+        change_pcts[i] = change_pcts[j] = change_pct
+        self._labels[i] = self._labels[j] = None
+        self._end = (i + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        self.appended += 1
+
+    def view(self, field):
+        """Read-only view of one column, oldest point first
+
+        The view aliases the buffer; copy it if it has to outlive the next
+        append.
+        """
+        stop = self._end + self.capacity
+        return self._readonly[self.FIELD_INDEX[field], stop - self._size:stop]
+
+    def tail(self, field, count):
+        """Read-only view of the last count points of one column"""
+        stop = self._end + self.capacity
+        return self._readonly[self.FIELD_INDEX[field], stop - min(count, self._size):stop]
+
+    @property
+    def timestamps(self):
+        return self.view('timestamp')
+
+    @property
+    def prices(self):
+        return self.view('price')
+
+    @property
+    def changes(self):
+        return self.view('change')
+
+    @property
+    def change_pcts(self):
+        return self.view('change_pct')
+
+    def times(self, fmt='%H:%M:%S'):
+        """Formatted time labels for the stored points"""
+        return [datetime.fromtimestamp(ts).strftime(fmt) for ts in self.timestamps]
+
+    def __getitem__(self, index):
+        """Single point as a dict, e.g. history[-1]['price']"""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("price history index out of range")
+        position = self._end + self.capacity - self._size + index
+        timestamp, price, change, change_pct = self._data[:, position].tolist()
+        return {
+            'time': datetime.fromtimestamp(timestamp).strftime('%H:%M:%S'),
+            'price': price,
+            'change': change,
+            'change_pct': change_pct
+        }
+
+    def to_records(self, count=None):
+        """List of point dicts in the format served by /api/status
+
+        With count, only the last count points are returned.
+        """
+        count = self._size if count is None else min(count, self._size)
+        if count <= 0:
+            return []
+        stop = self._end + self.capacity
+        _, prices, changes, change_pcts = self._data[:, stop - count:stop].tolist()
+        return [
+            {'time': time, 'price': price, 'change': change, 'change_pct': change_pct}
+            for time, price, change, change_pct in zip(
+                self._time_labels(stop - count, stop), prices, changes, change_pcts
+            )
+        ]
+
+    def _time_labels(self, start, stop):
+        """Time labels for mirrored positions [start, stop), each point formatted only once"""
+        labels = self._labels
+        window = labels[start:stop]
+        if None in window:
+            timestamps = self._columns[0]
+            for position in range(start, stop):
+                if labels[position] is None:
+                    label = datetime.fromtimestamp(timestamps[position]).strftime('%H:%M:%S')
+                    slot = position % self.capacity
+                    labels[slot] = labels[slot + self.capacity] = label
+            window = labels[start:stop]
+        return window
+
+    def records_between(self, start, stop):
+        """Records for points appended at positions [start, stop) of self.appended
+
+        Points that have already been overwritten are left out.
+        """
+        records = self.to_records(self.appended - start)
+        return records[:len(records) - (self.appended - stop)] if stop < self.appended else records
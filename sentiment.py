@@ -0,0 +1,436 @@
+"""Background sentiment service.
+
+Sentiment for a symbol is fetched from every source concurrently over one
+pooled requests.Session. Each source has a token-bucket rate limit and a
+circuit breaker, so a slow or failing upstream is skipped instead of stalling
+the caller, and the combined result is kept in a TTL cache. Request handlers
+only read that cache; fetching happens on the trading loop's worker pool or in
+the service's own background refreshes.
+
+Text polarity goes through a TextScorer, which scores each distinct text once:
+batches are deduplicated by content hash and results are memoized in a
+bounded LRU that can be persisted to disk and filled from a process pool.
+
+News comes from one combined feed per refresh (see news.py) rather than one
+query per symbol, and texts are matched to symbols by whole-word tickers and
+company aliases.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from textblob import TextBlob
+
+from metrics import UPSTREAM_ERRORS, UPSTREAM_REQUESTS
+from news import NewsFeed, TickerMatcher, tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def get_sentiment_score(text):
+    """Calculate sentiment score using TextBlob (-1 to 1 scale)"""
+    try:
+        blob = TextBlob(text)
+        return blob.sentiment.polarity
+    except:
+        return 0.0
+
+
+def text_key(text):
+    """Content hash used to deduplicate and memoize texts"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class TextScorer:
+    """Batched, deduplicated, memoized TextBlob polarity
+
+    score_many hashes each text, looks the hashes up in a bounded LRU and only
+    scores the distinct texts it has not seen, in process or on a process
+    pool when processes > 0. With cache_path, the LRU is loaded at start-up
+    and written back at most every save_interval seconds.
+    """
+
+    def __init__(self, max_entries=50000, cache_path=None, processes=0, save_interval=60, pool_min_batch=64):
+        self.max_entries = max_entries
+        self.cache_path = cache_path
+        self.processes = processes
+        self.save_interval = save_interval
+        self.pool_min_batch = pool_min_batch  # Smaller batches are cheaper to score in process
+        self.cache = OrderedDict()  # text hash -> polarity
+        self.pool = None
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.last_save = time.monotonic()
+        self.counters = {'texts': 0, 'duplicates': 0, 'hits': 0, 'scored': 0}
+        if cache_path:
+            self.load()
+
+    def score_many(self, texts):
+        """Polarity for every text, in order"""
+        keys = [text_key(text) for text in texts]
+        scores = {}
+        missing = {}
+        with self.lock:
+            for key, text in zip(keys, texts):
+                if key in scores or key in missing:
+                    self.counters['duplicates'] += 1
+                elif key in self.cache:
+                    self.cache.move_to_end(key)
+                    scores[key] = self.cache[key]
+                    self.counters['hits'] += 1
+                else:
+                    missing[key] = text
+            self.counters['texts'] += len(texts)
+
+        if missing:
+            scores.update(zip(missing, self._score(list(missing.values()))))
+            with self.lock:
+                for key in missing:
+                    self.cache[key] = scores[key]
+                while len(self.cache) > self.max_entries:
+                    self.cache.popitem(last=False)
+                self.counters['scored'] += len(missing)
+                self.dirty = True
+            if self.cache_path and time.monotonic() - self.last_save >= self.save_interval:
+                self.save()
+
+        return [scores[key] for key in keys]
+
+    def _score(self, texts):
+        if self.processes and len(texts) >= self.pool_min_batch:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.processes)
+            chunksize = max(1, len(texts) // (self.processes * 4))
+            return list(self.pool.map(get_sentiment_score, texts, chunksize=chunksize))
+        return [get_sentiment_score(text) for text in texts]
+
+    def load(self):
+        """Fill the LRU from cache_path if it exists"""
+        try:
+            with open(self.cache_path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self.lock:
+            self.cache.update(list(entries.items())[-self.max_entries:])
+
+    def save(self):
+        """Write the LRU to cache_path (atomically, via a temp file)"""
+        with self.lock:
+            if not self.dirty:
+                return
+            entries = dict(self.cache)
+            self.dirty = False
+            self.last_save = time.monotonic()
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Error saving sentiment score cache: {e}")
+
+    def stats(self):
+        with self.lock:
+            return {**self.counters, 'entries': len(self.cache)}
+
+
+def empty_result(source):
+    return {'score': 0.0, 'count': 0, 'source': source}
+
+
+def score_texts(symbol, texts, source, scorer):
+    """Average sentiment of the texts that mention the symbol"""
+    matcher = TickerMatcher([symbol])
+    matching = [text for text in texts if matcher.match(tokenize(text))]
+    if not matching:
+        return empty_result(source)
+    sentiments = scorer.score_many(matching)
+    return {'score': float(np.mean(sentiments)), 'count': len(sentiments), 'source': source}
+
+
+def fetch_reddit(session, config, symbol, scorer, limit=10):
+    """Sentiment from Reddit r/wallstreetbets posts"""
+    response = session.get(
+        config['base_url'],
+        headers={'User-Agent': config['user_agent']},
+        params={'q': symbol, 'restrict_sr': 'on', 'sort': 'hot', 't': 'day', 'limit': limit},
+        timeout=config['timeout']
+    )
+    response.raise_for_status()
+    posts = response.json().get('data', {}).get('children', [])
+    texts = []
+    for post in posts:
+        post_data = post.get('data', {})
+        texts.append(f"{post_data.get('title', '')} {post_data.get('selftext', '')}")
+    return score_texts(symbol, texts, 'reddit', scorer)
+
+
+def fetch_social(session, config, symbol, scorer, limit=10):
+    """Sentiment from social media (simulated for demo)"""
+    # In a real implementation, you'd use Twitter API, StockTwits, etc.
+    price_change = random.uniform(-0.1, 0.1)  # Simulate price change
+    return {
+        'score': float(np.tanh(price_change * 10)),  # Convert to sentiment
+        'count': random.randint(5, 50),
+        'source': 'social'
+    }
+
+
+SOURCE_FETCHERS = {
+    'reddit': fetch_reddit,
+    'social': fetch_social
+}
+
+# Sources read from one shared feed per refresh instead of per-symbol requests
+FEED_SOURCES = {
+    'news': NewsFeed
+}
+
+
+class TokenBucket:
+    """Allow bursts of up to capacity requests, refilled at rate per second"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take one token if available, without waiting"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class CircuitBreaker:
+    """Skip a source after repeated failures, probing again after a cool-down
+
+    closed: calls go through. open: calls are skipped until reset_timeout has
+    passed. half-open: one probe call is let through; success closes the
+    breaker, failure opens it again, and a probe that was never made (see
+    release) leaves it open and ready to probe.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=300):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half-open'
+                return True
+            return self.state == 'closed'
+
+    def release(self):
+        """Give back a half-open probe that was never made, so a later call probes instead"""
+        with self.lock:
+            if self.state == 'half-open':
+                self.state = 'open'
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.state = 'closed'
+
+    def record_failure(self):
+        """Count a failure; True when it opened the breaker"""
+        with self.lock:
+            self.failures += 1
+            if self.state == 'half-open' or self.failures >= self.failure_threshold:
+                opened = self.state != 'open'
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                return opened
+            return False
+
+
+class SentimentService:
+    """Concurrent, rate-limited, cached sentiment across sources
+
+    config maps source name to its settings: base_url and other fetch
+    parameters, weight, timeout, rate_limit as (requests, per_seconds), plus
+    optional failure_threshold and reset_timeout for its breaker. Feed
+    sources (news) take an optional feed_ttl; their rate limit and breaker
+    apply to the shared feed download, not to per-symbol reads.
+    """
+
+    def __init__(self, config, ttl=900, max_workers=8, fetchers=None, scorer=None):
+        self.config = config
+        self.ttl = ttl
+        self.fetchers = fetchers or SOURCE_FETCHERS
+        self.scorer = scorer or TextScorer()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(config), pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sentiment-fetch')
+        # Separate pool for refresh_async so refreshes never wait on their own fetch slots
+        self.refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sentiment-refresh')
+        self.buckets = {}
+        self.breakers = {}
+        for source, settings in config.items():
+            requests_allowed, per_seconds = settings['rate_limit']
+            self.buckets[source] = TokenBucket(requests_allowed / per_seconds, requests_allowed)
+            self.breakers[source] = CircuitBreaker(
+                settings.get('failure_threshold', 3),
+                settings.get('reset_timeout', 300)
+            )
+        self.feeds = {
+            source: FEED_SOURCES[source](ttl=settings.get('feed_ttl', ttl))
+            for source, settings in config.items()
+            if source in FEED_SOURCES
+        }
+        self.cache = {}  # symbol -> (result, monotonic fetch time)
+        self.source_results = {}  # (symbol, source) -> last successful per-source result
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.counters = {'refreshes': 0, 'skipped_rate_limited': 0, 'skipped_open_circuit': 0, 'errors': 0}
+
+    def get(self, symbol):
+        """Cached sentiment for a symbol, or None; never touches the network"""
+        entry = self.cache.get(symbol)
+        return entry[0] if entry else None
+
+    def is_stale(self, symbol):
+        entry = self.cache.get(symbol)
+        return entry is None or time.monotonic() - entry[1] > self.ttl
+
+    def refresh(self, symbol):
+        """Fetch every source for a symbol concurrently and cache the combined result"""
+        futures = {
+            self.executor.submit(self._fetch_source, source, symbol): source
+            for source in self.config
+        }
+        # Each fetch has its own request timeout; this only bounds a stuck source
+        timeout = max(settings['timeout'] for settings in self.config.values()) + 1
+        done, _ = wait(futures, timeout=timeout)
+
+        results = {}
+        for future, source in futures.items():
+            result = future.result() if future in done else None
+            if result is None:
+                # Skipped, failed or too slow: keep the last good reading for this source
+                result = self.source_results.get((symbol, source), empty_result(source))
+            results[source] = result
+
+        sentiment = self._combine(results)
+        with self.lock:
+            self.cache[symbol] = (sentiment, time.monotonic())
+            self.counters['refreshes'] += 1
+        return sentiment
+
+    def refresh_async(self, symbol):
+        """Start a background refresh unless one is already running"""
+        with self.lock:
+            future = self.inflight.get(symbol)
+            if future is not None and not future.done():
+                return future
+            future = self.inflight[symbol] = self.refresher.submit(self.refresh, symbol)
+            return future
+
+    def _fetch_source(self, source, symbol):
+        feed = self.feeds.get(source)
+        if feed is not None:
+            return self._read_feed(source, feed, symbol)
+
+        result = self._guarded(
+            source, symbol,
+            lambda: self.fetchers[source](self.session, self.config[source], symbol, self.scorer)
+        )
+        if result is not None:
+            self.source_results[(symbol, source)] = result
+        return result
+
+    def _read_feed(self, source, feed, symbol):
+        """Symbol's share of a shared feed, downloading the feed first if it is stale"""
+        with feed.lock:
+            feed.watch(symbol)
+            if feed.is_stale():
+                self._guarded(
+                    source, 'all symbols',
+                    lambda: feed.refresh(self.session, self.config[source], self.scorer)
+                )
+            if feed.fetched_at is None:
+                return None
+            return feed.result_for(symbol)
+
+    def _guarded(self, source, label, call):
+        """Run an upstream call behind the source's breaker and rate limit; None if skipped or failed"""
+        breaker = self.breakers[source]
+        if not breaker.allow():
+            self._count('skipped_open_circuit')
+            return None
+        if not self.buckets[source].try_acquire():
+            breaker.release()
+            self._count('skipped_rate_limited')
+            return None
+
+        UPSTREAM_REQUESTS.inc(source)
+        try:
+            result = call()
+        except Exception as e:
+            UPSTREAM_ERRORS.inc(source)
+            self._count('errors')
+            # Every failure is counted in the metrics; the log only warns when the source gets switched off
+            if breaker.record_failure():
+                logger.warning(f"⚠️ {source.capitalize()} sentiment failing, skipping it for "
+                               f"{breaker.reset_timeout}s. Last error for {label}: {e}")
+            else:
+                logger.debug(f"{source.capitalize()} sentiment error for {label}: {e}")
+            return None
+
+        breaker.record_success()
+        return result
+
+    def _combine(self, results):
+        """Weighted average over the sources that returned data"""
+        total_weight = 0
+        weighted_sum = 0
+        for source, result in results.items():
+            if result['count'] > 0:  # Only include sources with data
+                weight = self.config[source]['weight']
+                weighted_sum += result['score'] * weight
+                total_weight += weight
+
+        return {
+            'overall_score': weighted_sum / total_weight if total_weight > 0 else 0.0,
+            **results,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        """Counters, cache size and breaker state per source"""
+        with self.lock:
+            return {
+                **self.counters,
+                'cached_symbols': len(self.cache),
+                'scoring': self.scorer.stats(),
+                'breakers': {source: breaker.state for source, breaker in self.breakers.items()}
+            }
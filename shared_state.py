@@ -0,0 +1,361 @@
+"""Engine state shared with separate web worker processes.
+
+In the multi-process deployment one engine process runs the trading loop and
+any number of stateless web workers (web.py under gunicorn) serve HTTP:
+
+- The engine's StateWriter writes every published status snapshot and chart
+  payload to its own file in the state directory, replacing it atomically.
+  The status file keeps the last few deltas, so workers can answer
+  ?since=<seq> polls and SSE streams without asking the engine.
+- A worker's StateReader memory-maps those files and reopens one only when
+  it was replaced (the same stat check barstore.py uses), so a read costs
+  one stat() and no copy of the engine's state.
+- Commands (trades, the bot toggle) and rarely read stats go to the engine
+  over a Unix socket: EngineServer in the engine, EngineClient in workers.
+
+The state directory defaults to /dev/shm, which is memory-backed, and is
+created mode 0700: the socket exchanges pickles, so only processes of the
+same user may connect.
+"""
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import TimeoutError as CommandTimeout
+from multiprocessing.connection import Client, Listener
+
+from payloads import Payload, encode_json, orjson
+from status import event_frame, merge_steps
+
+
+def default_state_dir():
+    """Memory-backed directory for the shared snapshots when there is one"""
+    root = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(root, 'trading-bot')
+
+
+def state_paths():
+    """(state directory, engine socket path), from STATE_DIR and ENGINE_SOCKET when set"""
+    directory = os.environ.get('STATE_DIR') or default_state_dir()
+    return directory, os.environ.get('ENGINE_SOCKET') or os.path.join(directory, 'engine.sock')
+
+
+def web_threads():
+    """Threads per gunicorn web worker (WEB_THREADS, default 8)"""
+    return int(os.environ.get('WEB_THREADS', 8))
+
+
+def stream_limit(threads):
+    """Open /api/stream connections a worker with this many threads may hold
+
+    Every stream keeps one thread busy for as long as it is open, so at
+    least two threads stay free for /api/ready, /api/status and trades.
+    WORKER_MAX_STREAMS can lower the limit but never raise it past that.
+    """
+    limit = threads - 2
+    if os.environ.get('WORKER_MAX_STREAMS'):
+        limit = min(limit, int(os.environ['WORKER_MAX_STREAMS']))
+    return max(0, limit)
+
+
+def _chart_name(symbol):
+    return f'chart-{symbol}.bin'
+
+
+def _loads(body):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+class StateWriter:
+    """Writes the engine's published payloads for web workers (engine side)
+
+    Each file is one JSON header line followed by the bodies it describes.
+    """
+
+    def __init__(self, directory, deltas=64):
+        self.directory = directory
+        self.deltas = deque(maxlen=deltas)  # (seq, encoded delta from seq - 1)
+        self.versions = {}  # chart symbol -> last version written
+        self.lock = threading.Lock()
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        os.chmod(directory, 0o700)
+
+    def _replace(self, name, header, bodies):
+        path = os.path.join(self.directory, name)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(json.dumps(header, separators=(',', ':')).encode('utf-8') + b'\n')
+            for body in bodies:
+                f.write(body)
+        os.replace(tmp_path, path)
+
+    def write_status(self, snapshot, symbols, capacity, trade_limit):
+        """Write a StatusSnapshot with the deltas leading up to it"""
+        with self.lock:
+            if self.deltas and self.deltas[-1][0] != snapshot.seq - 1:
+                self.deltas.clear()  # A gap: older deltas no longer chain up to this one
+            if snapshot.delta is not None:
+                self.deltas.append((snapshot.seq, snapshot.delta))
+            header = {
+                'seq': snapshot.seq,
+                'symbols': symbols,
+                'capacity': capacity,
+                'trade_limit': trade_limit,
+                'full': len(snapshot.full),
+                'deltas': [[seq, len(body)] for seq, body in self.deltas]
+            }
+            self._replace('status.bin', header, [snapshot.full] + [body for _, body in self.deltas])
+
+    def write_chart(self, symbol, payload):
+        """PayloadStore listener: write a chart payload, or remove it when discarded"""
+        with self.lock:
+            if payload is None:
+                self.versions.pop(symbol, None)
+                try:
+                    os.remove(os.path.join(self.directory, _chart_name(symbol)))
+                except FileNotFoundError:
+                    pass
+                return
+            if payload.version <= self.versions.get(symbol, 0):
+                return  # A concurrent build already wrote something newer
+            self.versions[symbol] = payload.version
+            self._replace(_chart_name(symbol), {'etag': payload.etag, 'version': payload.version}, [payload.body])
+
+
+class SharedStatus:
+    """One status file as read by a worker"""
+
+    def __init__(self, header, data, offset):
+        self.seq = header['seq']
+        self.symbols = header['symbols']
+        self.capacity = header['capacity']
+        self.trade_limit = header['trade_limit']
+        end = offset + header['full']
+        self.full = data[offset:end]
+        self.deltas = {}
+        for seq, length in header['deltas']:
+            self.deltas[seq] = data[end:end + length]
+            end += length
+        self.steps = {}  # seq -> decoded delta, filled on first merge
+        self.events = {}
+
+    def can_delta(self, since):
+        return since is not None and (since + 1 in self.deltas or (since == self.seq and self.seq in self.deltas))
+
+    def encoded(self, since=None):
+        """Same answers as StatusTracker.encoded(), from the shared file"""
+        if not self.can_delta(since):
+            return self.full
+        if since == self.seq - 1:
+            return self.deltas[self.seq]
+        return encode_json(self.merge(since))
+
+    def merge(self, since):
+        for seq in range(since + 1, self.seq + 1):
+            if seq not in self.steps:
+                self.steps[seq] = _loads(self.deltas[seq])
+        if self.seq not in self.steps:
+            self.steps[self.seq] = _loads(self.deltas[self.seq])
+        return merge_steps(self.steps, since, self.seq, self.capacity, self.trade_limit)
+
+    def event(self, since):
+        """SSE frame bringing a client at since up to this snapshot"""
+        key = 'full' if not self.can_delta(since) else ('delta' if since == self.seq - 1 else None)
+        if key is None:
+            return event_frame(self.seq, self.encoded(since))
+        if key not in self.events:
+            self.events[key] = event_frame(self.seq, self.full if key == 'full' else self.deltas[self.seq])
+        return self.events[key]
+
+
+class StateReader:
+    """Memory-mapped view of the files a StateWriter publishes (worker side)"""
+
+    def __init__(self, directory, poll_interval=0.1, keepalive=15, max_subscribers=100):
+        self.directory = directory
+        self.poll_interval = poll_interval  # Seconds between checks for a new status on a stream
+        self.keepalive = keepalive
+        self.max_subscribers = max_subscribers  # Open streams allowed in this worker
+        self.subscribers = 0
+        self.cache = {}  # name -> (stat key, parsed object)
+        self.lock = threading.Lock()
+
+    def _open(self, name, parse):
+        """Parsed contents of a file, re-read only when the file was replaced"""
+        path = os.path.join(self.directory, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self.cache.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        try:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                newline = data.find(b'\n')
+                value = parse(json.loads(data[:newline]), data, newline + 1)
+        except FileNotFoundError:
+            return None  # Removed between the stat and the open
+        with self.lock:
+            self.cache[name] = (key, value)
+        return value
+
+    def status(self):
+        """Latest SharedStatus, or None before the engine published one"""
+        return self._open('status.bin', SharedStatus)
+
+    def chart(self, symbol):
+        """Latest chart Payload for a symbol, or None"""
+        return self._open(
+            _chart_name(symbol),
+            lambda header, data, offset: Payload(data[offset:], header['etag'], header['version'])
+        )
+
+    def subscribe(self):
+        """Reserve a stream slot; False once max_subscribers are connected"""
+        with self.lock:
+            if self.subscribers >= self.max_subscribers:
+                return False
+            self.subscribers += 1
+            return True
+
+    def unsubscribe(self):
+        with self.lock:
+            self.subscribers -= 1
+
+    def stream(self, since=None):
+        """SSE frames for every status the engine publishes after since, polling the file"""
+        last_frame = time.monotonic()
+        while True:
+            status = self.status()
+            if status is not None and since != status.seq:
+                frame = status.event(since)
+                since = status.seq
+            elif time.monotonic() - last_frame >= self.keepalive:
+                frame = b': keepalive\n\n'
+            else:
+                time.sleep(self.poll_interval)
+                continue
+            last_frame = time.monotonic()
+            yield frame
+
+
+class EngineUnavailable(Exception):
+    """The engine process did not answer"""
+
+
+class EngineBusy(Exception):
+    """The engine answered but its trading loop did not run the command in time"""
+
+
+class EngineError(RuntimeError):
+    """A handler raised in the engine; the message names the remote exception"""
+
+
+class EngineServer:
+    """Answers worker requests over a Unix socket (engine side)
+
+    handlers maps an operation name to a callable; each connection gets a
+    thread that runs requests one at a time.
+    """
+
+    def __init__(self, address, handlers):
+        self.address = address
+        self.handlers = handlers
+        if os.path.exists(address):
+            os.remove(address)  # Left over from a previous engine
+        self.listener = Listener(address, family='AF_UNIX')
+        self.thread = threading.Thread(target=self._accept, name='engine-ipc', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _accept(self):
+        while True:
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                return  # Listener closed
+            threading.Thread(target=self._serve, args=(connection,), name='engine-ipc-conn', daemon=True).start()
+
+    def _serve(self, connection):
+        with connection:
+            while True:
+                try:
+                    op, args = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ('ok', self.handlers[op](*args))
+                except (CommandTimeout, TimeoutError) as e:
+                    # bot.execute raises concurrent.futures.TimeoutError, only an alias of the builtin from 3.11
+                    reply = ('busy', str(e) or 'command timed out')
+                except Exception as e:
+                    reply = ('error', f"{type(e).__name__}: {e}")
+                try:
+                    connection.send(reply)
+                except OSError:
+                    return
+
+    def close(self):
+        self.listener.close()
+
+
+class EngineClient:
+    """Calls EngineServer handlers from a web worker, one connection per thread"""
+
+    def __init__(self, address, timeout=15.0):
+        self.address = address
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = Client(self.address, family='AF_UNIX')
+        return connection
+
+    def _drop(self):
+        connection = getattr(self.local, 'connection', None)
+        self.local.connection = None
+        if connection is not None:
+            connection.close()
+
+    def call(self, op, *args):
+        """Run a handler in the engine and return its result
+
+        Raises EngineUnavailable if the engine can't be reached or doesn't
+        answer within the timeout, EngineBusy if its command timed out, and
+        EngineError for other failures in the handler.
+        """
+        for attempt in range(2):
+            try:
+                connection = self._connection()
+                connection.send((op, args))
+                break
+            except OSError as e:
+                # Nothing was delivered, so one retry on a fresh connection is safe
+                self._drop()
+                if attempt:
+                    raise EngineUnavailable(f"engine not reachable at {self.address}: {e}")
+        try:
+            answered = connection.poll(self.timeout)
+            if answered:
+                status, value = connection.recv()
+        except (OSError, EOFError) as e:
+            # The request may have run, so it is never resent
+            self._drop()
+            raise EngineUnavailable(f"engine connection lost during {op}: {e}")
+        if not answered:
+            self._drop()  # Its late reply must not be read as the next request's answer
+            raise EngineUnavailable(f"engine did not answer {op} within {self.timeout}s")
+        if status == 'busy':
+            raise EngineBusy(value)
+        if status == 'error':
+            raise EngineError(value)
+        return value
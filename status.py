@@ -0,0 +1,250 @@
+"""Sequence-numbered status snapshots for /api/status.
+
+Each state change the dashboard shows (a trading cycle, a manual trade, a
+bot toggle, a sentiment refresh) is published under a new sequence number.
+The full status and the delta from the previous sequence are encoded once per
+publish; a client that passes ?since=<seq> only gets the symbols, history
+points and trades that changed after that sequence.
+
+publish() runs on the engine's writer thread and records what changed in
+each step. Everything a reader needs is in an immutable StatusSnapshot that
+publish() swaps in with one assignment: requests read the current snapshot
+without a lock and merge older steps themselves, so readers never wait on
+the writer or see a half-applied trade, and the writer never waits on them.
+
+The same encoded updates are pushed to Server-Sent Events subscribers. A
+subscriber that falls behind is not queued up: when it is ready again it
+gets one delta covering everything it missed (or a full snapshot if it fell
+out of the retained window), so slow clients cost neither memory nor work
+for the others.
+"""
+import threading
+import time
+
+from payloads import encode_json
+
+ACCOUNT_FIELDS = ('balance', 'portfolio', 'positions', 'portfolio_value', 'total_value', 'is_running',
+                  'market_hours', 'warming')
+
+
+def event_frame(seq, body):
+    """SSE frame carrying one encoded status body"""
+    return b'id: %d\nevent: status\ndata: %s\n\n' % (seq, body)
+
+
+def merge_steps(steps, since, seq, capacity, trade_limit):
+    """Delta from since to seq, merged from the steps (seq -> step) in between"""
+    delta = {
+        'seq': seq,
+        'full': False,
+        'since': since,
+        'prices': {},
+        'price_history': {},
+        'technical_indicators': {},
+        'sentiment_data': {},
+        'trading_history': []
+    }
+    for step_seq in range(since + 1, seq + 1):
+        step = steps[step_seq]
+        delta['prices'].update(step['prices'])
+        delta['technical_indicators'].update(step['technical_indicators'])
+        delta['sentiment_data'].update(step['sentiment_data'])
+        for symbol, records in step['price_history'].items():
+            delta['price_history'][symbol] = (delta['price_history'].get(symbol, []) + records)[-capacity:]
+        delta['trading_history'] += step['trading_history']
+    latest = steps[seq]
+    for key in ACCOUNT_FIELDS:
+        delta[key] = latest[key]
+    delta['trading_history'] = delta['trading_history'][-trade_limit:]
+    return delta
+
+
+class StatusSnapshot:
+    """One published status; never modified after publish()"""
+
+    __slots__ = ('seq', 'full', 'delta', 'steps', 'events')
+
+    def __init__(self, seq, full, delta, steps, events):
+        self.seq = seq
+        self.full = full  # Encoded full status
+        self.delta = delta  # Encoded delta from seq - 1, None for the first snapshot
+        self.steps = steps  # seq -> what changed in that step, oldest first
+        self.events = events  # 'full' / 'delta' -> SSE frame
+
+
+class StatusTracker:
+    """Versioned view of a TradingEngine's state"""
+
+    def __init__(self, engine, max_marks=720, trade_limit=10, max_subscribers=100, keepalive=15):
+        self.engine = engine
+        self.max_marks = max_marks  # Sequences a client can lag before it gets a full snapshot again
+        self.trade_limit = trade_limit  # Trades included per response
+        # Start from the clock so sequences from before a restart are not mistaken for current ones
+        self.seq = int(time.time() * 1000)
+        self.snapshot = None
+        self.fingerprints = {}
+        self.appended = {}  # symbol -> history points appended at the last publish
+        self.trade_count = 0
+        self.market_hours = False
+        self.max_subscribers = max_subscribers
+        self.keepalive = keepalive  # Seconds between comment frames on an idle stream
+        self.subscribers = 0
+        self.listeners = []  # Called with each new StatusSnapshot, on the writer thread
+        self.lock = threading.Lock()
+        self.updated = threading.Condition(self.lock)
+
+    def publish(self, market_hours=None):
+        """Record the engine's current state under the next sequence number
+
+        Only the engine's writer thread may call this.
+        """
+        engine = self.engine
+        self.seq += 1
+        if market_hours is not None:
+            self.market_hours = market_hours
+
+        changed = []
+        for symbol in engine.symbols:
+            history = engine.price_history.get(symbol)
+            fingerprint = (
+                engine.current_prices.get(symbol),
+                history.appended if history is not None else 0,
+                dict(engine.technical_indicators.get(symbol, {})),
+                engine.sentiment_data.get(symbol)
+            )
+            if fingerprint != self.fingerprints.get(symbol):
+                self.fingerprints[symbol] = fingerprint
+                changed.append(symbol)
+
+        price_history = {}
+        for symbol in changed:
+            history = engine.price_history.get(symbol)
+            start = self.appended.get(symbol, 0)
+            if history is not None and history.appended > start:
+                price_history[symbol] = history.records_between(start, history.appended)
+                self.appended[symbol] = history.appended
+
+        new_trades = min(engine.trade_count - self.trade_count, self.trade_limit)
+        step = {
+            **self._account(),
+            'prices': {s: engine.current_prices[s] for s in changed if s in engine.current_prices},
+            'price_history': price_history,
+            'technical_indicators': {
+                s: dict(engine.technical_indicators[s]) for s in changed if s in engine.technical_indicators
+            },
+            'sentiment_data': {s: engine.sentiment_data[s] for s in changed if s in engine.sentiment_data},
+            'trading_history': engine.trading_history[-new_trades:] if new_trades > 0 else []
+        }
+        self.trade_count = engine.trade_count
+
+        previous = self.snapshot
+        steps = dict(previous.steps) if previous is not None else {}
+        steps[self.seq] = step
+        while len(steps) > self.max_marks:
+            del steps[next(iter(steps))]
+
+        full = encode_json(self._full())
+        events = {'full': self._event(self.seq, full)}
+        delta = None
+        if previous is not None:
+            delta = encode_json({'seq': self.seq, 'full': False, 'since': self.seq - 1, **step})
+            events['delta'] = self._event(self.seq, delta)
+
+        self.snapshot = StatusSnapshot(self.seq, full, delta, steps, events)
+        with self.lock:
+            self.updated.notify_all()
+        for listener in self.listeners:
+            listener(self.snapshot)
+        return self.seq
+
+    def encoded(self, since=None):
+        """JSON bytes for /api/status: the full snapshot, or only what changed after since"""
+        snapshot = self.snapshot
+        if not self._can_delta(snapshot, since):
+            # Unknown, expired or pre-restart sequence: start the client over
+            return snapshot.full
+        if since == snapshot.seq - 1:
+            return snapshot.delta
+        return encode_json(self._merge(snapshot, since))
+
+    def subscribe(self):
+        """Reserve a stream slot; False once max_subscribers are connected"""
+        with self.lock:
+            if self.subscribers >= self.max_subscribers:
+                return False
+            self.subscribers += 1
+            return True
+
+    def unsubscribe(self):
+        with self.lock:
+            self.subscribers -= 1
+
+    def stream(self, since=None):
+        """Yield SSE frames for every update published after since
+
+        Streams hold a slot from subscribe() that the caller releases with
+        unsubscribe() once the connection closes.
+        """
+        while True:
+            snapshot = self.snapshot
+            if since != snapshot.seq:
+                frame = self._event_since(snapshot, since)
+                since = snapshot.seq
+            else:
+                with self.lock:
+                    if self.snapshot is not snapshot or self.updated.wait(self.keepalive):
+                        continue
+                frame = b': keepalive\n\n'
+            yield frame
+
+    def _can_delta(self, snapshot, since):
+        """True if every step after since is still retained"""
+        return since is not None and (since == snapshot.seq or since + 1 in snapshot.steps)
+
+    def _event_since(self, snapshot, since):
+        if not self._can_delta(snapshot, since):
+            return snapshot.events['full']
+        if since == snapshot.seq - 1:
+            return snapshot.events['delta']
+        return self._event(snapshot.seq, encode_json(self._merge(snapshot, since)))
+
+    _event = staticmethod(event_frame)
+
+    def _account(self):
+        engine = self.engine
+        portfolio_value = sum(
+            quantity * engine.current_prices.get(symbol, 0)
+            for symbol, quantity in engine.portfolio.items()
+        )
+        return {
+            'balance': round(engine.balance, 2),
+            'portfolio': dict(engine.portfolio),
+            'positions': engine.ledger.to_dict(),
+            'portfolio_value': round(portfolio_value, 2),
+            'total_value': round(engine.balance + portfolio_value, 2),
+            'is_running': engine.is_running,
+            'market_hours': self.market_hours,
+            'warming': engine.warming
+        }
+
+    def _full(self):
+        engine = self.engine
+        return {
+            'seq': self.seq,
+            'full': True,
+            **self._account(),
+            'prices': dict(engine.current_prices),
+            'price_history': {symbol: history.to_records() for symbol, history in engine.price_history.items()},
+            'technical_indicators': engine.technical_indicators,
+            'sentiment_data': engine.sentiment_data,
+            'trading_history': engine.trading_history[-self.trade_limit:],
+            'symbols': engine.symbols,
+            'history_capacity': engine.history_capacity
+        }
+
+    def _merge(self, snapshot, since):
+        """Delta from since to snapshot.seq, merged from the retained steps
+
+        Reads only the snapshot, never the live engine.
+        """
+        return merge_steps(snapshot.steps, since, snapshot.seq, self.engine.history_capacity, self.trade_limit)
@@ -0,0 +1,303 @@
+"""Vectorized evaluation of the auto-trading strategy.
+
+The buy and sell rules are evaluated for every symbol at once on NumPy arrays
+(price, RSI, SMA, momentum, sentiment, gain %), following the same priority
+order as the original per-symbol if/elif chains. Orders are then executed in
+one serialized pass, because every fill changes the cash available for the
+next symbol's position size.
+
+Tunable thresholds live in StrategyParams so backtests and parameter sweeps
+can vary them without touching the rules.
+"""
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class StrategyParams:
+    """Tunable thresholds for the buy/sell rules
+
+    Take-profit and stop-loss levels are gain/loss percentages on the
+    average cost of the open position.
+    """
+
+    DEFAULTS = {
+        'base_trade_pct': 0.03,  # Position size as a share of cash
+        'max_position_pct': 0.05,  # Cap per trade as a share of total value
+        'rsi_oversold': 25,
+        'rsi_overbought': 75,
+        'sma_discount': 0.92,  # Buy below this multiple of the SMA
+        'sma_premium': 1.08,  # Sell above this multiple of the SMA
+        'take_profit_small': 10,  # Sell 25%
+        'take_profit_medium': 15,  # Sell 50%
+        'take_profit_large': 20,  # Sell 75%
+        'stop_loss_partial': 5,  # Sell 50%
+        'stop_loss_full': 8  # Sell everything
+    }
+
+    def __init__(self, **overrides):
+        unknown = set(overrides) - set(self.DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown strategy parameters: {', '.join(sorted(unknown))}")
+        for name, default in self.DEFAULTS.items():
+            setattr(self, name, overrides.get(name, default))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.DEFAULTS}
+
+    def __repr__(self):
+        return f"StrategyParams({self.to_dict()})"
+
+
+DEFAULT_PARAMS = StrategyParams()
+
+# Buy rules in priority order: (confidence, reason template)
+BUY_RULES = [
+    (0.9, "Strong RSI oversold ({rsi:.1f})"),
+    (0.7, "Price below SMA with momentum ({price:.2f} vs {sma:.2f})"),
+    (0.8, "Strong reversal pattern ({change:.2%} gain)"),
+    (0.75, "Golden cross above SMA"),
+    (0.8, "Strong positive sentiment ({sentiment:.2f})"),
+    (0.6, "Positive sentiment with technical confirmation ({sentiment:.2f})"),
+]
+
+# Sell rules in priority order: (confidence, reason template)
+SELL_RULES = [
+    (0.9, "Strong RSI overbought ({rsi:.1f})"),
+    (0.8, "Price above SMA with reversal ({price:.2f} vs {sma:.2f})"),
+    (0.95, "Take profit - {take_profit_large:g}%+ gain ({gain_pct:.1f}%)"),
+    (0.85, "Take profit - {take_profit_medium:g}%+ gain ({gain_pct:.1f}%)"),
+    (0.7, "Take profit - {take_profit_small:g}%+ gain ({gain_pct:.1f}%)"),
+    (1.0, "Stop loss - {stop_loss_full:g}%+ loss ({gain_pct:.1f}%)"),
+    (0.8, "Stop loss - {stop_loss_partial:g}%+ loss ({gain_pct:.1f}%)"),
+    (0.75, "Death cross below SMA"),
+    (0.85, "Strong negative sentiment ({sentiment:.2f})"),
+    (0.7, "Negative sentiment with technical confirmation ({sentiment:.2f})"),
+]
+
+SELL_TAKE_PROFIT_LARGE = 2
+SELL_STOP_LOSS_FULL = 5
+
+MIN_HISTORY = 20  # Need more data for reliable signals
+
+
+def sentiment_signals(scores):
+    """Map overall sentiment scores to trading signals (-1 to 1, 0 when neutral)"""
+    scores = np.asarray(scores, dtype=np.float64)
+    return np.where(scores > 0.1, np.minimum(scores, 1.0),
+                    np.where(scores < -0.1, np.maximum(scores, -1.0), 0.0))
+
+
+def build_market_inputs(symbols, current_prices, price_history, technical_indicators, sentiment_data):
+    """Gather the market columns into arrays, skipping symbols without enough data
+
+    These depend only on the shared market state, so one set serves every
+    account trading the same symbols (see with_positions).
+    """
+    included, price, recent, recent_change_pcts, rsi, sma, scores = [], [], [], [], [], [], []
+    for symbol in symbols:
+        history = price_history.get(symbol)
+        indicators = technical_indicators.get(symbol)
+        if history is None or len(history) < MIN_HISTORY or not indicators:
+            continue
+        try:
+            row = (
+                current_prices[symbol],
+                history.tail('price', 3).tolist(),
+                history.tail('change_pct', 5)[:-1].tolist(),
+                indicators['rsi'],
+                indicators['sma_20']
+            )
+        except Exception as e:
+            logger.warning(f"Error in auto-trade for {symbol}: {e}")
+            continue
+        included.append(symbol)
+        price.append(row[0])
+        recent.append(row[1])
+        recent_change_pcts.append(row[2])
+        rsi.append(row[3])
+        sma.append(row[4])
+        scores.append(sentiment_data.get(symbol, {}).get('overall_score', 0.0))
+
+    if not included:
+        return None
+
+    recent = np.array(recent, dtype=np.float64)
+    price = np.array(price, dtype=np.float64)
+    prev_price = recent[:, -2]
+    return {
+        'symbols': included,
+        'price': price,
+        'prev3_price': recent[:, 0],
+        'change': (price - prev_price) / prev_price,
+        'recent_decline': (np.array(recent_change_pcts, dtype=np.float64) < -0.005).all(axis=1),
+        'rsi': np.array(rsi, dtype=np.float64),
+        'sma': np.array(sma, dtype=np.float64),
+        'sentiment': sentiment_signals(scores)
+    }
+
+
+def with_positions(market, portfolio, ledger):
+    """Market inputs plus one account's position columns (held, avg_cost)"""
+    if market is None:
+        return None
+    avg_cost = [ledger.avg_cost(symbol) for symbol in market['symbols']]
+    return dict(
+        market,
+        held=np.array([portfolio.get(symbol, 0) for symbol in market['symbols']], dtype=np.float64),
+        avg_cost=np.array([cost if cost else np.nan for cost in avg_cost], dtype=np.float64)
+    )
+
+
+def build_signal_inputs(symbols, current_prices, price_history, technical_indicators,
+                        sentiment_data, portfolio, ledger):
+    """Gather per-symbol state into arrays, skipping symbols without enough data"""
+    market = build_market_inputs(symbols, current_prices, price_history, technical_indicators, sentiment_data)
+    return with_positions(market, portfolio, ledger)
+
+
+def evaluate_buy_rules(inputs, params=DEFAULT_PARAMS):
+    """Index of the first matching buy rule per symbol (-1 for none) and its confidence
+
+    The original rules also require cash above the trade size; that check
+    depends on fills earlier in the cycle and is applied when executing.
+    """
+    price, sma, rsi = inputs['price'], inputs['sma'], inputs['rsi']
+    change, sentiment = inputs['change'], inputs['sentiment']
+    conditions = [
+        rsi < params.rsi_oversold,
+        (price < sma * params.sma_discount) & (change > 0.01),
+        (change > 0.025) & inputs['recent_decline'],
+        (inputs['prev3_price'] < sma) & (price > sma) & (change > 0.01),
+        sentiment > 0.3,
+        (sentiment > 0.1) & (rsi < 60) & (price < sma * 1.05),
+    ]
+    return _first_match(conditions, BUY_RULES)
+
+
+def evaluate_sell_rules(inputs, held=None, avg_cost=None, params=DEFAULT_PARAMS):
+    """First matching sell rule, confidence, sell fraction and gain % per symbol
+
+    held/avg_cost override the position columns, which lets the executor
+    re-check a symbol right after buying it in the same cycle.
+    """
+    held = inputs['held'] if held is None else held
+    avg_cost = inputs['avg_cost'] if avg_cost is None else avg_cost
+    price, sma, rsi = inputs['price'], inputs['sma'], inputs['rsi']
+    change, sentiment = inputs['change'], inputs['sentiment']
+
+    has_cost = ~np.isnan(avg_cost) & (avg_cost != 0)
+    safe_cost = np.where(has_cost, avg_cost, 1.0)
+    gain_pct = np.where(has_cost, (price - safe_cost) / safe_cost * 100, 0.0)
+
+    conditions = [
+        rsi > params.rsi_overbought,
+        (price > sma * params.sma_premium) & (change < -0.01),
+        gain_pct > params.take_profit_large,
+        gain_pct > params.take_profit_medium,
+        gain_pct > params.take_profit_small,
+        gain_pct < -params.stop_loss_full,
+        gain_pct < -params.stop_loss_partial,
+        (inputs['prev3_price'] > sma) & (price < sma) & (change < -0.01),
+        sentiment < -0.3,
+        (sentiment < -0.1) & (rsi > 40) & (price > sma * 0.95),
+    ]
+    rule, confidence = _first_match(conditions, SELL_RULES)
+    rule = np.where(held > 0, rule, -1)
+    confidence = np.where(held > 0, confidence, 0.0)
+
+    sell_pct = np.where(rule == SELL_STOP_LOSS_FULL, 1.0,
+                        np.where(rule == SELL_TAKE_PROFIT_LARGE, 0.75,
+                                 np.where(confidence > 0.8, 0.5, 0.25)))
+    return rule, confidence, sell_pct, gain_pct
+
+
+def _first_match(conditions, rules):
+    matches = np.array(conditions)
+    rule = np.where(matches.any(axis=0), matches.argmax(axis=0), -1)
+    confidence = np.array([c for c, _ in rules])[rule]
+    return rule, np.where(rule >= 0, confidence, 0.0)
+
+
+def evaluate_signals(inputs, params=DEFAULT_PARAMS):
+    """Evaluate buy and sell rules for all symbols in one batched pass"""
+    buy_rule, buy_confidence = evaluate_buy_rules(inputs, params)
+    sell_rule, sell_confidence, sell_pct, gain_pct = evaluate_sell_rules(inputs, params=params)
+    return {
+        'buy_rule': buy_rule,
+        'buy_confidence': buy_confidence,
+        'sell_rule': sell_rule,
+        'sell_confidence': sell_confidence,
+        'sell_pct': sell_pct,
+        'gain_pct': gain_pct
+    }
+
+
+def _reason(rules, rule, inputs, i, params, gain_pct=0.0):
+    return rules[rule][1].format(
+        **params.to_dict(),
+        rsi=inputs['rsi'][i],
+        price=inputs['price'][i],
+        sma=inputs['sma'][i],
+        change=inputs['change'][i],
+        sentiment=inputs['sentiment'][i],
+        gain_pct=gain_pct
+    )
+
+
+def execute_signals(account, inputs, signals, params=DEFAULT_PARAMS, log=logger.info):
+    """Place the orders for evaluated signals in symbol order
+
+    account provides balance, portfolio, ledger, current_prices, symbols,
+    buy_stock and sell_stock (TradingBot does).
+    """
+    portfolio_value = sum(account.portfolio.get(s, 0) * account.current_prices.get(s, 0)
+                          for s in account.symbols)
+    buy_rule, sell_rule = signals['buy_rule'], signals['sell_rule']
+    active = np.flatnonzero((buy_rule >= 0) | (sell_rule >= 0))
+
+    for i in active:
+        symbol = inputs['symbols'][i]
+        try:
+            price = float(inputs['price'][i])
+            bought = False
+
+            if buy_rule[i] >= 0:
+                # Dynamic position sizing based on confidence and portfolio size
+                total_value = account.balance + portfolio_value
+                max_trade_amount = min(account.balance * params.base_trade_pct,
+                                       total_value * params.max_position_pct)
+                if account.balance > max_trade_amount:
+                    adjusted_amount = max_trade_amount * signals['buy_confidence'][i]
+                    quantity = max(1, int(adjusted_amount / price))
+                    success, message = account.buy_stock(symbol, quantity)
+                    if success:
+                        portfolio_value += price * quantity
+                        bought = True
+                        log(f"🤖 AUTO BUY: {symbol} - {_reason(BUY_RULES, buy_rule[i], inputs, i, params)}")
+                        log(f"   Bought {quantity} shares at ${price:.2f}")
+
+            rule, sell_pct, gain_pct = sell_rule[i], signals['sell_pct'][i], signals['gain_pct'][i]
+            if bought:
+                # The position changed, re-check this symbol's sell rules
+                row = {key: value[i:i + 1] for key, value in inputs.items() if key != 'symbols'}
+                avg_cost = account.ledger.avg_cost(symbol)
+                rule, _, sell_pct, gain_pct = evaluate_sell_rules(
+                    row,
+                    held=np.array([account.portfolio.get(symbol, 0)], dtype=np.float64),
+                    avg_cost=np.array([avg_cost if avg_cost else np.nan]),
+                    params=params
+                )
+                rule, sell_pct, gain_pct = rule[0], sell_pct[0], gain_pct[0]
+
+            if rule >= 0:
+                quantity = max(1, int(account.portfolio[symbol] * sell_pct))
+                success, message = account.sell_stock(symbol, quantity)
+                if success:
+                    portfolio_value -= price * quantity
+                    log(f"🤖 AUTO SELL: {symbol} - {_reason(SELL_RULES, rule, inputs, i, params, gain_pct)}")
+                    log(f"   Sold {quantity} shares at ${price:.2f}")
+        except Exception as e:
+            logger.error(f"Error in auto-trade for {symbol}: {e}")
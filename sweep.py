@@ -0,0 +1,146 @@
+"""Parameter sweeps for the trading strategy.
+
+Runs many backtests over the same local bars with different StrategyParams,
+spread across a process pool, and prints the results ranked by a metric:
+
+    python sweep.py data/ --grid rsi_oversold=20,25,30 take_profit_large=15,20,25
+    python sweep.py data/ --random 50 --grid rsi_oversold=15:35 sma_discount=0.88:0.96
+
+The aligned price arrays are written once to .npy files and memory-mapped by
+every worker, so they are shared through the page cache instead of being
+pickled to each process.
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest import Backtester, align_bars, load_bars
+from strategy import StrategyParams
+
+# Market data attached by each worker process
+_worker_data = {}
+
+
+def parse_grid(specs):
+    """Parse name=v1,v2,... (choices) or name=lo:hi (uniform range) specs"""
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        if name not in StrategyParams.DEFAULTS:
+            raise ValueError(f"Unknown strategy parameter: {name}")
+        if ':' in values:
+            low, high = values.split(':')
+            grid[name] = (float(low), float(high))
+        else:
+            grid[name] = [float(value) for value in values.split(',')]
+    return grid
+
+
+def grid_search(grid):
+    """Every combination of the listed choices"""
+    if any(isinstance(values, tuple) for values in grid.values()):
+        raise ValueError("Ranges (lo:hi) are only supported with --random")
+    names = list(grid)
+    return [dict(zip(names, combo)) for combo in itertools.product(*grid.values())]
+
+
+def random_search(grid, count, seed=None):
+    """count parameter sets sampled from choices or uniform ranges"""
+    rng = random.Random(seed)
+    return [
+        {
+            name: rng.uniform(*values) if isinstance(values, tuple) else rng.choice(values)
+            for name, values in grid.items()
+        }
+        for _ in range(count)
+    ]
+
+
+def _attach(timestamps_path, closes_path, symbols, backtest_kwargs):
+    """Process pool initializer: memory-map the shared price arrays"""
+    _worker_data['timestamps'] = np.load(timestamps_path, mmap_mode='r')
+    _worker_data['closes'] = np.load(closes_path, mmap_mode='r')
+    _worker_data['symbols'] = symbols
+    _worker_data['kwargs'] = backtest_kwargs
+
+
+def _run_one(overrides):
+    backtester = Backtester(
+        _worker_data['timestamps'],
+        _worker_data['symbols'],
+        _worker_data['closes'],
+        params=StrategyParams(**overrides),
+        **_worker_data['kwargs']
+    )
+    stats = backtester.run()['stats']
+    return {**overrides, **stats}
+
+
+def run_sweep(timestamps, symbols, closes, param_sets, workers=None, rank_by='sharpe', **backtest_kwargs):
+    """Backtest every parameter set in parallel and return a ranked DataFrame"""
+    with tempfile.TemporaryDirectory(prefix='sweep-') as tmpdir:
+        timestamps_path = os.path.join(tmpdir, 'timestamps.npy')
+        closes_path = os.path.join(tmpdir, 'closes.npy')
+        np.save(timestamps_path, np.ascontiguousarray(timestamps))
+        np.save(closes_path, np.ascontiguousarray(closes))
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_attach,
+            initargs=(timestamps_path, closes_path, symbols, backtest_kwargs)
+        ) as pool:
+            results = list(pool.map(_run_one, param_sets))
+
+    table = pd.DataFrame(results)
+    if len(table):
+        table = table.sort_values(rank_by, ascending=False).reset_index(drop=True)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep strategy parameters over local bars')
+    parser.add_argument('data_dir', help='directory of SYMBOL.csv / SYMBOL.parquet bar files')
+    parser.add_argument('--symbols', nargs='+', help='symbols to replay (default: all files)')
+    parser.add_argument('--interval', help='read data_dir as a bar store and replay bars of this interval')
+    parser.add_argument('--grid', nargs='+', default=[],
+                        help='name=v1,v2,... or name=lo:hi (with --random)')
+    parser.add_argument('--random', type=int, help='sample this many parameter sets instead of the full grid')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--rank-by', default='sharpe')
+    parser.add_argument('--balance', type=float, default=10000.0)
+    parser.add_argument('--top', type=int, default=20, help='rows to print')
+    parser.add_argument('--output', help='write the full ranked table to this CSV file')
+    args = parser.parse_args()
+
+    grid = parse_grid(args.grid)
+    param_sets = random_search(grid, args.random, args.seed) if args.random else grid_search(grid)
+    timestamps, symbols, closes = align_bars(load_bars(args.data_dir, args.symbols, args.interval))
+
+    print(f"🔍 Sweeping {len(param_sets)} parameter sets over {len(symbols)} symbols "
+          f"x {len(timestamps)} bars on {args.workers} workers")
+    start = time.perf_counter()
+    table = run_sweep(
+        timestamps, symbols, closes, param_sets,
+        workers=args.workers,
+        rank_by=args.rank_by,
+        initial_balance=args.balance
+    )
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ {len(param_sets)} backtests in {elapsed:.1f}s ({len(param_sets) / elapsed:.2f}/s)")
+
+    columns = list(grid) + ['total_return_pct', 'max_drawdown_pct', 'sharpe', 'trades']
+    print(table[columns].head(args.top).to_string())
+    if args.output:
+        table.to_csv(args.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
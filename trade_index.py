@@ -0,0 +1,134 @@
+"""Per-symbol, time-sorted index of trades for chart markers.
+
+Each symbol keeps a growable float64 array of trade times (epoch seconds)
+and a parallel list of marker records built once when the trade is made.
+Trades arrive in time order, so appends keep the array sorted and a chart
+aligns every trade to its bar with one np.searchsorted call instead of
+parsing and comparing time strings per trade and bar.
+
+Arrays are only ever appended to in place or replaced, so view() can hand
+the writer's current arrays to a chart worker without copying.
+"""
+import time
+from datetime import datetime
+
+import numpy as np
+
+
+def trade_timestamp(trade):
+    """Epoch seconds of a trade; older records only carry the 'time' string"""
+    if 'timestamp' in trade:
+        return trade['timestamp']
+    return time.mktime(datetime.strptime(trade['time'], '%Y-%m-%d %H:%M:%S').timetuple())
+
+
+def marker_record(trade):
+    """The fields a chart marker shows for a trade"""
+    return {
+        'action': str(trade['action']),
+        'quantity': int(trade['quantity']),
+        'price': float(trade['price']),
+        'time': str(trade['time']),
+        'balance_after': float(trade['balance_after'])
+    }
+
+
+class TradeView:
+    """Read-only slice of one symbol's index: times[:count] and records[:count]"""
+
+    __slots__ = ('times', 'records', 'count')
+
+    def __init__(self, times, records, count):
+        self.times = times
+        self.records = records
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+
+EMPTY_VIEW = TradeView(np.empty(0), [], 0)
+
+
+class TradeIndex:
+    """Trades per symbol, sorted by time, at most limit per symbol (None keeps all)"""
+
+    def __init__(self, limit=None, capacity=64):
+        self.limit = limit
+        self.capacity = capacity
+        self.times = {}  # symbol -> float64 array, filled up to counts[symbol]
+        self.records = {}  # symbol -> marker records, same order
+        self.counts = {}
+
+    def add(self, trade):
+        """Index one trade"""
+        symbol = trade['symbol']
+        timestamp = trade_timestamp(trade)
+        times = self.times.get(symbol)
+        count = self.counts.get(symbol, 0)
+        if times is None:
+            times = self.times[symbol] = np.empty(self.capacity)
+            self.records[symbol] = []
+        records = self.records[symbol]
+
+        if count and timestamp < times[count - 1]:
+            # Out of order (e.g. a clock step back): insert in place of appending
+            position = int(np.searchsorted(times[:count], timestamp, side='right'))
+            times = np.insert(times[:count], position, timestamp)
+            records = records[:position] + [marker_record(trade)] + records[position:]
+            self._replace(symbol, times, records)
+            return
+
+        if count == len(times):
+            grown = np.empty(2 * len(times))
+            grown[:count] = times
+            times = self.times[symbol] = grown
+        times[count] = timestamp
+        records.append(marker_record(trade))
+        self.counts[symbol] = count + 1
+        if self.limit is not None and count + 1 > 2 * self.limit:
+            # Trim in bulk so dropping old trades stays amortized O(1) per trade
+            self._replace(symbol, times[count + 1 - self.limit:count + 1], records[-self.limit:])
+
+    def _replace(self, symbol, times, records):
+        """Swap in new arrays (never edit ones a TradeView may be reading)"""
+        if self.limit is not None and len(records) > self.limit:
+            times, records = times[-self.limit:], records[-self.limit:]
+        capacity = max(self.capacity, 2 * len(records))
+        self.times[symbol] = np.empty(capacity)
+        self.times[symbol][:len(records)] = times
+        self.records[symbol] = list(records)
+        self.counts[symbol] = len(records)
+
+    def rebuild(self, trades):
+        """Index trades from scratch, e.g. the history restored from a journal"""
+        self.times, self.records, self.counts = {}, {}, {}
+        for trade in trades:
+            self.add(trade)
+
+    def view(self, symbol):
+        """The symbol's trades so far, without copying"""
+        count = self.counts.get(symbol, 0)
+        if not count:
+            return EMPTY_VIEW
+        return TradeView(self.times[symbol], self.records[symbol], count)
+
+    @staticmethod
+    def align(view, bar_times):
+        """Markers for the trades inside a chart's bars
+
+        bar_times are the bars' start times (epoch seconds, ascending). Each
+        trade goes to the bar it falls in; trades before the first bar or
+        more than one bar width after the last one are not on the chart.
+        Returns (marker records, bar index per record).
+        """
+        bar_times = np.asarray(bar_times, dtype=np.float64)
+        if not view.count or not len(bar_times):
+            return [], []
+        width = bar_times[-1] - bar_times[-2] if len(bar_times) > 1 else 300.0
+        times = view.times[:view.count]
+        start, end = np.searchsorted(times, (bar_times[0], bar_times[-1] + width), side='left')
+        if start == end:
+            return [], []
+        indexes = np.searchsorted(bar_times, times[start:end], side='right') - 1
+        return view.records[start:end], indexes.tolist()
@@ -1,283 +1,283 @@
-from flask import Flask, render_template, jsonify, request
-import yfinance as yf
-import pandas as pd
+from flask import Flask, Response, render_template, jsonify, request
 import numpy as np
-import plotly.graph_objs as go
-import plotly.utils
-import json
+import logging
+import sys
 import time
 import threading
-from datetime import datetime, timedelta
-import random
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as CommandTimeout
+from datetime import datetime
 import pytz
-import requests
-import re
-from textblob import TextBlob
-import urllib.parse
+import os
+from accounts import AccountBook
+from barstore import Bars, BarStore
+from commands import CommandQueue
+from market_data import FakeHistory, MarketDataCache, create_quote_provider, fetch_history, interval_ttl
+from engine import TradingEngine
+from journal import TradeJournal
+from metrics import (CYCLE_OVERRUNS, CYCLE_SECONDS, STAGE_ERRORS, STAGE_SECONDS, UPSTREAM_ERRORS,
+                     UPSTREAM_REQUESTS, counted, registry as metrics)
+from payloads import FastJSONProvider, PayloadStore
+from sentiment import SentimentService, TextScorer
+from shared_state import EngineServer, StateWriter, state_paths
+from status import StatusTracker
+from sweep import parse_grid
+from trade_index import TradeIndex
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)  # jsonify() encodes NumPy values directly
+
+# Leveled logging: per-cycle and per-request detail is DEBUG, off unless LOG_LEVEL=DEBUG
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(), format='%(message)s', stream=sys.stdout)
+logger = logging.getLogger('trading_bot')
+# Werkzeug logs every request at INFO; that stdout write sits on the request path
+logging.getLogger('werkzeug').setLevel(logging.INFO if logger.isEnabledFor(logging.DEBUG) else logging.WARNING)
 
 # Sentiment Analysis Configuration
 SENTIMENT_CONFIG = {
-    'reddit_api': {
-        'base_url': 'https://www.reddit.com/r/wallstreetbets/search.json',
-        'user_agent': 'TradingBot/1.0'
-    },
-    'news_api': {
-        'base_url': 'https://newsapi.org/v2/everything',
-        'api_key': 'demo'  # Free tier key
+    'sources': {
+        'reddit': {
+            'base_url': 'https://www.reddit.com/r/wallstreetbets/search.json',
+            'user_agent': 'TradingBot/1.0',
+            'weight': 0.4,
+            'timeout': 5,  # Seconds per request
+            'rate_limit': (30, 60)  # (requests, per seconds)
+        },
+        'news': {
+            # One combined business feed per refresh, routed to symbols locally (see news.py)
+            'base_url': 'https://newsapi.org/v2/top-headlines',
+            'params': {'category': 'business', 'country': 'us', 'pageSize': 100},
+            'api_key': 'demo',  # Free tier key
+            'weight': 0.4,
+            'timeout': 5,
+            'rate_limit': (100, 86400),  # Free tier daily quota
+            'feed_ttl': 900
+        },
+        'social': {
+            'weight': 0.2,
+            'timeout': 1,
+            'rate_limit': (600, 60)  # Simulated, effectively unlimited
+        }
     },
     'twitter_api': {
         'base_url': 'https://api.twitter.com/2/tweets/search/recent',
         'bearer_token': None  # Would need Twitter API access
-    }
+    },
+    'cache_ttl': 900,  # Seconds before a symbol's sentiment is refreshed
+    'max_workers': 8,  # Pooled connections / concurrent source fetches
+    'score_cache_entries': 50000,  # Memoized text polarities
+    'score_cache_path': os.environ.get('SENTIMENT_SCORE_CACHE'),  # Optional JSON file to persist them
+    'scoring_processes': int(os.environ.get('SENTIMENT_PROCESSES', 0))  # 0 scores in process
 }
 
-def get_sentiment_score(text):
-    """Calculate sentiment score using TextBlob (-1 to 1 scale)"""
-    try:
-        blob = TextBlob(text)
-        return blob.sentiment.polarity
-    except:
-        return 0.0
-
-def get_reddit_sentiment(symbol, limit=10):
-    """Get sentiment from Reddit r/wallstreetbets posts"""
-    try:
-        headers = {'User-Agent': SENTIMENT_CONFIG['reddit_api']['user_agent']}
-        params = {
-            'q': symbol,
-            'restrict_sr': 'on',
-            'sort': 'hot',
-            't': 'day',
-            'limit': limit
-        }
-        
-        response = requests.get(
-            SENTIMENT_CONFIG['reddit_api']['base_url'],
-            headers=headers,
-            params=params,
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            posts = data.get('data', {}).get('children', [])
-            
-            sentiments = []
-            for post in posts:
-                post_data = post.get('data', {})
-                title = post_data.get('title', '')
-                selftext = post_data.get('selftext', '')
-                full_text = f"{title} {selftext}"
-                
-                if symbol.lower() in full_text.lower():
-                    sentiment = get_sentiment_score(full_text)
-                    sentiments.append(sentiment)
-            
-            if sentiments:
-                return {
-                    'score': np.mean(sentiments),
-                    'count': len(sentiments),
-                    'source': 'reddit'
-                }
-    except Exception as e:
-        print(f"Reddit sentiment error for {symbol}: {e}")
-    
-    return {'score': 0.0, 'count': 0, 'source': 'reddit'}
-
-def get_news_sentiment(symbol, limit=10):
-    """Get sentiment from news articles"""
-    try:
-        # Using NewsAPI free tier (limited requests)
-        params = {
-            'q': symbol,
-            'language': 'en',
-            'sortBy': 'publishedAt',
-            'pageSize': limit,
-            'apiKey': SENTIMENT_CONFIG['news_api']['api_key']
-        }
-        
-        response = requests.get(
-            SENTIMENT_CONFIG['news_api']['base_url'],
-            params=params,
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            articles = data.get('articles', [])
-            
-            sentiments = []
-            for article in articles:
-                title = article.get('title', '')
-                description = article.get('description', '')
-                content = article.get('content', '')
-                full_text = f"{title} {description} {content}"
-                
-                if symbol.lower() in full_text.lower():
-                    sentiment = get_sentiment_score(full_text)
-                    sentiments.append(sentiment)
-            
-            if sentiments:
-                return {
-                    'score': np.mean(sentiments),
-                    'count': len(sentiments),
-                    'source': 'news'
-                }
-    except Exception as e:
-        print(f"News sentiment error for {symbol}: {e}")
-    
-    return {'score': 0.0, 'count': 0, 'source': 'news'}
+# Market Data Configuration
+MARKET_DATA_CONFIG = {
+    'quote_provider': os.environ.get('QUOTE_PROVIDER', 'yahoo'),  # 'yahoo' or 'fake' for offline runs
+    'fake_latency': float(os.environ.get('FAKE_QUOTE_LATENCY', 0)),  # Simulated seconds per fake quote request
+    'chunk_size': 50,  # Symbols per bulk quote request
+    'history_capacity': 100,  # Price points kept per symbol
+    'cache_max_entries': 256,  # (symbol, period, interval) downloads kept in memory
+    'cache_stale_factor': 10,  # Serve expired bars for up to this many TTLs while refreshing
+    'bar_store_path': os.environ.get('BAR_STORE', 'bars')  # On-disk bar store, '' to download every time
+}
 
-def get_social_sentiment(symbol):
-    """Get sentiment from social media (simulated for demo)"""
-    try:
-        # Simulate social media sentiment based on stock performance
-        # In a real implementation, you'd use Twitter API, StockTwits, etc.
-        current_price = 100.0  # Default
-        if hasattr(app, 'trading_bot'):
-            current_price = app.trading_bot.current_prices.get(symbol, 100.0)
-        
-        # Simulate sentiment based on price movement
-        price_change = random.uniform(-0.1, 0.1)  # Simulate price change
-        sentiment = np.tanh(price_change * 10)  # Convert to sentiment
-        
-        return {
-            'score': sentiment,
-            'count': random.randint(5, 50),
-            'source': 'social'
-        }
-    except Exception as e:
-        print(f"Social sentiment error for {symbol}: {e}")
-    
-    return {'score': 0.0, 'count': 0, 'source': 'social'}
+# Trading Configuration
+TRADING_CONFIG = {
+    'initial_balance': 10000.0,
+    'commission_per_trade': 0.0,  # Flat fee charged on every fill
+    'journal_path': os.environ.get('TRADE_JOURNAL', 'trades.db'),  # SQLite trade journal, '' to disable
+    'journal_snapshot_every': 1000,  # Trades between account snapshots in the journal
+    'history_limit': 1000,  # Recent trades kept in memory; older ones stay in the journal
+    'trade_index_limit': 10000,  # Trades per symbol kept for chart markers
+    # Paper accounts trading on the same feed, each with its own balance and strategy parameters
+    'paper_accounts': int(os.environ.get('PAPER_ACCOUNTS', 0)),
+    'paper_account_balance': 10000.0,
+    'paper_account_grid': os.environ.get('PAPER_ACCOUNT_GRID', '').split(),  # sweep.py specs, e.g. rsi_oversold=20:30
+    'paper_account_seed': 0  # Seed for sampling parameters from the grid
+}
 
-def get_comprehensive_sentiment(symbol):
-    """Get comprehensive sentiment from multiple sources"""
-    try:
-        # Get sentiment from different sources
-        reddit_sentiment = get_reddit_sentiment(symbol)
-        news_sentiment = get_news_sentiment(symbol)
-        social_sentiment = get_social_sentiment(symbol)
-        
-        # Combine sentiments with weights
-        sentiments = [
-            (reddit_sentiment['score'], reddit_sentiment['count'], 0.4),  # Reddit weight
-            (news_sentiment['score'], news_sentiment['count'], 0.4),      # News weight
-            (social_sentiment['score'], social_sentiment['count'], 0.2)   # Social weight
-        ]
-        
-        # Calculate weighted average
-        total_weight = 0
-        weighted_sum = 0
-        
-        for score, count, weight in sentiments:
-            if count > 0:  # Only include sources with data
-                weighted_sum += score * weight
-                total_weight += weight
-        
-        if total_weight > 0:
-            final_sentiment = weighted_sum / total_weight
-        else:
-            final_sentiment = 0.0
-        
-        return {
-            'overall_score': final_sentiment,
-            'reddit': reddit_sentiment,
-            'news': news_sentiment,
-            'social': social_sentiment,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-    except Exception as e:
-        print(f"Comprehensive sentiment error for {symbol}: {e}")
-        return {
-            'overall_score': 0.0,
-            'reddit': {'score': 0.0, 'count': 0, 'source': 'reddit'},
-            'news': {'score': 0.0, 'count': 0, 'source': 'news'},
-            'social': {'score': 0.0, 'count': 0, 'source': 'social'},
-            'timestamp': datetime.now().isoformat()
-        }
+# Trading Cycle Configuration
+PIPELINE_CONFIG = {
+    'max_workers': 8,  # Bounded pool for per-symbol quote/indicator/sentiment tasks
+    'task_timeout': 4.0,  # Seconds a cycle waits on each stage before moving on
+    'cycle_interval': 10,  # Seconds between trading cycles
+    'command_timeout': 10.0,  # Seconds a request waits for the trading loop to run its command
+    'warmup_timeout': 60.0  # Seconds startup waits for quotes and indicator history before trading
+}
 
-def convert_to_json_serializable(obj):
-    """Convert numpy/pandas types to JSON serializable Python types"""
-    if hasattr(obj, 'item'):
-        return obj.item()
-    elif isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, pd.Series):
-        return obj.tolist()
-    elif isinstance(obj, pd.DataFrame):
-        return obj.to_dict('records')
-    elif isinstance(obj, dict):
-        return {k: convert_to_json_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_json_serializable(item) for item in obj]
-    else:
-        return obj
+def default_quote_provider():
+    """Build the quote provider selected in MARKET_DATA_CONFIG"""
+    name = MARKET_DATA_CONFIG['quote_provider']
+    if name == 'yahoo':
+        return create_quote_provider(name)
+    return create_quote_provider(name, latency=MARKET_DATA_CONFIG['fake_latency'])
+
+# Shared by the trading loop and chart requests so they reuse one download
+market_data_cache = MarketDataCache(
+    max_entries=MARKET_DATA_CONFIG['cache_max_entries'],
+    stale_factor=MARKET_DATA_CONFIG['cache_stale_factor']
+)
+
+# Bars from finished sessions are kept on disk; only newer bars are downloaded
+bar_store = BarStore(MARKET_DATA_CONFIG['bar_store_path']) if MARKET_DATA_CONFIG['bar_store_path'] else None
+# Offline (fake quotes) runs chart and warm up from seeded synthetic bars instead of Yahoo
+download_history = counted(
+    'history', fetch_history if MARKET_DATA_CONFIG['quote_provider'] == 'yahoo' else FakeHistory()
+)
+
+sentiment_service = SentimentService(
+    SENTIMENT_CONFIG['sources'],
+    ttl=SENTIMENT_CONFIG['cache_ttl'],
+    max_workers=SENTIMENT_CONFIG['max_workers'],
+    scorer=TextScorer(
+        max_entries=SENTIMENT_CONFIG['score_cache_entries'],
+        cache_path=SENTIMENT_CONFIG['score_cache_path'],
+        processes=SENTIMENT_CONFIG['scoring_processes']
+    )
+)
 
 # Trading bot state
-class TradingBot:
-    def __init__(self):
-        self.balance = 10000.0
-        self.portfolio = {}
-        self.trading_history = []
-        self.is_running = False
-        self.symbols = ['AAPL', 'GOOGL', 'TSLA', 'MSFT', 'AMZN', 'NVDA', 'META', 'NFLX']
-        self.current_prices = {}
-        self.price_history = {}
-        self.technical_indicators = {}
+class TradingBot(TradingEngine):
+    def __init__(self, symbols=None, quote_provider=None, journal_path=None):
+        super().__init__(
+            symbols or ['AAPL', 'GOOGL', 'TSLA', 'MSFT', 'AMZN', 'NVDA', 'META', 'NFLX'],
+            initial_balance=TRADING_CONFIG['initial_balance'],
+            commission_per_trade=TRADING_CONFIG['commission_per_trade'],
+            history_capacity=MARKET_DATA_CONFIG['history_capacity'],
+            history_limit=TRADING_CONFIG['history_limit'],
+            trade_index_limit=TRADING_CONFIG['trade_index_limit'],
+            log=logger.info
+        )
+        self.quote_provider = quote_provider or default_quote_provider()
         self.last_update = {}
-        self.sentiment_data = {}
         self.sentiment_update_times = {}
         
-        # Initialize price data
-        self.initialize_prices()
+        # Worker pool for the concurrent stages of the trading cycle
+        self.executor = ThreadPoolExecutor(
+            max_workers=PIPELINE_CONFIG['max_workers'],
+            thread_name_prefix='cycle-worker'
+        )
+        self.inflight_tasks = {}
+        self.last_cycle_duration = 0.0
+        self.cycle_overruns = 0
+        self.chart_payloads = PayloadStore()  # Serialized /api/chart responses per symbol
+        self.status = StatusTracker(self)  # Sequence-numbered /api/status snapshots
+        
+        # Paper accounts trade on this bot's prices, indicators and sentiment
+        self.accounts = AccountBook(self, log=logger.debug)
+        if TRADING_CONFIG['paper_accounts']:
+            grid = TRADING_CONFIG['paper_account_grid']
+            self.accounts.add_many(
+                TRADING_CONFIG['paper_accounts'],
+                grid=parse_grid(grid) if grid else None,
+                seed=TRADING_CONFIG['paper_account_seed'],
+                initial_balance=TRADING_CONFIG['paper_account_balance'],
+                commission_per_trade=TRADING_CONFIG['commission_per_trade']
+            )
+            logger.info(f"📒 Opened {len(self.accounts)} paper accounts on the shared feed")
+        
+        # All state changes run as commands on the trading loop thread
+        self.commands = CommandQueue(after_batch=self.flush_updates)
+        self.status_dirty = False
+        self.charts_dirty = set()
+        
+        # Pick up the account where the last run left off ('' runs without a journal)
+        journal_path = TRADING_CONFIG['journal_path'] if journal_path is None else journal_path
+        if journal_path:
+            self.restore_from_journal(journal_path)
+        
+        # Prices and indicators load in the background (see warm_up); until then the status says warming
+        self.started_at = time.perf_counter()
+        self.startup_seconds = None
+        self.warming = True
+        self.readiness = {symbol: {'price': None, 'indicators': None} for symbol in self.symbols}
+        self.publish_status()
     
-    def initialize_prices(self):
-        """Initialize current prices and history for all symbols"""
-        for symbol in self.symbols:
-            try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
-                current_price = info.get('regularMarketPrice', 100.0)
-                self.current_prices[symbol] = current_price
-                
-                # Initialize with some historical data for immediate chart display
-                self.price_history[symbol] = []
-                for i in range(10):
-                    # Create some initial data points for chart display
-                    time_offset = datetime.now() - timedelta(minutes=(10-i)*3)
-                    self.price_history[symbol].append({
-                        'time': time_offset.strftime('%H:%M:%S'),
-                        'price': current_price * (1 + random.uniform(-0.02, 0.02)),
-                        'change': 0,
-                        'change_pct': random.uniform(-2, 2)
-                    })
-                
-                self.last_update[symbol] = datetime.now()
-                self.technical_indicators[symbol] = {
-                    'sma_20': current_price,
-                    'rsi': 50,
-                    'volume': 1000000
-                }
-            except Exception as e:
-                print(f"Error initializing {symbol}: {e}")
-                self.current_prices[symbol] = 100.0
-                self.price_history[symbol] = []
-                self.last_update[symbol] = datetime.now()
-        
-        # Make some initial trades to get started
-        self.make_initial_trades()
+    def restore_from_journal(self, path):
+        """Attach the trade journal at path and rebuild the account from it"""
+        start = time.perf_counter()
+        journal = TradeJournal(path, snapshot_every=TRADING_CONFIG['journal_snapshot_every'])
+        restored = self.attach_journal(journal)
+        if restored:
+            logger.info(f"📒 Restored {restored} trades from {path} in {(time.perf_counter() - start) * 1000:.1f}ms. "
+                  f"Balance: ${self.balance:.2f}, Portfolio: {self.portfolio}")
     
+    def warm_up(self):
+        """Price every symbol and warm up its indicators, in parallel
+
+        Runs on the trading loop thread while the web server is already up:
+        until it finishes /api/status reports warming and /api/ready shows
+        per-symbol progress. Quote chunks and indicator downloads run on the
+        worker pool, and a symbol's indicators start loading as soon as its
+        quote arrives.
+        """
+        try:
+            for start, chunk in self.quote_chunks():
+                future = self.executor.submit(self.fetch_quotes, chunk)
+                future.add_done_callback(lambda future, chunk=chunk: self.commands.submit(
+                    self.seed_prices, chunk, future.result() if future.exception() is None else {}
+                ))
+            self.commands.run_until(time.monotonic() + PIPELINE_CONFIG['warmup_timeout'], self.warm_up_done)
+            
+            # Make some initial trades to get started (a restored account already has its own)
+            if self.trade_count == 0:
+                self.make_initial_trades()
+                self.commit_journal()
+        finally:
+            self.warming = False
+            self.startup_seconds = time.perf_counter() - self.started_at
+            warmed = sum(1 for state in self.readiness.values() if state['indicators'] is not None)
+            logger.info(f"🚀 Warm-up finished in {self.startup_seconds:.2f}s: "
+                  f"{warmed}/{len(self.symbols)} symbols ready")
+            self.publish_status()
+            self.refresh_chart_payloads()
+
+    def warm_up_done(self):
+        """True once every symbol is priced and has its indicators loaded (or failed to)"""
+        return all(
+            state['price'] is False or state['indicators'] is not None
+            for state in self.readiness.values()
+        )
+
+    def seed_prices(self, chunk, quotes):
+        """Set the first price of each symbol in a chunk and start its indicator warm-up"""
+        now = datetime.now()
+        for symbol in chunk:
+            price = quotes.get(symbol)
+            self.price_history[symbol] = self.new_price_history()
+            self.last_update[symbol] = now
+            if price is None:
+                logger.warning(f"Error initializing {symbol}: no quote available")
+                self.current_prices[symbol] = 100.0
+                self.readiness[symbol] = {'price': False, 'indicators': None}
+                continue
+            
+            self.current_prices[symbol] = price
+            self.price_history[symbol].append(now.timestamp(), price, 0, 0)
+            self.technical_indicators[symbol] = {
+                'sma_20': price,
+                'rsi': 50,
+                'volume': 1000000
+            }
+            self.readiness[symbol] = {'price': True, 'indicators': None}
+            self.submit_task(('indicators', symbol), self.refresh_indicators, symbol)
+        self.status_dirty = True
+
+    def readiness_report(self):
+        """Warm-up progress per symbol for /api/ready"""
+        symbols = dict(self.readiness)
+        return {
+            'ready': not self.warming,
+            'elapsed': round(time.perf_counter() - self.started_at, 3),
+            'startup_seconds': self.startup_seconds,
+            'priced': sum(1 for state in symbols.values() if state['price']),
+            'warmed': sum(1 for state in symbols.values() if state['indicators'] is not None),
+            'total': len(symbols),
+            'symbols': symbols
+        }
+
     def make_initial_trades(self):
         """Make some initial trades to demonstrate the bot"""
-        print("🤖 Making initial trades to get started...")
+        logger.info("🤖 Making initial trades to get started...")
         
         # Buy some AAPL and GOOGL to start
         if self.balance > 2000:
@@ -288,7 +288,7 @@ class TradingBot:
                 if quantity > 0:
                     success, message = self.buy_stock('AAPL', quantity)
                     if success:
-                        print(f"🤖 INITIAL BUY: AAPL - {quantity} shares at ${aapl_price:.2f}")
+                        logger.info(f"🤖 INITIAL BUY: AAPL - {quantity} shares at ${aapl_price:.2f}")
             
             # Buy GOOGL
             googl_price = self.current_prices.get('GOOGL', 0)
@@ -297,31 +297,69 @@ class TradingBot:
                 if quantity > 0:
                     success, message = self.buy_stock('GOOGL', quantity)
                     if success:
-                        print(f"🤖 INITIAL BUY: GOOGL - {quantity} shares at ${googl_price:.2f}")
+                        logger.info(f"🤖 INITIAL BUY: GOOGL - {quantity} shares at ${googl_price:.2f}")
         
-        print(f"💰 Starting balance: ${self.balance:.2f}")
-        print(f"📈 Portfolio: {self.portfolio}")
+        logger.info(f"💰 Starting balance: ${self.balance:.2f}")
+        logger.info(f"📈 Portfolio: {self.portfolio}")
+
+    def quote_chunks(self):
+        """(start, symbols) for each bulk quote request covering the watchlist"""
+        chunk_size = MARKET_DATA_CONFIG['chunk_size']
+        for start in range(0, len(self.symbols), chunk_size):
+            yield start, self.symbols[start:start + chunk_size]
+
+    def fetch_quotes(self, symbols):
+        """One bulk quote request, timed and counted in the metrics"""
+        UPSTREAM_REQUESTS.inc('quotes')
+        with STAGE_SECONDS.time('quote_fetch', errors=STAGE_ERRORS):
+            try:
+                return self.quote_provider.get_quotes(symbols)
+            except Exception:
+                UPSTREAM_ERRORS.inc('quotes')
+                raise
 
     def get_real_price(self, symbol):
-        """Get real-time price from Yahoo Finance"""
+        """Get real-time price for a single symbol from the quote provider"""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            return info.get('regularMarketPrice', self.current_prices.get(symbol, 100.0))
+            quotes = self.fetch_quotes([symbol])
+            return quotes.get(symbol, self.current_prices.get(symbol, 100.0))
         except Exception as e:
-            print(f"Error getting price for {symbol}: {e}")
+            logger.error(f"Error getting price for {symbol}: {e}")
             return self.current_prices.get(symbol, 100.0)
 
-    def get_historical_data(self, symbol, period='1d', interval='5m'):
-        """Get historical data for technical analysis including pre/post market"""
+    def get_bars(self, symbol, period='1d', interval='5m'):
+        """Get historical bars for technical analysis including pre/post market
+
+        With the bar store, only bars newer than the last stored one are
+        downloaded and reads are memory-mapped. Results are also cached per
+        (symbol, period, interval) with a TTL of half a bar; the returned
+        arrays are shared, so treat them as read-only.
+        """
         try:
-            ticker = yf.Ticker(symbol)
-            # Get extended hours data (pre-market and after-hours)
-            hist = ticker.history(period=period, interval=interval, prepost=True)
-            return hist
+            return market_data_cache.get(
+                (symbol, period, interval),
+                lambda: self.load_bars(symbol, period, interval),
+                interval_ttl(interval)
+            )
         except Exception as e:
-            print(f"Error getting historical data for {symbol}: {e}")
-            return pd.DataFrame()
+            logger.error(f"Error getting historical data for {symbol}: {e}")
+            return Bars.from_frame(None)
+
+    def load_bars(self, symbol, period, interval):
+        """Sync the bar store for a symbol and read a period from it"""
+        with STAGE_SECONDS.time('history_fetch', errors=STAGE_ERRORS):
+            if bar_store is None:
+                return Bars.from_frame(download_history(symbol, period, interval))
+            try:
+                bar_store.sync(symbol, interval, download_history)
+            except Exception as e:
+                STAGE_ERRORS.inc('history_fetch')
+                logger.warning(f"Error syncing {interval} bars for {symbol}, using stored bars: {e}")
+            return bar_store.read_period(symbol, interval, period)
+
+    def get_historical_data(self, symbol, period='1d', interval='5m'):
+        """get_bars() as a yfinance-style DataFrame"""
+        return self.get_bars(symbol, period, interval).to_frame()
 
     def is_market_hours(self):
         """Check if we're in regular market hours (9:30 AM - 4:00 PM EDT)"""
@@ -337,47 +375,46 @@ class TradingBot:
         market_end = now.replace(hour=16, minute=0, second=0, microsecond=0)
         
         is_open = market_start <= now <= market_end
-        print(f"DEBUG: Market hours check - Current time (EDT): {now.strftime('%Y-%m-%d %H:%M:%S %Z')}")
-        print(f"DEBUG: Market hours check - Market open: {is_open}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Market hours check - Current time (EDT): {now.strftime('%Y-%m-%d %H:%M:%S %Z')}, open: {is_open}")
         return is_open
 
 
 
-    def calculate_technical_indicators(self, symbol):
-        """Calculate technical indicators"""
+    def calculate_technical_indicators(self, symbol, bars):
+        """Warm up streaming indicators from recent 5-minute bars
+        
+        Later ticks update the indicators incrementally in apply_quotes, so
+        history is only downloaded on first use (or until it is available).
+        Runs as a command on the trading loop thread; see refresh_indicators.
+        """
+        start = time.perf_counter()
         try:
-            hist = self.get_historical_data(symbol, period='5d', interval='5m')
-            if hist.empty:
+            if bars.empty:
+                # Start from ticks alone if there is no state yet; retry history later
+                if not self.indicators.is_warm(symbol):
+                    self.indicators.warm_up(symbol, [], [])
                 return
             
-            # Simple Moving Average (20-period)
-            if len(hist) >= 20:
-                self.technical_indicators[symbol]['sma_20'] = float(hist['Close'].tail(20).mean())
-            
-            # RSI (14-period)
-            if len(hist) >= 14:
-                delta = hist['Close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = 100 - (100 / (1 + rs))
-                self.technical_indicators[symbol]['rsi'] = float(rsi.iloc[-1])
-            
-            # Volume
-            if len(hist) > 0:
-                self.technical_indicators[symbol]['volume'] = float(hist['Volume'].iloc[-1])
+            values = self.indicators.warm_up(symbol, bars['Close'], bars.timestamps, bars['Volume'])
+            self.technical_indicators.setdefault(symbol, {}).update(values)
                 
         except Exception as e:
-            print(f"Error calculating indicators for {symbol}: {e}")
-
-    def update_sentiment_data(self, symbol):
-        """Update sentiment data for a symbol"""
-        try:
-            sentiment = get_comprehensive_sentiment(symbol)
+            STAGE_ERRORS.inc('indicator_calc')
+            logger.error(f"Error calculating indicators for {symbol}: {e}")
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, 'indicator_calc')
+            self.last_update[symbol] = datetime.now()
+            self.readiness[symbol] = dict(self.readiness.get(symbol, {'price': None}), indicators=not bars.empty)
+
+    def apply_sentiment(self, symbol, sentiment, publish=False):
+        """Store a sentiment result and stamp the refresh time (a trading loop command)"""
+        if sentiment is not None:
             self.sentiment_data[symbol] = sentiment
-            print(f"📊 Sentiment updated for {symbol}: {sentiment['overall_score']:.3f}")
-        except Exception as e:
-            print(f"Error updating sentiment for {symbol}: {e}")
+            logger.debug(f"📊 Sentiment updated for {symbol}: {sentiment['overall_score']:.3f}")
+        self.sentiment_update_times[symbol] = datetime.now()
+        if publish:
+            self.status_dirty = True
 
     def get_sentiment_signal(self, symbol):
         """Get sentiment-based trading signal (-1 to 1 scale)"""
@@ -401,319 +438,190 @@ class TradingBot:
                 return 0.0  # Neutral
                 
         except Exception as e:
-            print(f"Error getting sentiment signal for {symbol}: {e}")
+            logger.error(f"Error getting sentiment signal for {symbol}: {e}")
             return 0.0
 
     def update_prices(self):
-        """Update prices with real market data"""
+        """Update prices, indicators and sentiment concurrently across symbols"""
+        # Stage 1: bulk quote requests, one task per chunk of symbols
+        quote_tasks = {}
+        for start, chunk in self.quote_chunks():
+            future = self.submit_task(('quotes', start), self.fetch_quotes, chunk)
+            if future:
+                quote_tasks[f"quotes[{start}:{start + len(chunk)}]"] = future
+        
+        quotes = {}
+        for future in self.wait_for_tasks(quote_tasks):
+            quotes.update(future.result())
+        
+        self.apply_quotes(quotes, datetime.now().timestamp())
+        
+        # Stage 2: per-symbol indicator warm-up and sentiment refresh
+        refresh_tasks = {}
         for symbol in self.symbols:
-            try:
-                old_price = self.current_prices.get(symbol, 100.0)
-                
-                # Use real market data
-                new_price = self.get_real_price(symbol)
-                current_time = datetime.now().strftime('%H:%M:%S')
-                
-                # Update current price
-                self.current_prices[symbol] = new_price
-                
-                # Add to price history
-                self.price_history[symbol].append({
-                    'time': current_time,
-                    'price': new_price,
-                    'change': new_price - old_price,
-                    'change_pct': ((new_price - old_price) / old_price * 100) if old_price > 0 else 0
-                })
-                
-                # Keep only last 100 data points
-                if len(self.price_history[symbol]) > 100:
-                    self.price_history[symbol] = self.price_history[symbol][-100:]
-                
-                # Update technical indicators every 5 minutes
-                if (datetime.now() - self.last_update[symbol]).seconds > 300:
-                    self.calculate_technical_indicators(symbol)
-                    self.last_update[symbol] = datetime.now()
-                
-                # Update sentiment data every 15 minutes
-                if (datetime.now() - self.sentiment_update_times.get(symbol, datetime.min)).seconds > 900:
-                    self.update_sentiment_data(symbol)
-                    self.sentiment_update_times[symbol] = datetime.now()
-                    
-            except Exception as e:
-                print(f"Error updating {symbol}: {e}")
-
-    def buy_stock(self, symbol, quantity):
-        """Buy stocks"""
-        if symbol not in self.current_prices:
-            return False, "Invalid symbol"
-        
-        cost = self.current_prices[symbol] * quantity
-        if cost > self.balance:
-            return False, "Insufficient funds"
-        
-        self.balance -= cost
-        if symbol in self.portfolio:
-            self.portfolio[symbol] += quantity
+            # Warm indicators up on first use, retrying every 5 minutes until history loads
+            if (not self.indicators.is_warm(symbol) or
+                    (not self.indicators.has_history(symbol) and
+                     (datetime.now() - self.last_update[symbol]).seconds > 300)):
+                future = self.submit_task(('indicators', symbol), self.refresh_indicators, symbol)
+                if future:
+                    refresh_tasks[f"indicators {symbol}"] = future
+            
+            # Update sentiment data every 15 minutes
+            sentiment_age = datetime.now() - self.sentiment_update_times.get(symbol, datetime.min)
+            if sentiment_age.total_seconds() > SENTIMENT_CONFIG['cache_ttl']:
+                future = self.submit_task(('sentiment', symbol), self.refresh_sentiment, symbol)
+                if future:
+                    refresh_tasks[f"sentiment {symbol}"] = future
+        
+        self.wait_for_tasks(refresh_tasks)
+
+    def refresh_indicators(self, symbol):
+        """Download bars for a symbol and queue the indicator warm-up"""
+        bars = self.get_bars(symbol, period='5d', interval='5m')
+        self.commands.submit(self.calculate_technical_indicators, symbol, bars)
+
+    def refresh_sentiment(self, symbol):
+        """Fetch sentiment for a symbol and queue it for the trading loop"""
+        try:
+            with STAGE_SECONDS.time('sentiment_fetch', errors=STAGE_ERRORS):
+                sentiment = sentiment_service.refresh(symbol)
+        except Exception as e:
+            logger.error(f"Error updating sentiment for {symbol}: {e}")
+            sentiment = None
+        self.commands.submit(self.apply_sentiment, symbol, sentiment)
+
+    def refresh_sentiment_async(self, symbol):
+        """Refresh sentiment in the background and publish it when it arrives"""
+        def on_done(future):
+            if future.exception() is None:
+                self.commands.submit(self.apply_sentiment, symbol, future.result(), True)
+        sentiment_service.refresh_async(symbol).add_done_callback(on_done)
+
+    def account_report(self, name, trades=50):
+        """A paper account's summary and its most recent trades, or None"""
+        account = self.accounts.get(name)
+        if account is None:
+            return None
+        return dict(account.summary(), trades=account.trading_history[-trades:])
+    
+    def cached_sentiment(self, symbol):
+        """Sentiment for a symbol without fetching inline; stale or missing data refreshes in the background"""
+        if symbol in self.symbols and sentiment_service.is_stale(symbol):
+            self.refresh_sentiment_async(symbol)
+        return self.sentiment_data.get(symbol)
+
+    def execute(self, func, *args):
+        """Run func(*args) on the trading loop thread and return its result"""
+        return self.commands.call(func, *args, timeout=PIPELINE_CONFIG['command_timeout'])
+
+    def manual_trade(self, action, symbol, quantity):
+        """Place a dashboard order (a trading loop command)"""
+        if quantity <= 0:
+            return False, 'Quantity must be positive'
+        if action == 'buy':
+            success, message = self.buy_stock(symbol, quantity)
+        elif action == 'sell':
+            success, message = self.sell_stock(symbol, quantity)
         else:
-            self.portfolio[symbol] = quantity
-        
-        self.trading_history.append({
-            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'action': 'BUY',
-            'symbol': symbol,
-            'quantity': quantity,
-            'price': self.current_prices[symbol],
-            'total': cost,
-            'balance_after': self.balance
-        })
-        
-        return True, f"Bought {quantity} shares of {symbol} at ${self.current_prices[symbol]:.2f}"
+            return False, 'Invalid action'
+        
+        if success:
+            self.status_dirty = True
+            self.charts_dirty.add(symbol)  # Show the new trade marker right away
+        return success, message
+
+    def toggle_running(self):
+        """Start or pause auto-trading (a trading loop command)"""
+        self.is_running = not self.is_running
+        self.status_dirty = True
+        return self.is_running
+
+    def flush_updates(self):
+        """Commit the journal, publish status and rebuild charts once for a batch of commands"""
+        self.commit_journal()
+        if self.status_dirty:
+            self.publish_status()
+        if self.charts_dirty:
+            symbols, self.charts_dirty = self.charts_dirty, set()
+            self.refresh_chart_payloads(symbols)
+
+    def submit_task(self, key, func, *args):
+        """Submit a cycle task to the worker pool unless the same task is still running"""
+        previous = self.inflight_tasks.get(key)
+        if previous is not None and not previous.done():
+            return None
+        future = self.executor.submit(func, *args)
+        self.inflight_tasks[key] = future
+        return future
+
+    def wait_for_tasks(self, tasks):
+        """Wait for a stage's tasks up to the deadline and return the successful ones
+
+        Tasks that miss the deadline keep running in the background and are
+        not resubmitted until they finish, so one slow symbol cannot stall
+        the cycle or pile up duplicate work.
+        """
+        if not tasks:
+            return []
+        
+        # Commands (trades, finished refreshes) keep running while the stage waits
+        done, not_done = self.commands.wait(tasks.values(), PIPELINE_CONFIG['task_timeout'])
+        completed = []
+        for name, future in tasks.items():
+            if future in not_done:
+                logger.warning(f"⏱️ {name} missed the {PIPELINE_CONFIG['task_timeout']}s deadline, skipping this cycle")
+            elif future.exception() is not None:
+                logger.error(f"Error in {name}: {future.exception()}")
+            else:
+                completed.append(future)
+        return completed
 
-    def sell_stock(self, symbol, quantity):
-        """Sell stocks"""
-        if symbol not in self.portfolio or self.portfolio[symbol] < quantity:
-            return False, "Insufficient shares"
-        
-        revenue = self.current_prices[symbol] * quantity
-        self.balance += revenue
-        self.portfolio[symbol] -= quantity
-        
-        if self.portfolio[symbol] == 0:
-            del self.portfolio[symbol]
-        
-        self.trading_history.append({
-            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'action': 'SELL',
-            'symbol': symbol,
-            'quantity': quantity,
-            'price': self.current_prices[symbol],
-            'total': revenue,
-            'balance_after': self.balance
-        })
-        
-        return True, f"Sold {quantity} shares of {symbol} at ${self.current_prices[symbol]:.2f}"
+    def chart_snapshot(self, symbol):
+        """Copy of the state a chart needs, taken on the trading loop thread
 
-    def auto_trade(self):
-        """Optimized trading strategy to maximize profits and minimize losses"""
-        if not self.is_running:
-            return
-        
-        for symbol in self.symbols:
-            try:
-                if len(self.price_history[symbol]) < 20:  # Need more data for reliable signals
-                    continue
-                
-                current_price = self.current_prices[symbol]
-                prev_price = self.price_history[symbol][-2]['price']
-                change_pct = (current_price - prev_price) / prev_price
-                
-                # Get technical indicators
-                rsi = self.technical_indicators[symbol]['rsi']
-                sma_20 = self.technical_indicators[symbol]['sma_20']
-                
-                # Get sentiment signal (-1 to 1 scale)
-                sentiment_signal = self.get_sentiment_signal(symbol)
-                
-                # Calculate portfolio value and position sizing
-                portfolio_value = sum(self.portfolio.get(s, 0) * self.current_prices.get(s, 0) for s in self.symbols)
-                total_value = self.balance + portfolio_value
-                
-                # Dynamic position sizing based on confidence and portfolio size
-                base_trade_pct = 0.03  # 3% base position size
-                max_trade_amount = min(self.balance * base_trade_pct, total_value * 0.05)
-                
-                # Enhanced buy signals with momentum and volume confirmation
-                buy_signal = False
-                buy_reason = ""
-                buy_confidence = 0
-                
-                # Signal 1: Strong RSI oversold (below 25) - very strong buy signal
-                if rsi < 25 and self.balance > max_trade_amount:
-                    buy_signal = True
-                    buy_reason = f"Strong RSI oversold ({rsi:.1f})"
-                    buy_confidence = 0.9
-                
-                # Signal 2: Price significantly below SMA with momentum
-                elif (current_price < sma_20 * 0.92 and 
-                      change_pct > 0.01 and  # Positive momentum
-                      self.balance > max_trade_amount):
-                    buy_signal = True
-                    buy_reason = f"Price below SMA with momentum ({current_price:.2f} vs {sma_20:.2f})"
-                    buy_confidence = 0.7
-                
-                # Signal 3: Strong reversal pattern with volume confirmation
-                elif (change_pct > 0.025 and  # 2.5%+ gain
-                      len(self.price_history[symbol]) >= 5 and
-                      all(self.price_history[symbol][-i]['change_pct'] < -0.005 for i in range(2, 6)) and  # Recent decline
-                      self.balance > max_trade_amount):
-                    buy_signal = True
-                    buy_reason = f"Strong reversal pattern ({change_pct:.2%} gain)"
-                    buy_confidence = 0.8
-                
-                # Signal 4: Golden cross (price crossing above SMA with momentum)
-                elif (len(self.price_history[symbol]) >= 3 and
-                      self.price_history[symbol][-3]['price'] < sma_20 and
-                      current_price > sma_20 and
-                      change_pct > 0.01 and
-                      self.balance > max_trade_amount):
-                    buy_signal = True
-                    buy_reason = f"Golden cross above SMA"
-                    buy_confidence = 0.75
-                
-                # Signal 5: Strong positive sentiment (0.3+ sentiment score)
-                elif (sentiment_signal > 0.3 and 
-                      self.balance > max_trade_amount):
-                    buy_signal = True
-                    buy_reason = f"Strong positive sentiment ({sentiment_signal:.2f})"
-                    buy_confidence = 0.8
-                
-                # Signal 6: Moderate positive sentiment with technical confirmation
-                elif (sentiment_signal > 0.1 and 
-                      rsi < 60 and  # Not overbought
-                      current_price < sma_20 * 1.05 and  # Not too far above SMA
-                      self.balance > max_trade_amount):
-                    buy_signal = True
-                    buy_reason = f"Positive sentiment with technical confirmation ({sentiment_signal:.2f})"
-                    buy_confidence = 0.6
-                
-                if buy_signal:
-                    # Adjust position size based on confidence
-                    adjusted_amount = max_trade_amount * buy_confidence
-                    quantity = max(1, int(adjusted_amount / current_price))
-                    if quantity > 0:
-                        success, message = self.buy_stock(symbol, quantity)
-                        if success:
-                            print(f"🤖 AUTO BUY: {symbol} - {buy_reason}")
-                            print(f"   Bought {quantity} shares at ${current_price:.2f}")
-                
-                # Enhanced sell signals with profit protection
-                sell_signal = False
-                sell_reason = ""
-                sell_confidence = 0
-                
-                if symbol in self.portfolio and self.portfolio[symbol] > 0:
-                    # Calculate actual average cost from trading history
-                    symbol_trades = [t for t in self.trading_history if t['symbol'] == symbol and t['action'] == 'BUY']
-                    if symbol_trades:
-                        total_cost = sum(t['total'] for t in symbol_trades)
-                        total_shares = sum(t['quantity'] for t in symbol_trades)
-                        avg_cost = total_cost / total_shares
-                        current_gain_pct = ((current_price - avg_cost) / avg_cost) * 100
-                    else:
-                        avg_cost = current_price
-                        current_gain_pct = 0
-                    
-                    # Signal 1: Strong RSI overbought (above 75) - very strong sell signal
-                    if rsi > 75:
-                        sell_signal = True
-                        sell_reason = f"Strong RSI overbought ({rsi:.1f})"
-                        sell_confidence = 0.9
-                    
-                    # Signal 2: Price significantly above SMA with reversal
-                    elif (current_price > sma_20 * 1.08 and 
-                          change_pct < -0.01):  # Negative momentum
-                        sell_signal = True
-                        sell_reason = f"Price above SMA with reversal ({current_price:.2f} vs {sma_20:.2f})"
-                        sell_confidence = 0.8
-                    
-                    # Signal 3: Take profit at different levels based on gain
-                    elif current_gain_pct > 20:  # 20%+ gain - sell 75%
-                        sell_signal = True
-                        sell_reason = f"Take profit - 20%+ gain ({current_gain_pct:.1f}%)"
-                        sell_confidence = 0.95
-                    elif current_gain_pct > 15:  # 15%+ gain - sell 50%
-                        sell_signal = True
-                        sell_reason = f"Take profit - 15%+ gain ({current_gain_pct:.1f}%)"
-                        sell_confidence = 0.85
-                    elif current_gain_pct > 10:  # 10%+ gain - sell 25%
-                        sell_signal = True
-                        sell_reason = f"Take profit - 10%+ gain ({current_gain_pct:.1f}%)"
-                        sell_confidence = 0.7
-                    
-                    # Signal 4: Stop loss with trailing stop
-                    elif current_gain_pct < -8:  # 8%+ loss - sell all
-                        sell_signal = True
-                        sell_reason = f"Stop loss - 8%+ loss ({current_gain_pct:.1f}%)"
-                        sell_confidence = 1.0
-                    elif current_gain_pct < -5:  # 5%+ loss - sell 50%
-                        sell_signal = True
-                        sell_reason = f"Stop loss - 5%+ loss ({current_gain_pct:.1f}%)"
-                        sell_confidence = 0.8
-                    
-                    # Signal 5: Death cross (price crossing below SMA with momentum)
-                    elif (len(self.price_history[symbol]) >= 3 and
-                          self.price_history[symbol][-3]['price'] > sma_20 and
-                          current_price < sma_20 and
-                          change_pct < -0.01):
-                        sell_signal = True
-                        sell_reason = f"Death cross below SMA"
-                        sell_confidence = 0.75
-                    
-                    # Signal 6: Strong negative sentiment (-0.3 or lower sentiment score)
-                    elif sentiment_signal < -0.3:
-                        sell_signal = True
-                        sell_reason = f"Strong negative sentiment ({sentiment_signal:.2f})"
-                        sell_confidence = 0.85
-                    
-                    # Signal 7: Moderate negative sentiment with technical confirmation
-                    elif (sentiment_signal < -0.1 and 
-                          rsi > 40 and  # Not oversold
-                          current_price > sma_20 * 0.95):  # Not too far below SMA
-                        sell_signal = True
-                        sell_reason = f"Negative sentiment with technical confirmation ({sentiment_signal:.2f})"
-                        sell_confidence = 0.7
-                    
-                    if sell_signal:
-                        # Dynamic sell percentage based on confidence and signal type
-                        if "Stop loss" in sell_reason and current_gain_pct < -8:
-                            sell_pct = 1.0  # Sell all on major loss
-                        elif "Take profit" in sell_reason and current_gain_pct > 20:
-                            sell_pct = 0.75  # Sell 75% on major gain
-                        elif sell_confidence > 0.8:
-                            sell_pct = 0.5  # Sell 50% on strong signals
-                        else:
-                            sell_pct = 0.25  # Sell 25% on moderate signals
-                        
-                        quantity = max(1, int(self.portfolio[symbol] * sell_pct))
-                        if quantity > 0:
-                            success, message = self.sell_stock(symbol, quantity)
-                            if success:
-                                print(f"🤖 AUTO SELL: {symbol} - {sell_reason}")
-                                print(f"   Sold {quantity} shares at ${current_price:.2f}")
-                        
-            except Exception as e:
-                print(f"Error in auto-trade for {symbol}: {e}")
+        Chart payloads are built from this copy in worker threads, so they
+        never read state the trading loop is changing.
+        """
+        history = self.price_history.get(symbol)
+        return {
+            'current_price': self.current_prices.get(symbol),
+            'indicators': dict(self.technical_indicators.get(symbol, {})),
+            'timestamps': history.timestamps.copy() if history is not None else np.empty(0),
+            'prices': history.prices.copy() if history is not None else np.empty(0),
+            'change_pcts': history.change_pcts.copy() if history is not None else np.empty(0),
+            'trades': self.trade_index.view(symbol)
+        }
 
-    def generate_chart_data(self, symbol):
+    def generate_chart_data(self, symbol, snapshot):
         """Generate comprehensive chart data for a symbol including pre/post market and trade markers"""
         try:
             # Get comprehensive daily data including pre/post market
-            hist = self.get_historical_data(symbol, period='1d', interval='5m')
+            hist = self.get_bars(symbol, period='1d', interval='5m')
             
             if hist.empty:
                 # Fallback to real-time data if historical data unavailable
-                if not self.price_history[symbol]:
+                if not len(snapshot['prices']):
                     return None
                 
-                times = [point['time'] for point in self.price_history[symbol]]
-                prices = [point['price'] for point in self.price_history[symbol]]
-                changes = [point['change_pct'] for point in self.price_history[symbol]]
+                bar_times = snapshot['timestamps']
+                times = [datetime.fromtimestamp(ts).strftime('%H:%M:%S') for ts in bar_times]
+                prices = snapshot['prices'].tolist()
+                changes = snapshot['change_pcts'].tolist()
                 volumes = None
                 market_status = "Real-time Data"
             else:
                 # Use comprehensive historical data
-                times = [time.strftime('%H:%M') for time in hist.index]
-                prices = hist['Close'].tolist()
+                bar_times = hist.timestamps
+                times = hist.labels('%H:%M')
+                closes = hist['Close']
+                prices = closes.tolist()
                 volumes = hist['Volume'].tolist()
                 
                 # Calculate price changes
-                changes = []
-                for i in range(len(prices)):
-                    if i == 0:
-                        changes.append(0.0)
-                    else:
-                        change_pct = ((prices[i] - prices[i-1]) / prices[i-1]) * 100
-                        changes.append(round(change_pct, 2))
+                change_pcts = np.zeros(len(closes))
+                change_pcts[1:] = (closes[1:] - closes[:-1]) / closes[:-1] * 100
+                changes = np.round(change_pcts, 2).tolist()
                 
                 # Get current market status
                 current_time = datetime.now().time()
@@ -727,31 +635,24 @@ class TradingBot:
                     market_status = "Pre-Market"
             
             # Get trade markers for this symbol
-            trade_markers = self.get_trade_markers_for_symbol(symbol, times)
-            
-            # Debug: Print trade_markers before creating chart_data
-            print(f"DEBUG: trade_markers for {symbol}: {len(trade_markers)} markers")
-            if trade_markers:
-                print(f"DEBUG: Sample trade marker: {trade_markers[0]}")
+            trade_markers, marker_indexes = self.get_trade_markers_for_symbol(symbol, bar_times, snapshot['trades'])
             
-            # Ensure all data is JSON serializable by converting numpy/pandas types
-            prices = [float(p) if hasattr(p, 'item') else float(p) for p in prices]
-            changes = [float(c) if hasattr(c, 'item') else float(c) for c in changes]
-            volumes = [float(v) if hasattr(v, 'item') else float(v) for v in volumes] if volumes else None
+            volumes = volumes or None
             
             # Create comprehensive chart data
             chart_data = {
                 'times': times,
                 'prices': prices,
                 'changes': changes,
-                'current_price': float(self.current_prices[symbol]),
-                'rsi': float(self.technical_indicators[symbol]['rsi']),
-                'sma_20': float(self.technical_indicators[symbol]['sma_20']),
-                'volume': float(self.technical_indicators[symbol]['volume']),
+                'current_price': float(snapshot['current_price']),
+                'rsi': float(snapshot['indicators']['rsi']),
+                'sma_20': float(snapshot['indicators']['sma_20']),
+                'volume': float(snapshot['indicators']['volume']),
                 'volumes': volumes,
                 'market_status': market_status if 'market_status' in locals() else "Unknown",
                 'data_points': len(times),
                 'trade_markers': trade_markers,
+                'marker_indexes': marker_indexes,
                 'price_range': {
                     'high': float(max(prices)) if prices else 0.0,
                     'low': float(min(prices)) if prices else 0.0,
@@ -763,114 +664,128 @@ class TradingBot:
             return chart_data
             
         except Exception as e:
-            print(f"Error generating chart data for {symbol}: {e}")
+            STAGE_ERRORS.inc('chart_build')
+            logger.error(f"Error generating chart data for {symbol}: {e}")
             return None
 
-    def get_trade_markers_for_symbol(self, symbol, chart_times):
-        """Get trade markers for a specific symbol that align with chart time points"""
-        trade_markers = []
-        
-        # Get all trades for this symbol (not just today)
-        symbol_trades = [
-            trade for trade in self.trading_history 
-            if trade['symbol'] == symbol
-        ]
-        
-        if not symbol_trades or not chart_times:
-            return trade_markers
-        
-        # Sort trades by time for chronological order
-        symbol_trades.sort(key=lambda x: datetime.strptime(x['time'], '%Y-%m-%d %H:%M:%S'))
-        
-        # If all trades are happening after chart time range, distribute them evenly
-        # Check if all trades are after the last chart time
-        last_chart_time_str = chart_times[-1] if chart_times else "19:55"
-        last_chart_hour, last_chart_minute = map(int, last_chart_time_str.split(':'))
-        today = datetime.now().date()
-        last_chart_dt = datetime.combine(today, datetime.min.time().replace(hour=last_chart_hour, minute=last_chart_minute))
-        
-        all_trades_after_chart = True
-        for trade in symbol_trades:
-            trade_time = datetime.strptime(trade['time'], '%Y-%m-%d %H:%M:%S')
-            if trade_time <= last_chart_dt:
-                all_trades_after_chart = False
-                break
-        
-        # Calculate time range for distribution
-        first_trade_time = datetime.strptime(symbol_trades[0]['time'], '%Y-%m-%d %H:%M:%S')
-        last_trade_time = datetime.strptime(symbol_trades[-1]['time'], '%Y-%m-%d %H:%M:%S')
-        total_trade_duration = (last_trade_time - first_trade_time).total_seconds()
-        
-        # Get chart time range
-        try:
-            first_chart_hour, first_chart_minute = map(int, chart_times[0].split(':'))
-            last_chart_hour, last_chart_minute = map(int, chart_times[-1].split(':'))
-            today = datetime.now().date()
-            first_chart_dt = datetime.combine(today, datetime.min.time().replace(hour=first_chart_hour, minute=first_chart_minute))
-            last_chart_dt = datetime.combine(today, datetime.min.time().replace(hour=last_chart_hour, minute=last_chart_minute))
-            total_chart_duration = (last_chart_dt - first_chart_dt).total_seconds()
-        except:
-            # Fallback to simple distribution
-            total_chart_duration = len(chart_times) * 300  # 5 minutes per interval
-        
-        # Distribute trades across chart positions
-        for i, trade in enumerate(symbol_trades):
-            trade_time = datetime.strptime(trade['time'], '%Y-%m-%d %H:%M:%S')
-            
-            # Try to find exact time match first
-            exact_match_found = False
-            for j, chart_time in enumerate(chart_times):
-                try:
-                    chart_hour, chart_minute = map(int, chart_time.split(':'))
-                    today = datetime.now().date()
-                    chart_dt = datetime.combine(today, datetime.min.time().replace(hour=chart_hour, minute=chart_minute))
-                    
-                    # Check if trade time is within 5 minutes of chart time
-                    time_diff = abs((trade_time - chart_dt).total_seconds())
-                    if time_diff <= 300:  # 5 minutes
-                        chart_index = j
-                        exact_match_found = True
-                        break
-                except:
-                    continue
-            
-            if not exact_match_found:
-                # If no exact match, distribute evenly across the chart
-                if all_trades_after_chart:
-                    # If all trades are after chart time range, distribute them evenly across the entire chart
-                    chart_index = int((i / max(1, len(symbol_trades) - 1)) * (len(chart_times) - 1))
-                else:
-                    # Use the trade's position in the sequence to determine chart position
-                    chart_index = int((i / max(1, len(symbol_trades) - 1)) * (len(chart_times) - 1))
-                chart_index = max(0, min(chart_index, len(chart_times) - 1))
-            
-            trade_markers.append({
-                'index': int(chart_index),
-                'action': str(trade['action']),
-                'quantity': int(trade['quantity']),
-                'price': float(trade['price']),
-                'time': str(trade['time']),
-                'balance_after': float(trade['balance_after'])
-            })
-        
-        print(f"DEBUG: Found {len(trade_markers)} trade markers for {symbol}, distributed across {len(chart_times)} chart positions")
-        return trade_markers
+    def publish_status(self):
+        """Publish the current state to /api/status under a new sequence number"""
+        self.status_dirty = False
+        with STAGE_SECONDS.time('status_serialize', errors=STAGE_ERRORS):
+            return self.status.publish(market_hours=self.is_market_hours())
+
+    def refresh_chart_payload(self, symbol, snapshot=None):
+        """Rebuild and publish the serialized /api/chart payload for a symbol"""
+        if snapshot is None:
+            snapshot = self.execute(self.chart_snapshot, symbol)
+        with STAGE_SECONDS.time('chart_build', errors=STAGE_ERRORS):
+            chart_data = self.generate_chart_data(symbol, snapshot)
+            if chart_data is None:
+                self.chart_payloads.discard(symbol)
+                return None
+            return self.chart_payloads.publish(symbol, chart_data)
+
+    def refresh_chart_payloads(self, symbols=None):
+        """Rebuild chart payloads in the background from snapshots taken now"""
+        for symbol in symbols or self.symbols:
+            future = self.submit_task(('chart', symbol), self.refresh_chart_payload, symbol, self.chart_snapshot(symbol))
+            if future is None:
+                self.charts_dirty.add(symbol)  # Still building from an older snapshot, retry after it
+            else:
+                future.add_done_callback(self.wake_after_chart)
+
+    def wake_after_chart(self, future):
+        """Let the trading loop retry charts that changed while this one was building"""
+        if self.charts_dirty:
+            self.commands.submit(self.flush_updates)
+
+    def get_trade_markers_for_symbol(self, symbol, bar_times, trades=None):
+        """Trade markers for the chart bars starting at bar_times (epoch seconds)
+
+        Returns (marker records, bar index per record). trades is a
+        TradeView from chart_snapshot(); by default the live trade index is
+        read, which only the trading loop thread may do.
+        """
+        if trades is None:
+            trades = self.trade_index.view(symbol)
+        return TradeIndex.align(trades, bar_times)
 
 # Initialize trading bot
 bot = TradingBot()
 
+def counter_stats(stats, skip=()):
+    """{(name,): value} for the numeric counters in a component's stats() dict"""
+    return {(name,): value for name, value in stats.items() if name not in skip}
+
+# Components that keep their own counters are read when /api/metrics renders
+metrics.callback('trading_history_cache_events_total', 'Historical bar cache lookups by outcome',
+                 lambda: counter_stats(market_data_cache.stats(), skip=('entries', 'inflight')),
+                 kind='counter', labelnames=['event'])
+metrics.callback('trading_history_cache_entries', 'Entries in the historical bar cache',
+                 lambda: len(market_data_cache.entries))
+metrics.callback('trading_sentiment_events_total', 'Sentiment refreshes, skips and errors',
+                 lambda: counter_stats(sentiment_service.counters), kind='counter', labelnames=['event'])
+metrics.callback('trading_text_score_events_total', 'Sentiment text scoring and its memo cache hits',
+                 lambda: counter_stats(sentiment_service.scorer.counters), kind='counter', labelnames=['event'])
+metrics.callback('trading_commands_executed_total', 'Commands run by the trading loop',
+                 lambda: bot.commands.executed, kind='counter')
+metrics.callback('trading_command_queue_depth', 'Commands waiting for the trading loop',
+                 lambda: bot.commands.queue.qsize())
+metrics.callback('trading_trades_total', 'Trades made, including restored ones',
+                 lambda: bot.trade_count, kind='counter')
+metrics.callback('trading_last_cycle_seconds', 'Duration of the last trading cycle',
+                 lambda: bot.last_cycle_duration)
+metrics.callback('trading_status_seq', 'Sequence number of the latest /api/status snapshot',
+                 lambda: bot.status.seq)
+metrics.callback('trading_stream_subscribers', 'Open /api/stream connections',
+                 lambda: bot.status.subscribers)
+metrics.callback('trading_warming', '1 while prices and indicators are still loading at startup',
+                 lambda: bot.warming)
+metrics.callback('trading_running', '1 while auto-trading is on', lambda: bot.is_running)
+metrics.callback('trading_balance_dollars', 'Cash balance', lambda: bot.balance)
+metrics.callback('trading_paper_accounts', 'Paper accounts on the shared feed', lambda: len(bot.accounts))
+metrics.callback('trading_paper_trades_total', 'Trades made by paper accounts',
+                 lambda: sum(account.trade_count for account in list(bot.accounts.accounts.values())),
+                 kind='counter')
+
 def price_update_loop():
-    """Background thread for updating prices and auto-trading"""
+    """Background thread for updating prices and auto-trading
+
+    This thread is the engine's single writer: between and during cycles it
+    runs the commands other threads queue on bot.commands.
+    """
+    interval = PIPELINE_CONFIG['cycle_interval']
+    bot.commands.bind()
+    bot.warm_up()
     while True:
         try:
-            if bot.is_running:
+            # The feed keeps updating while the bot or any paper account trades on it
+            if bot.is_running or bot.accounts.running():
+                cycle_start = time.perf_counter()
                 bot.update_prices()
-                bot.auto_trade()
-                print(f"🤖 Auto-trade cycle completed. Balance: ${bot.balance:.2f}, Portfolio: {bot.portfolio}")
-            time.sleep(10)  # Update every 10 seconds for more frequent trading
+                market = bot.market_inputs()  # Shared by the bot and every paper account
+                with STAGE_SECONDS.time('auto_trade', errors=STAGE_ERRORS):
+                    bot.auto_trade(market)  # Orders execute in one serialized pass
+                with STAGE_SECONDS.time('paper_accounts', errors=STAGE_ERRORS):
+                    bot.accounts.auto_trade(market)
+                bot.commit_journal()  # One fsync for the cycle's fills
+                bot.publish_status()
+                bot.refresh_chart_payloads()
+                duration = time.perf_counter() - cycle_start
+                bot.last_cycle_duration = duration
+                CYCLE_SECONDS.observe(duration)
+                logger.debug(f"🤖 Auto-trade cycle completed in {duration:.2f}s. Balance: ${bot.balance:.2f}, Portfolio: {bot.portfolio}")
+                if duration > interval:
+                    bot.cycle_overruns += 1
+                    CYCLE_OVERRUNS.inc()
+                    logger.warning(f"⚠️ Cycle overran the {interval}s interval by {duration - interval:.2f}s ({bot.cycle_overruns} overruns)")
+                bot.commands.run_until(time.monotonic() + max(0, interval - duration))
+            else:
+                bot.publish_status()  # Keep market hours current while paused
+                bot.commands.run_until(time.monotonic() + interval)
         except Exception as e:
-            print(f"Error in price update loop: {e}")
-            time.sleep(30)  # Wait longer on error
+            logger.error(f"Error in price update loop: {e}")
+            bot.commands.run_until(time.monotonic() + 30)  # Wait longer on error
 
 # Start background thread
 price_thread = threading.Thread(target=price_update_loop, daemon=True)
@@ -880,43 +795,66 @@ price_thread.start()
 def index():
     return render_template('index.html')
 
+@app.route('/api/ready')
+def get_readiness():
+    """Readiness probe: 503 with per-symbol progress while warming up, 200 once ready"""
+    report = bot.readiness_report()
+    return jsonify(report), 200 if report['ready'] else 503
+
 @app.route('/api/status')
 def get_status():
-    portfolio_value = sum(bot.portfolio.get(symbol, 0) * bot.current_prices.get(symbol, 0) 
-                         for symbol in bot.current_prices)
-    total_value = bot.balance + portfolio_value
-    
-    # Use the JSON serialization helper for all data
-    serializable_prices = convert_to_json_serializable(bot.current_prices)
-    serializable_indicators = convert_to_json_serializable(bot.technical_indicators)
-    serializable_trading_history = convert_to_json_serializable(bot.trading_history[-10:])
-    serializable_price_history = convert_to_json_serializable(bot.price_history)
-    serializable_sentiment = convert_to_json_serializable(bot.sentiment_data)
-    
-    return jsonify({
-        'balance': convert_to_json_serializable(round(bot.balance, 2)),
-        'portfolio': convert_to_json_serializable(bot.portfolio),
-        'portfolio_value': convert_to_json_serializable(round(portfolio_value, 2)),
-        'total_value': convert_to_json_serializable(round(total_value, 2)),
-        'prices': serializable_prices,
-        'price_history': serializable_price_history,
-        'technical_indicators': serializable_indicators,
-        'sentiment_data': serializable_sentiment,
-        'trading_history': serializable_trading_history,
-        'is_running': convert_to_json_serializable(bot.is_running),
-        'symbols': convert_to_json_serializable(bot.symbols),
-        'market_hours': convert_to_json_serializable(bot.is_market_hours())
-    })
+    """Full status, or only what changed after ?since=<seq>"""
+    since = request.args.get('since', type=int)
+    return Response(bot.status.encoded(since), mimetype='application/json')
+
+@app.route('/api/stream')
+def stream_status():
+    """Server-Sent Events stream with one status update per published change"""
+    if not bot.status.subscribe():
+        return jsonify({'error': 'Too many stream subscribers, poll /api/status instead'}), 503
+    # EventSource resends the last event id when it reconnects
+    since = request.headers.get('Last-Event-ID', type=int) or request.args.get('since', type=int)
+    response = Response(
+        bot.status.stream(since),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    response.call_on_close(bot.status.unsubscribe)
+    return response
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Stage latencies, upstream and cache counters and loop health in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache_stats')
+def get_cache_stats():
+    """Hit/miss counters for the historical data cache"""
+    return jsonify(market_data_cache.stats())
+
+@app.route('/api/sentiment_stats')
+def get_sentiment_stats():
+    """Rate-limit, circuit-breaker and cache counters for the sentiment service"""
+    return jsonify(sentiment_service.stats())
 
 @app.route('/api/chart/<symbol>')
 def get_chart_data(symbol):
-    chart_data = bot.generate_chart_data(symbol)
-    if chart_data:
-        # Ensure chart data is JSON serializable
-        serializable_chart_data = convert_to_json_serializable(chart_data)
-        return jsonify(serializable_chart_data)
-    else:
+    """Serve the precomputed chart payload, or 304 if the client's ETag is current"""
+    if symbol not in bot.symbols:
         return jsonify({'error': 'No data available'})
+    
+    try:
+        payload = bot.chart_payloads.get(symbol) or bot.refresh_chart_payload(symbol)
+    except CommandTimeout:
+        return jsonify({'error': 'Trading engine busy, try again'}), 503
+    if payload is None:
+        return jsonify({'error': 'No data available'})
+    
+    response = Response(payload.body, mimetype='application/json')
+    response.set_etag(payload.etag)
+    response.headers['Cache-Control'] = 'no-cache'  # Browsers revalidate with If-None-Match
+    response.headers['X-Payload-Version'] = str(payload.version)
+    return response.make_conditional(request)
 
 @app.route('/api/trade', methods=['POST'])
 def trade():
@@ -925,42 +863,101 @@ def trade():
     symbol = data.get('symbol')
     quantity = int(data.get('quantity', 1))
     
-    if action == 'buy':
-        success, message = bot.buy_stock(symbol, quantity)
-    elif action == 'sell':
-        success, message = bot.sell_stock(symbol, quantity)
-    else:
+    if action not in ('buy', 'sell'):
         return jsonify({'success': False, 'message': 'Invalid action'})
     
+    try:
+        # Orders queue behind each other and the auto-trader on the trading loop thread
+        success, message = bot.execute(bot.manual_trade, action, symbol, quantity)
+    except CommandTimeout:
+        return jsonify({'success': False, 'message': 'Trading engine busy, try again'}), 503
+    
     return jsonify({'success': success, 'message': message})
 
 @app.route('/api/sentiment/<symbol>')
 def get_sentiment_data(symbol):
-    """Get sentiment data for a specific symbol"""
+    """Get cached sentiment data for a specific symbol"""
     try:
-        # Update sentiment data if it's stale (older than 15 minutes)
-        if (symbol not in bot.sentiment_update_times or 
-            (datetime.now() - bot.sentiment_update_times.get(symbol, datetime.min)).seconds > 900):
-            bot.update_sentiment_data(symbol)
-        
-        if symbol in bot.sentiment_data:
-            return jsonify(convert_to_json_serializable(bot.sentiment_data[symbol]))
+        sentiment = bot.cached_sentiment(symbol)
+        if sentiment is not None:
+            return jsonify(sentiment)
         else:
             return jsonify({'error': 'No sentiment data available'})
     except Exception as e:
         return jsonify({'error': f'Sentiment analysis error: {str(e)}'})
 
-@app.route('/api/toggle_bot', methods=['POST'])
-def toggle_bot():
-    bot.is_running = not bot.is_running
-    return jsonify({'is_running': bot.is_running})
+@app.route('/api/accounts')
+def get_accounts():
+    """Every paper account's balance, value, return and parameters, best first"""
+    try:
+        return jsonify(bot.execute(bot.accounts.summaries))
+    except CommandTimeout:
+        return jsonify({'error': 'Trading engine busy, try again'}), 503
 
+@app.route('/api/accounts/<name>')
+def get_account(name):
+    """One paper account with its recent trades"""
+    try:
+        account = bot.execute(bot.account_report, name)
+    except CommandTimeout:
+        return jsonify({'error': 'Trading engine busy, try again'}), 503
+    if account is None:
+        return jsonify({'error': 'No such account'}), 404
+    return jsonify(account)
 
+@app.route('/api/toggle_bot', methods=['POST'])
+def toggle_bot():
+    try:
+        is_running = bot.execute(bot.toggle_running)
+    except CommandTimeout:
+        return jsonify({'error': 'Trading engine busy, try again'}), 503
+    return jsonify({'is_running': is_running})
+
+
+def serve_shared_state():
+    """Publish state to web worker processes and answer their requests
+
+    Used by `python trading_bot.py --engine` (see web.py and gunicorn.conf.py):
+    every status snapshot and chart payload is written to the state
+    directory as it is published, and commands arrive over a Unix socket.
+    """
+    state_dir, socket_path = state_paths()
+    writer = StateWriter(state_dir)
+    bot.status.listeners.append(
+        lambda snapshot: writer.write_status(snapshot, bot.symbols, bot.history_capacity, bot.status.trade_limit)
+    )
+    bot.chart_payloads.listeners.append(writer.write_chart)
+    # Write what is already published; everything later follows as it is published
+    bot.execute(bot.publish_status)
+    for symbol in bot.symbols:
+        payload = bot.chart_payloads.get(symbol)
+        if payload is not None:
+            writer.write_chart(symbol, payload)
+    
+    server = EngineServer(socket_path, {
+        'trade': lambda action, symbol, quantity: bot.execute(bot.manual_trade, action, symbol, quantity),
+        'toggle': lambda: bot.execute(bot.toggle_running),
+        'accounts': lambda: bot.execute(bot.accounts.summaries),
+        'account': lambda name: bot.execute(bot.account_report, name),
+        'ready': bot.readiness_report,
+        'chart': lambda symbol: bot.refresh_chart_payload(symbol) is not None,
+        'sentiment': bot.cached_sentiment,
+        'metrics': metrics.render,
+        'cache_stats': market_data_cache.stats,
+        'sentiment_stats': sentiment_service.stats
+    }).start()
+    logger.info(f"🧠 Trading engine serving web workers: state in {state_dir}, commands on {socket_path}")
+    return server
 
 if __name__ == '__main__':
-    import os
+    if '--engine' in sys.argv:
+        # Engine only: web workers (web.py) serve HTTP from the shared state
+        serve_shared_state()
+        price_thread.join()
+        sys.exit(1)  # The trading loop never returns
+    
     port = int(os.environ.get('PORT', 5239))
-    print(f"🚀 Starting Trading Bot with Real Market Data on port {port}")
-    print("💡 The bot will automatically trade based on real market movements")
-    print("📊 Using Yahoo Finance API for live data")
+    logger.info(f"🚀 Starting Trading Bot with Real Market Data on port {port}")
+    logger.info("💡 The bot will automatically trade based on real market movements")
+    logger.info("📊 Using Yahoo Finance API for live data")
     app.run(host='0.0.0.0', port=port, debug=False) 
\ No newline at end of file
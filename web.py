@@ -0,0 +1,174 @@
+"""Stateless web worker for the multi-process deployment.
+
+    gunicorn -c gunicorn.conf.py web:app
+
+gunicorn.conf.py starts one engine process (`python trading_bot.py --engine`)
+that runs the trading loop, and any number of these workers serve the same
+API as trading_bot.py: reads come from the state files the engine publishes
+(shared_state.StateReader), commands go to the engine over its Unix socket
+(shared_state.EngineClient). Workers hold no trading state of their own, so
+they can be added, killed and restarted freely.
+"""
+import logging
+import os
+import sys
+
+from flask import Flask, Response, jsonify, render_template, request
+
+from payloads import FastJSONProvider
+from shared_state import (EngineBusy, EngineClient, EngineError, EngineUnavailable, StateReader, state_paths,
+                          stream_limit, web_threads)
+
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(), format='%(message)s', stream=sys.stdout)
+logger = logging.getLogger('web')
+
+app = Flask(__name__)
+app.json = FastJSONProvider(app)
+
+STATE_DIR, ENGINE_SOCKET = state_paths()
+# Streams beyond the limit get a 503 and the dashboard polls instead
+reader = StateReader(STATE_DIR, max_subscribers=stream_limit(web_threads()))
+engine = EngineClient(ENGINE_SOCKET, timeout=float(os.environ.get('ENGINE_TIMEOUT', 15)))
+
+
+@app.errorhandler(EngineUnavailable)
+def engine_unavailable(e):
+    logger.warning(f"⚠️ {e}")
+    return jsonify({'error': 'Trading engine unavailable, try again'}), 503
+
+
+@app.errorhandler(EngineBusy)
+def engine_busy(e):
+    return jsonify({'error': 'Trading engine busy, try again'}), 503
+
+
+@app.errorhandler(EngineError)
+def engine_error(e):
+    logger.error(f"❌ Trading engine error: {e}")
+    return jsonify({'error': f'Trading engine error: {e}'}), 500
+
+
+def current_status():
+    status = reader.status()
+    if status is None:
+        raise EngineUnavailable(f"no status published in {STATE_DIR} yet")
+    return status
+
+
+@app.route('/')
+def index():
+    return render_template('index.html')
+
+@app.route('/api/ready')
+def get_readiness():
+    """Readiness probe: 503 while the engine is warming up or unreachable, 200 once ready"""
+    try:
+        report = engine.call('ready')
+    except EngineUnavailable as e:
+        return jsonify({'ready': False, 'error': str(e)}), 503
+    return jsonify(report), 200 if report['ready'] else 503
+
+@app.route('/api/status')
+def get_status():
+    """Full status, or only what changed after ?since=<seq>"""
+    since = request.args.get('since', type=int)
+    return Response(current_status().encoded(since), mimetype='application/json')
+
+@app.route('/api/stream')
+def stream_status():
+    """Server-Sent Events stream with one status update per published change"""
+    if not reader.subscribe():
+        return jsonify({'error': 'Too many stream subscribers, poll /api/status instead'}), 503
+    # EventSource resends the last event id when it reconnects
+    since = request.headers.get('Last-Event-ID', type=int) or request.args.get('since', type=int)
+    response = Response(
+        reader.stream(since),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    response.call_on_close(reader.unsubscribe)
+    return response
+
+@app.route('/api/metrics')
+def get_metrics():
+    """The engine's metrics in the Prometheus text format"""
+    return Response(engine.call('metrics'), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache_stats')
+def get_cache_stats():
+    """Hit/miss counters for the historical data cache"""
+    return jsonify(engine.call('cache_stats'))
+
+@app.route('/api/sentiment_stats')
+def get_sentiment_stats():
+    """Rate-limit, circuit-breaker and cache counters for the sentiment service"""
+    return jsonify(engine.call('sentiment_stats'))
+
+@app.route('/api/chart/<symbol>')
+def get_chart_data(symbol):
+    """Serve the engine's chart payload, or 304 if the client's ETag is current"""
+    if symbol not in current_status().symbols:
+        return jsonify({'error': 'No data available'})
+
+    payload = reader.chart(symbol)
+    if payload is None and engine.call('chart', symbol):
+        payload = reader.chart(symbol)  # Built on demand and written by the engine
+    if payload is None:
+        return jsonify({'error': 'No data available'})
+
+    response = Response(payload.body, mimetype='application/json')
+    response.set_etag(payload.etag)
+    response.headers['Cache-Control'] = 'no-cache'  # Browsers revalidate with If-None-Match
+    response.headers['X-Payload-Version'] = str(payload.version)
+    return response.make_conditional(request)
+
+@app.route('/api/trade', methods=['POST'])
+def trade():
+    data = request.json or {}
+    action = data.get('action')
+    symbol = data.get('symbol')
+    quantity = int(data.get('quantity', 1))
+
+    if action not in ('buy', 'sell'):
+        return jsonify({'success': False, 'message': 'Invalid action'})
+
+    try:
+        # Orders queue behind each other and the auto-trader on the engine's trading loop
+        success, message = engine.call('trade', action, symbol, quantity)
+    except EngineBusy:
+        return jsonify({'success': False, 'message': 'Trading engine busy, try again'}), 503
+    except EngineUnavailable:
+        return jsonify({'success': False, 'message': 'Trading engine unavailable, try again'}), 503
+    except EngineError as e:
+        logger.error(f"❌ Trading engine error: {e}")
+        return jsonify({'success': False, 'message': f'Trading engine error: {e}'}), 500
+
+    return jsonify({'success': success, 'message': message})
+
+@app.route('/api/sentiment/<symbol>')
+def get_sentiment_data(symbol):
+    """Get cached sentiment data for a specific symbol"""
+    try:
+        sentiment = engine.call('sentiment', symbol)
+    except EngineError as e:
+        return jsonify({'error': f'Sentiment analysis error: {str(e)}'})
+    if sentiment is not None:
+        return jsonify(sentiment)
+    return jsonify({'error': 'No sentiment data available'})
+
+@app.route('/api/accounts')
+def get_accounts():
+    """Every paper account's balance, value, return and parameters, best first"""
+    return jsonify(engine.call('accounts'))
+
+@app.route('/api/accounts/<name>')
+def get_account(name):
+    """One paper account with its recent trades"""
+    account = engine.call('account', name)
+    if account is None:
+        return jsonify({'error': 'No such account'}), 404
+    return jsonify(account)
+
+@app.route('/api/toggle_bot', methods=['POST'])
+def toggle_bot():
+    return jsonify({'is_running': engine.call('toggle')})